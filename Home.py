@@ -1,4 +1,5 @@
 import streamlit as st
+from utils.inicializacao import iniciar_servicos
 
 st.set_page_config(
     page_title="Astro Vision",
@@ -6,6 +7,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# API HTTP (com os mesmos caches), /metrics e sondagem dos provedores LLM,
+# uma vez por processo; nos reruns é só uma consulta ao st.cache_resource
+iniciar_servicos()
+
 st.title("🌙 Astro Vision - Seu Portal Astrológico")
 st.markdown("### Descubra os segredos do seu mapa astral")
 
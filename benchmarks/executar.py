@@ -0,0 +1,442 @@
+"""
+Benchmarks offline dos mapas, da geocodificação, da camada de LLM e da API
+
+Nada sai da máquina: a geocodificação consulta um Nominatim local e as
+funções de utils.gemini_ai falam com uma API local compatível com a OpenAI
+(ver benchmarks.servidores_locais), ambos com latência configurável. Caches
+e armazéns em disco vão para um diretório temporário, então os dados em
+data/ não são tocados.
+
+    python -m benchmarks.executar --saida bench.json
+    python -m benchmarks.executar --saida bench.json --comparar bench_anterior.json
+
+O resultado é um JSON com os metadados da execução e, por cenário, latências
+(p50/p95/p99/máx, em ms) e vazão. Com --comparar, cenários que ficaram mais
+lentos que a referência além da --tolerancia são listados e o processo
+termina com código 1 (para usar no CI ou antes de cada release).
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from contextlib import ExitStack
+from datetime import date, datetime, time as hora, timedelta
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from geopy.geocoders import Nominatim
+import streamlit as st
+
+from benchmarks import servidores_locais
+from utils import agendador_llm, api, astro_calc, clientes_llm, conteudo, gemini_ai, geocoding, lote_llm, roteador_llm
+from utils.efemerides import carregar_tabela
+from utils.geocache import CacheGeocodificacao
+from utils.limites import BaldeTokens
+
+GRUPOS = ("mapas", "geocodificacao", "llm", "api")
+
+# Métricas em que maior é pior / menor é pior, usadas na comparação
+METRICAS_LATENCIA = ("p50_ms", "p95_ms")
+METRICAS_VAZAO = ("vazao_por_s",)
+
+
+def resumir(latencias, duracao=None, **extras):
+    """
+    Estatísticas de uma série de medições
+
+    Args:
+        latencias (Sequence[float]): Duração de cada operação, em segundos
+        duracao (float, opcional): Tempo total (padrão: soma das latências,
+            para operações sequenciais)
+        **extras: Campos adicionais do cenário
+
+    Returns:
+        dict: n, media_ms, p50_ms, p95_ms, p99_ms, max_ms, vazao_por_s e extras
+    """
+    amostras = np.asarray(latencias, dtype=float) * 1000
+    duracao = float(np.sum(latencias)) if duracao is None else duracao
+    return {
+        "n": len(amostras),
+        "media_ms": round(float(amostras.mean()), 4),
+        "p50_ms": round(float(np.percentile(amostras, 50)), 4),
+        "p95_ms": round(float(np.percentile(amostras, 95)), 4),
+        "p99_ms": round(float(np.percentile(amostras, 99)), 4),
+        "max_ms": round(float(amostras.max()), 4),
+        "vazao_por_s": round(len(amostras) / duracao, 2) if duracao > 0 else None,
+        **extras,
+    }
+
+
+def _cronometrar(funcao, argumentos):
+    latencias = []
+    for args in argumentos:
+        inicio = time.perf_counter()
+        funcao(*args)
+        latencias.append(time.perf_counter() - inicio)
+    return latencias
+
+
+def _nascimentos(n, semente):
+    aleatorio = random.Random(semente)
+    inicio = date(1940, 1, 1)
+    datas = [inicio + timedelta(days=aleatorio.randrange(365 * 70)) for _ in range(n)]
+    horas = [hora(aleatorio.randrange(24), aleatorio.randrange(60)) for _ in range(n)]
+    latitudes = [round(aleatorio.uniform(-33, 5), 4) for _ in range(n)]
+    longitudes = [round(aleatorio.uniform(-73, -35), 4) for _ in range(n)]
+    return datas, horas, latitudes, longitudes
+
+
+def benchmark_mapas(escala=1.0):
+    """calcular_mapa (cache frio e quente) e calcular_mapas_lote"""
+    n = max(10, int(2000 * escala))
+    datas, horas, latitudes, longitudes = _nascimentos(n, semente=1)
+    argumentos = list(zip(datas, horas, latitudes, longitudes))
+
+    astro_calc.configurar_cache_mapas(tamanho_maximo=2 * n, limpar=True)
+    resultados = {
+        "mapa_unico_frio": resumir(_cronometrar(astro_calc.calcular_mapa, argumentos)),
+        "mapa_unico_quente": resumir(_cronometrar(astro_calc.calcular_mapa, argumentos)),
+    }
+    astro_calc.configurar_cache_mapas(limpar=True)
+
+    n_lote = max(100, int(20000 * escala))
+    datas, horas, latitudes, longitudes = _nascimentos(n_lote, semente=2)
+    repeticoes = 5
+    latencias = _cronometrar(astro_calc.calcular_mapas_lote,
+                             [(datas, horas, latitudes, longitudes, False)] * repeticoes)
+    resultados["mapas_lote"] = resumir(latencias, mapas_por_lote=n_lote,
+                                       mapas_por_s=round(n_lote * repeticoes / sum(latencias), 1))
+
+    # Com a tabela de efemérides pré-calculada (só se já foi gerada nesta máquina)
+    tabela = carregar_tabela()
+    if tabela is not None:
+        latencias = _cronometrar(astro_calc.calcular_mapas_lote,
+                                 [(datas, horas, latitudes, longitudes, tabela)] * repeticoes)
+        resultados["mapas_lote_tabela"] = resumir(latencias, mapas_por_lote=n_lote,
+                                                  mapas_por_s=round(n_lote * repeticoes / sum(latencias), 1))
+    return resultados
+
+
+def benchmark_geocodificacao(diretorio, escala=1.0, latencia=0.05):
+    """buscar_coordenadas: gazetteer, Nominatim local (acerto e não encontrada) e cache em disco"""
+    servidor = servidores_locais.iniciar_nominatim(latencia)
+    geolocator = Nominatim(user_agent="astro-vision-benchmark", domain=servidor.endereco, scheme="http", timeout=10)
+    cache = CacheGeocodificacao(Path(diretorio) / "geocache.sqlite3")
+
+    with ExitStack() as pilha:
+        # O limite de 1 requisição/s é política do servidor público, não do local
+        geocoding.configurar_geocodificacao(geolocator, cache, BaldeTokens(taxa=1e6, capacidade=1e6))
+        pilha.callback(geocoding.configurar_geocodificacao)
+
+        n = max(5, int(100 * escala))
+        conhecidas = [(nome, "Brasil") for nome in geocoding.sugerir_cidades_brasil()]
+        novas = [(f"Vila Benchmark {i}", "Brasil") for i in range(n)]
+        inexistentes = [(f"{servidores_locais.PREFIXO_INEXISTENTE} {i}", "Brasil") for i in range(n)]
+
+        resultados = {
+            "geocodificacao_gazetteer": resumir(_cronometrar(geocoding.buscar_coordenadas, conhecidas * 10)),
+            "geocodificacao_nominatim": resumir(_cronometrar(geocoding.buscar_coordenadas, novas),
+                                                latencia_servidor_ms=latencia * 1000),
+            "geocodificacao_nao_encontrada": resumir(_cronometrar(geocoding.buscar_coordenadas, inexistentes),
+                                                     latencia_servidor_ms=latencia * 1000),
+        }
+        requisicoes = servidor.requisicoes
+        resultados["geocodificacao_cache_disco"] = resumir(
+            _cronometrar(geocoding.buscar_coordenadas, novas + inexistentes),
+            requisicoes_ao_servidor=servidor.requisicoes - requisicoes,
+        )
+    servidor.parar()
+    return resultados
+
+
+def _ambiente_llm(pilha, diretorio, servidor):
+    # Todos os provedores apontam para o servidor local, sem limite de cota
+    url = f"http://{servidor.endereco}/v1"
+    pilha.enter_context(mock.patch.dict(clientes_llm.PROVEDORES, {
+        provedor: (secret, url) for provedor, (secret, _) in clientes_llm.PROVEDORES.items()
+    }))
+    pilha.enter_context(mock.patch.dict(os.environ, {
+        secret: "local" for secret, _ in clientes_llm.PROVEDORES.values()
+    }))
+    agendador_llm.configurar_agendadores(
+        limites={provedor: (10**9, 10**6, None) for provedor in agendador_llm.LIMITES_PROVEDORES},
+        caminho_cota=Path(diretorio) / "cota_llm.sqlite3",
+    )
+    pilha.callback(agendador_llm.configurar_agendadores)
+    roteador_llm.reiniciar_roteador()
+    pilha.callback(roteador_llm.reiniciar_roteador)
+    pilha.callback(clientes_llm.fechar_clientes)
+    clientes_llm.fechar_clientes()
+
+    armazem = conteudo.ArmazemConteudo(Path(diretorio) / "conteudo.sqlite3")
+    for modulo in (gemini_ai, lote_llm):
+        pilha.enter_context(mock.patch.object(modulo, "obter_armazem", lambda: armazem))
+    pilha.enter_context(mock.patch.object(lote_llm, "DIRETORIO_DADOS", Path(diretorio)))
+
+
+def _limpar_caches_llm():
+    # Só as funções de utils.gemini_ai usam st.cache_data
+    st.cache_data.clear()
+
+
+def _stream(signo, data):
+    # Tempo até o primeiro pedaço e total do stream
+    inicio = time.perf_counter()
+    primeiro = None
+    for _ in gemini_ai.gerar_horoscopo_stream(signo, data):
+        if primeiro is None:
+            primeiro = time.perf_counter() - inicio
+    return primeiro, time.perf_counter() - inicio
+
+
+def benchmark_llm(diretorio, escala=1.0, latencia=0.2, concorrencia=lote_llm.CONCORRENCIA_PADRAO):
+    """Funções de utils.gemini_ai contra a API local"""
+    servidor = servidores_locais.iniciar_llm(latencia)
+    signos = astro_calc.SIGNOS
+    dias = max(1, int(2 * escala))
+    inicio_datas = date(2030, 1, 1)
+
+    with ExitStack() as pilha:
+        _ambiente_llm(pilha, diretorio, servidor)
+        _limpar_caches_llm()
+        resultados = {}
+
+        # Geração síncrona (cache miss em tudo) e depois leitura do armazém
+        argumentos = [(signo, inicio_datas + timedelta(days=dia)) for dia in range(dias) for signo in signos]
+        resultados["horoscopo_gerado"] = resumir(_cronometrar(gemini_ai.gerar_horoscopo, argumentos),
+                                                 latencia_servidor_ms=latencia * 1000)
+        _limpar_caches_llm()
+        resultados["horoscopo_armazenado"] = resumir(_cronometrar(gemini_ai.gerar_horoscopo, argumentos))
+
+        # Streaming: tempo até o primeiro pedaço (o que o usuário percebe)
+        argumentos = [(signo, inicio_datas - timedelta(days=1 + dia)) for dia in range(dias) for signo in signos]
+        tempos = [_stream(*args) for args in argumentos]
+        resultados["horoscopo_stream_primeiro_pedaco"] = resumir([primeiro for primeiro, _ in tempos],
+                                                                 latencia_servidor_ms=latencia * 1000)
+        resultados["horoscopo_stream_completo"] = resumir([total for _, total in tempos])
+
+        # Rajada de sessões pedindo o mesmo texto ao mesmo tempo (single-flight)
+        simultaneas = 30
+        requisicoes = servidor.requisicoes
+        barreira = threading.Barrier(simultaneas)
+        latencias = [None] * simultaneas
+
+        def _sessao(indice):
+            barreira.wait()
+            comeco = time.perf_counter()
+            gemini_ai.analisar_compatibilidade("Áries", "Leão", "Amizade")
+            latencias[indice] = time.perf_counter() - comeco
+
+        comeco = time.perf_counter()
+        threads = [threading.Thread(target=_sessao, args=(i,)) for i in range(simultaneas)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        resultados["compatibilidade_rajada"] = resumir(latencias, time.perf_counter() - comeco,
+                                                       sessoes=simultaneas,
+                                                       requisicoes_ao_servidor=servidor.requisicoes - requisicoes)
+
+        # Pré-geração em lote (asyncio, concorrência limitada)
+        relatorio = gemini_ai.pregerar_horoscopos(inicio_datas + timedelta(days=100), dias=max(1, int(4 * escala)),
+                                                  concorrencia=concorrencia)
+        resultados["pregeracao_horoscopos"] = {
+            "n": relatorio["concluidas"],
+            "falhas": relatorio["falhas"],
+            "concorrencia": concorrencia,
+            "vazao_por_s": round(relatorio["vazao_por_minuto"] / 60, 2),
+            "p50_ms": round(relatorio["latencia_p50"] * 1000, 4) if relatorio["latencia_p50"] is not None else None,
+            "p95_ms": round(relatorio["latencia_p95"] * 1000, 4) if relatorio["latencia_p95"] is not None else None,
+            "latencia_servidor_ms": latencia * 1000,
+        }
+        _limpar_caches_llm()
+    servidor.parar()
+    return resultados
+
+
+# Chave aceita pela API durante o benchmark (a verificação entra na medição)
+CHAVE_API_BENCHMARK = "benchmark"
+
+
+async def _chamar_api(metodo, caminho, corpo):
+    # Uma requisição direto na aplicação ASGI, sem socket nem servidor HTTP
+    mensagens = [{"type": "http.request", "body": json.dumps(corpo).encode(), "more_body": False}]
+    status = []
+
+    async def receber():
+        return mensagens.pop() if mensagens else {"type": "http.disconnect"}
+
+    async def enviar(mensagem):
+        if mensagem["type"] == "http.response.start":
+            status.append(mensagem["status"])
+
+    cabecalhos = [(b"authorization", b"Bearer " + CHAVE_API_BENCHMARK.encode())]
+    await api.app({"type": "http", "method": metodo, "path": caminho, "query_string": b"", "headers": cabecalhos},
+                  receber, enviar)
+    return status[0]
+
+
+async def _rajada_api(corpos, concorrencia):
+    latencias = []
+    fila = iter(corpos)
+
+    async def cliente():
+        for corpo in fila:
+            inicio = time.perf_counter()
+            status = await _chamar_api("POST", "/v1/mapa", corpo)
+            latencias.append(time.perf_counter() - inicio)
+            if status != 200:
+                raise RuntimeError(f"/v1/mapa respondeu {status}")
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente() for _ in range(concorrencia)))
+    return latencias, time.perf_counter() - inicio
+
+
+def benchmark_api(escala=1.0, concorrencia=64):
+    """POST /v1/mapa em rajada: mapas novos, repetidos (cache) e sem o agrupamento em lotes"""
+    n = max(64, int(2000 * escala))
+    datas, horas, latitudes, longitudes = _nascimentos(n, semente=3)
+    corpos = [{"data": d.isoformat(), "hora": h.strftime("%H:%M"), "latitude": lat, "longitude": lon}
+              for d, h, lat, lon in zip(datas, horas, latitudes, longitudes)]
+
+    resultados = {}
+    astro_calc.configurar_cache_mapas(tamanho_maximo=2 * n)
+    for nome, agrupamento in (("api_mapa_sem_lote", {'janela': 0, 'tamanho_maximo': 1}),
+                              ("api_mapa_frio", {}),
+                              ("api_mapa_quente", {})):
+        if nome != "api_mapa_quente":
+            astro_calc.configurar_cache_mapas(limpar=True)
+        agrupador = api.configurar_agrupador(**agrupamento)
+        with mock.patch.object(api, "chaves_api", lambda: frozenset({CHAVE_API_BENCHMARK})):
+            latencias, duracao = asyncio.run(_rajada_api(corpos, concorrencia))
+        resultados[nome] = resumir(latencias, duracao, concorrencia=concorrencia,
+                                   mapas_por_lote=round(agrupador.mapas / agrupador.lotes, 1))
+    api.configurar_agrupador()
+    astro_calc.configurar_cache_mapas(limpar=True)
+    return resultados
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def executar(grupos=GRUPOS, escala=1.0, latencia_llm=0.2, latencia_nominatim=0.05):
+    """
+    Roda os grupos de cenários pedidos
+
+    Args:
+        grupos (Iterable[str]): Subconjunto de GRUPOS
+        escala (float): Multiplica a quantidade de operações de cada cenário
+        latencia_llm (float): Latência até o primeiro token da API local (s)
+        latencia_nominatim (float): Latência do Nominatim local (s)
+
+    Returns:
+        dict: 'meta' (versões, commit, parâmetros) e 'resultados' (cenário -> estatísticas)
+    """
+    import swisseph
+
+    resultados = {}
+    with tempfile.TemporaryDirectory(prefix="astro-bench-") as diretorio:
+        if "mapas" in grupos:
+            resultados.update(benchmark_mapas(escala))
+        if "geocodificacao" in grupos:
+            resultados.update(benchmark_geocodificacao(diretorio, escala, latencia_nominatim))
+        if "llm" in grupos:
+            resultados.update(benchmark_llm(diretorio, escala, latencia_llm))
+        if "api" in grupos:
+            resultados.update(benchmark_api(escala))
+
+    return {
+        "meta": {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "numpy": np.__version__,
+            "pyswisseph": getattr(swisseph, "__version__", None),
+            "escala": escala,
+            "latencia_llm_ms": latencia_llm * 1000,
+            "latencia_nominatim_ms": latencia_nominatim * 1000,
+        },
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, referencia, tolerancia=0.25):
+    """
+    Regressões de atual em relação a uma execução de referência
+
+    Args:
+        atual, referencia (dict): Saídas de executar
+        tolerancia (float): Piora relativa aceita (0.25 = 25%)
+
+    Returns:
+        list[str]: Uma descrição por métrica que piorou além da tolerância
+    """
+    regressoes = []
+    for cenario, metricas in atual["resultados"].items():
+        base = referencia.get("resultados", {}).get(cenario)
+        if not base:
+            continue
+        for nome in METRICAS_LATENCIA + METRICAS_VAZAO:
+            valor, anterior = metricas.get(nome), base.get(nome)
+            if not valor or not anterior:
+                continue
+            piorou = valor > anterior * (1 + tolerancia) if nome in METRICAS_LATENCIA \
+                else valor < anterior / (1 + tolerancia)
+            if piorou:
+                regressoes.append(f"{cenario}.{nome}: {anterior} -> {valor} ({(valor / anterior - 1) * 100:+.0f}%)")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks offline (mapas, geocodificação e LLM)")
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultado (padrão: stdout)")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior, para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita (padrão: 0.25)")
+    parser.add_argument("--grupos", default=",".join(GRUPOS), help=f"Subconjunto de {','.join(GRUPOS)}")
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica o número de operações")
+    parser.add_argument("--latencia-llm", type=float, default=0.2, help="Latência da API LLM local (s)")
+    parser.add_argument("--latencia-nominatim", type=float, default=0.05, help="Latência do Nominatim local (s)")
+    args = parser.parse_args()
+
+    grupos = [grupo.strip() for grupo in args.grupos.split(",") if grupo.strip()]
+    desconhecidos = set(grupos) - set(GRUPOS)
+    if desconhecidos:
+        parser.error(f"grupos desconhecidos: {', '.join(sorted(desconhecidos))}")
+
+    resultado = executar(grupos, args.escala, args.latencia_llm, args.latencia_nominatim)
+    texto = json.dumps(resultado, ensure_ascii=False, indent=2)
+    if args.saida:
+        args.saida.write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+
+    for cenario, metricas in resultado["resultados"].items():
+        print(f"{cenario:36} p50 {metricas.get('p50_ms')} ms | p95 {metricas.get('p95_ms')} ms"
+              f" | {metricas.get('vazao_por_s')} op/s", file=sys.stderr)
+
+    if args.comparar:
+        regressoes = comparar(resultado, json.loads(args.comparar.read_text(encoding="utf-8")), args.tolerancia)
+        for regressao in regressoes:
+            print(f"⚠️ regressão: {regressao}", file=sys.stderr)
+        if regressoes:
+            sys.exit(1)
+        print("✅ sem regressões", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
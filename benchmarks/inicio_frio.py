@@ -0,0 +1,192 @@
+"""
+Perfil de inicialização a frio das páginas do Streamlit
+
+Para cada página (Home.py e pages/*.py), lê os imports de nível de módulo
+(ast) e os executa num interpretador novo com `python -X importtime`,
+depois do próprio streamlit, que todo processo já carrega. O relatório mostra
+o tempo de import de cada página e quais pacotes pesam mais. Imports feitos
+dentro de funções ou de blocos só executados sob demanda não entram, e essa
+é a ideia: é o custo que todo usuário paga antes do primeiro render.
+
+    python -m benchmarks.inicio_frio
+    python -m benchmarks.inicio_frio --renderizar --saida inicio.json
+    python -m benchmarks.inicio_frio --orcamento-ms 300 --comparar inicio_anterior.json
+
+Com --renderizar, mede também o primeiro render de cada página (AppTest,
+também num processo novo). --orcamento-ms e --comparar terminam com código 1
+se alguma página passar do orçamento ou piorar além da --tolerancia.
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+MARCADOR = "--inicio-pagina--"
+
+# Pacotes mostrados no detalhamento de cada página
+MAIORES_PACOTES = 6
+
+
+def paginas(raiz=RAIZ):
+    """Home.py e as páginas de pages/, na ordem do menu"""
+    return [raiz / "Home.py"] + sorted((raiz / "pages").glob("*.py"))
+
+
+def importacoes_da_pagina(caminho):
+    """
+    Imports executados ao carregar a página (nível de módulo, fora de funções)
+
+    Returns:
+        list[str]: Trechos de código das instruções import
+    """
+    fonte = Path(caminho).read_text(encoding="utf-8")
+    arvore = ast.parse(fonte)
+    trechos = []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            trechos.append(ast.get_source_segment(fonte, no))
+    return trechos
+
+
+def _interpretar_importtime(saida_erro):
+    # Linhas "import time: self [us] | cumulative | pacote" depois do marcador
+    depois = saida_erro.split(MARCADOR, 1)[-1]
+    por_pacote = {}
+    total = 0
+    for linha in depois.splitlines():
+        if not linha.startswith("import time:") or "self [us]" in linha:
+            continue
+        proprio, cumulativo, nome = linha[len("import time:"):].split("|", 2)
+        if not nome.startswith("  "):
+            # Módulo importado diretamente (nível 0): soma no total da página
+            total += int(cumulativo)
+        raiz = nome.strip().split(".")[0]
+        por_pacote[raiz] = por_pacote.get(raiz, 0) + int(proprio)
+    return total, por_pacote
+
+
+def medir_importacoes(caminho, repeticoes=3):
+    """
+    Tempo de import da página num processo novo (mediana das repetições)
+
+    Returns:
+        dict: 'import_ms', 'pacotes' (pacote -> ms, só tempo próprio) e 'imports'
+    """
+    trechos = importacoes_da_pagina(caminho)
+    codigo = "\n".join(["import sys", "import streamlit", f"sys.stderr.write({MARCADOR!r} + '\\n')"] + trechos)
+    ambiente = {**os.environ, "PYTHONPATH": str(RAIZ)}
+
+    medicoes = []
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ, env=ambiente,
+                                  capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise RuntimeError(f"{Path(caminho).name}: {processo.stderr.strip().splitlines()[-1]}")
+        medicoes.append(_interpretar_importtime(processo.stderr))
+
+    total, pacotes = sorted(medicoes, key=lambda medicao: medicao[0])[len(medicoes) // 2]
+    maiores = sorted(pacotes.items(), key=lambda item: -item[1])[:MAIORES_PACOTES]
+    return {
+        "import_ms": round(total / 1000, 1),
+        "pacotes": {pacote: round(us / 1000, 1) for pacote, us in maiores},
+        "imports": trechos,
+    }
+
+
+_CODIGO_RENDER = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+inicio = time.perf_counter()
+AppTest.from_file(sys.argv[1], default_timeout=60).run()
+print(time.perf_counter() - inicio)
+"""
+
+
+def medir_render(caminho, repeticoes=3):
+    """
+    Primeiro render da página (AppTest) num processo novo, em ms (mediana)
+
+    Inclui os imports da página e a execução do script até o fim, como na
+    primeira visita a uma réplica recém-iniciada.
+    """
+    ambiente = {**os.environ, "PYTHONPATH": str(RAIZ)}
+    tempos = []
+    for _ in range(repeticoes):
+        processo = subprocess.run([sys.executable, "-c", _CODIGO_RENDER, str(caminho)], cwd=RAIZ, env=ambiente,
+                                  capture_output=True, text=True)
+        if processo.returncode != 0:
+            raise RuntimeError(f"{Path(caminho).name}: {processo.stderr.strip().splitlines()[-1]}")
+        tempos.append(float(processo.stdout.strip().splitlines()[-1]))
+    return round(statistics.median(tempos) * 1000, 1)
+
+
+def perfil(renderizar=False, repeticoes=3):
+    """
+    Perfil de todas as páginas
+
+    Returns:
+        dict: nome do arquivo -> 'import_ms', 'pacotes', 'imports' e, com
+        renderizar, 'render_ms'
+    """
+    resultado = {}
+    for caminho in paginas():
+        dados = medir_importacoes(caminho, repeticoes)
+        if renderizar:
+            dados["render_ms"] = medir_render(caminho, repeticoes)
+        resultado[caminho.name] = dados
+    return resultado
+
+
+def verificar(resultado, orcamento_ms=None, referencia=None, tolerancia=0.25):
+    """
+    Páginas acima do orçamento ou mais lentas que a referência
+
+    Returns:
+        list[str]: Uma descrição por problema encontrado
+    """
+    problemas = []
+    for pagina, dados in resultado.items():
+        if orcamento_ms is not None and dados["import_ms"] > orcamento_ms:
+            problemas.append(f"{pagina}: import {dados['import_ms']} ms acima do orçamento de {orcamento_ms} ms")
+        anterior = (referencia or {}).get(pagina)
+        if not anterior:
+            continue
+        for campo in ("import_ms", "render_ms"):
+            if campo in dados and anterior.get(campo) and dados[campo] > anterior[campo] * (1 + tolerancia):
+                problemas.append(f"{pagina}: {campo} {anterior[campo]} -> {dados[campo]}")
+    return problemas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tempo de inicialização a frio das páginas")
+    parser.add_argument("--renderizar", action="store_true", help="Mede também o primeiro render (AppTest)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", type=Path, help="Arquivo JSON de resultado")
+    parser.add_argument("--orcamento-ms", type=float, help="Tempo máximo de import por página")
+    parser.add_argument("--comparar", type=Path, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=0.25, help="Piora relativa aceita (padrão: 0.25)")
+    args = parser.parse_args()
+
+    resultado = perfil(args.renderizar, args.repeticoes)
+    for pagina, dados in resultado.items():
+        render = f" | render {dados['render_ms']:7.1f} ms" if "render_ms" in dados else ""
+        pacotes = ", ".join(f"{pacote} {ms}" for pacote, ms in dados["pacotes"].items())
+        print(f"{pagina:32} import {dados['import_ms']:7.1f} ms{render}  [{pacotes}]")
+    if args.saida:
+        args.saida.write_text(json.dumps(resultado, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+    referencia = json.loads(args.comparar.read_text(encoding="utf-8")) if args.comparar else None
+    problemas = verificar(resultado, args.orcamento_ms, referencia, args.tolerancia)
+    for problema in problemas:
+        print(f"⚠️ {problema}", file=sys.stderr)
+    if problemas:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
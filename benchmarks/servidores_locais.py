@@ -0,0 +1,181 @@
+"""
+Servidores HTTP locais que imitam o Nominatim e uma API compatível com a
+OpenAI, para rodar os benchmarks sem rede, sem API key e sem gastar cota
+
+Os dois sobem numa porta livre de 127.0.0.1, numa thread daemon, com
+latência configurável, e contam as requisições recebidas.
+"""
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Buscas no Nominatim local que começam com este prefixo não têm resultado
+PREFIXO_INEXISTENTE = "inexistente"
+
+PALAVRAS_RESPOSTA = ("Hoje ", "os ", "astros ", "favorecem ", "novos ", "começos ", "e ", "conversas ", "sinceras. ")
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def _responder_json(self, conteudo, status=200, cabecalhos=None):
+        corpo = json.dumps(conteudo).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        for nome, valor in (cabecalhos or {}).items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+class _ManipuladorNominatim(_Manipulador):
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        self.server.contar()
+        time.sleep(self.server.latencia)
+        if url.path.rstrip("/") != "/search":
+            self._responder_json({"error": "not found"}, status=404)
+            return
+
+        consulta = parse_qs(url.query).get("q", [""])[0]
+        if consulta.lower().startswith(PREFIXO_INEXISTENTE):
+            self._responder_json([])
+            return
+        # Coordenadas determinísticas a partir do texto buscado
+        resumo = int(hashlib.sha1(consulta.encode()).hexdigest(), 16)
+        self._responder_json([{
+            "place_id": resumo % 10**9,
+            "lat": f"{(resumo % 18000) / 100 - 90:.4f}",
+            "lon": f"{(resumo // 18000 % 36000) / 100 - 180:.4f}",
+            "display_name": consulta,
+            "class": "place",
+            "type": "city",
+            "importance": 0.5,
+        }])
+
+
+class _ManipuladorLLM(_Manipulador):
+
+    def do_GET(self):
+        self.server.contar()
+        if urlparse(self.path).path.rstrip("/").endswith("/models"):
+            self._responder_json({"object": "list", "data": [
+                {"id": modelo, "object": "model", "created": 0, "owned_by": "local"}
+                for modelo in self.server.modelos
+            ]})
+        else:
+            self._responder_json({"error": {"message": "not found"}}, status=404)
+
+    def do_POST(self):
+        tamanho = int(self.headers.get("Content-Length", 0))
+        pedido = json.loads(self.rfile.read(tamanho) or b"{}")
+        self.server.contar()
+        time.sleep(self.server.latencia)
+
+        palavras = PALAVRAS_RESPOSTA[:max(1, min(len(PALAVRAS_RESPOSTA), pedido.get("max_tokens", 100) // 10))]
+        uso = {"prompt_tokens": 50, "completion_tokens": len(palavras), "total_tokens": 50 + len(palavras)}
+        cabecalhos = {"x-ratelimit-remaining-requests": "14000"}
+        if not pedido.get("stream"):
+            self._responder_json({
+                "id": "local", "object": "chat.completion", "created": 0, "model": pedido.get("model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": "".join(palavras)}}],
+                "usage": uso,
+            }, cabecalhos=cabecalhos)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        for nome, valor in cabecalhos.items():
+            self.send_header(nome, valor)
+        self.end_headers()
+        try:
+            for indice, palavra in enumerate(palavras):
+                if indice:
+                    time.sleep(self.server.intervalo_tokens)
+                self._enviar_evento({
+                    "id": "local", "object": "chat.completion.chunk", "created": 0, "model": pedido.get("model"),
+                    "choices": [{"index": 0, "delta": {"content": palavra}, "finish_reason": None}],
+                })
+            self._enviar_evento({
+                "id": "local", "object": "chat.completion.chunk", "created": 0, "model": pedido.get("model"),
+                "choices": [], "usage": uso,
+            })
+            self._enviar_pedaco(b"data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # O cliente fechou o stream (ex.: perdeu a corrida do roteador)
+            pass
+
+    def _enviar_evento(self, evento):
+        self._enviar_pedaco(f"data: {json.dumps(evento)}\n\n".encode())
+
+    def _enviar_pedaco(self, dados):
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(dados), dados))
+        self.wfile.flush()
+
+
+class ServidorLocal(ThreadingHTTPServer):
+    """Servidor numa thread daemon, com latência ajustável e contador de requisições"""
+
+    daemon_threads = True
+
+    def __init__(self, manipulador, latencia=0.0):
+        super().__init__(("127.0.0.1", 0), manipulador)
+        self.latencia = latencia
+        self.requisicoes = 0
+        self._lock = threading.Lock()
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def endereco(self):
+        """host:porta em que o servidor está escutando"""
+        return f"127.0.0.1:{self.server_address[1]}"
+
+    def contar(self):
+        with self._lock:
+            self.requisicoes += 1
+
+    def parar(self):
+        self.shutdown()
+        self.server_close()
+
+
+def iniciar_nominatim(latencia=0.05):
+    """
+    Sobe o Nominatim local (só /search, formato JSON)
+
+    Args:
+        latencia (float): Espera de cada resposta, em segundos
+
+    Returns:
+        ServidorLocal: Use .endereco como domínio do geocoder (scheme http)
+    """
+    return ServidorLocal(_ManipuladorNominatim, latencia)
+
+
+def iniciar_llm(latencia=0.2, intervalo_tokens=0.01, modelos=("local",)):
+    """
+    Sobe a API local compatível com a OpenAI (/v1/chat/completions e /v1/models)
+
+    Args:
+        latencia (float): Espera até o primeiro token, em segundos
+        intervalo_tokens (float): Espera entre os pedaços do stream
+        modelos (Iterable[str]): Modelos listados em /v1/models
+
+    Returns:
+        ServidorLocal: base_url do cliente OpenAI é http://<endereco>/v1
+    """
+    servidor = ServidorLocal(_ManipuladorLLM, latencia)
+    servidor.intervalo_tokens = intervalo_tokens
+    servidor.modelos = tuple(modelos)
+    return servidor
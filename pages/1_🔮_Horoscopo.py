@@ -1,6 +1,6 @@
 import streamlit as st
 from datetime import datetime
-from utils.gemini_ai import gerar_horoscopo
+from utils.gemini_ai import gerar_horoscopo_stream, obter_horoscopo_armazenado
 
 st.set_page_config(page_title="Horóscopo Diário", page_icon="🔮", layout="wide")
 
@@ -24,17 +24,27 @@ with col1:
 with col2:
     st.markdown(f"### {signos[signo_selecionado]} {signo_selecionado}")
     
-    if gerar_btn:
-        with st.spinner("🌙 Consultando os astros..."):
-            try:
-                horoscopo = gerar_horoscopo(signo_selecionado, data_horoscopo)
-                st.markdown("#### 💫 Sua Previsão")
-                st.info(horoscopo)
-                st.markdown("---")
-                st.success("💡 **Dica**: Volte amanhã para sua nova previsão!")
-            except Exception as e:
-                st.error(f"⚠️ Erro ao gerar horóscopo: {str(e)}")
-                st.info("Verifique se a API key do Gemini está configurada nos Secrets.")
+    # Horóscopo pré-gerado aparece direto do armazém, sem esperar o botão
+    try:
+        horoscopo_pronto = obter_horoscopo_armazenado(signo_selecionado, data_horoscopo)
+    except Exception:
+        # Armazém indisponível (ex.: SQLite travado ou corrompido): o botão gera na hora
+        horoscopo_pronto = None
+    
+    if gerar_btn or horoscopo_pronto:
+        try:
+            st.markdown("#### 💫 Sua Previsão")
+            if horoscopo_pronto:
+                st.info(horoscopo_pronto)
+            else:
+                # Mostra o texto à medida que o modelo gera, em vez de esperar a resposta inteira
+                with st.container(border=True):
+                    st.write_stream(gerar_horoscopo_stream(signo_selecionado, data_horoscopo))
+            st.markdown("---")
+            st.success("💡 **Dica**: Volte amanhã para sua nova previsão!")
+        except Exception as e:
+            st.error(f"⚠️ Erro ao gerar horóscopo: {str(e)}")
+            st.info("Verifique se a API key do Gemini está configurada nos Secrets.")
 
 st.divider()
 
@@ -1,7 +1,13 @@
 import streamlit as st
 from datetime import datetime, time
-from utils.astro_calc import calcular_mapa
-from utils.geocoding import buscar_coordenadas, sugerir_cidades_brasil
+from utils.geocoding import ErroGeocodificacao, buscar_coordenadas, sugerir_cidades_brasil, sugerir_correcoes
+from utils.gemini_ai import interpretar_mapa_basico_stream
+
+MODO_BUSCA = "🔍 Buscar cidade"
+MODO_MANUAL = "✍️ Inserir coordenadas manualmente"
+
+# Mapas guardados por sessão (o usado há mais tempo sai primeiro)
+MAPAS_POR_SESSAO = 10
 
 st.set_page_config(page_title="Mapa Astral", page_icon="✨", layout="wide")
 
@@ -13,119 +19,229 @@ if 'latitude' not in st.session_state:
     st.session_state.latitude = -30.0346
 if 'longitude' not in st.session_state:
     st.session_state.longitude = -51.2177
+if 'mapas_calculados' not in st.session_state:
+    # Entradas do formulário -> resultado (coordenadas, posições e interpretação)
+    st.session_state.mapas_calculados = {}
+if 'mapa_atual' not in st.session_state:
+    st.session_state.mapa_atual = None
+
+
+def _chave_mapa(modo, cidade, data_nasc, hora_nasc, latitude, longitude):
+    """Entradas que determinam o resultado: repetidas, não geocodificam nem calculam de novo"""
+    if modo == MODO_BUSCA:
+        return ("cidade", " ".join(cidade.lower().split()), data_nasc, hora_nasc)
+    return ("coordenadas", round(latitude, 4), round(longitude, 4), data_nasc, hora_nasc, cidade.strip())
+
+
+def _calcular(modo, cidade, data_nasc, hora_nasc, latitude, longitude):
+    """
+    Geocodifica a cidade (no modo busca) e calcula o mapa
+
+    Returns:
+        dict: Resultado para guardar na sessão, ou None se a cidade não foi encontrada
+    """
+    endereco_completo = None
+    if modo == MODO_BUSCA:
+        with st.spinner(f"🔍 Buscando coordenadas de {cidade}..."):
+            lat_encontrada, lon_encontrada, endereco_completo = buscar_coordenadas(cidade)
+        if not (lat_encontrada and lon_encontrada):
+            return None
+        latitude, longitude = lat_encontrada, lon_encontrada
+
+    # Swiss Ephemeris e numpy só carregam no primeiro cálculo, não na abertura da página
+    from utils.astro_calc import calcular_mapa
+    from utils.ingressos import sol_na_cuspide
+
+    with st.spinner("🔮 Calculando posições planetárias..."):
+        posicoes = calcular_mapa(data_nasc, hora_nasc, latitude, longitude)
+        cuspide = sol_na_cuspide(data_nasc, hora_nasc)
+
+    return {
+        'cidade': cidade,
+        'endereco': endereco_completo,
+        'data': data_nasc,
+        'hora': hora_nasc,
+        'latitude': latitude,
+        'longitude': longitude,
+        'posicoes': posicoes,
+        'cuspide': cuspide,
+        'interpretacao_ia': None,
+    }
+
+
+def _mostrar_sugestoes(cidade):
+    """Cidades do gazetteer parecidas com a digitada (ou homônimas, se faltou a UF)"""
+    sugestoes = sugerir_correcoes(cidade)
+    if sugestoes:
+        st.info("💡 Você quis dizer: " + "; ".join(f"**{sugestao}**" for sugestao in sugestoes) + "?")
+
+
+def _processar(modo, cidade, data_nasc, hora_nasc, latitude, longitude):
+    """Resultado das entradas: da sessão, se já calculado, ou calculado agora"""
+    mapas = st.session_state.mapas_calculados
+    chave = _chave_mapa(modo, cidade, data_nasc, hora_nasc, latitude, longitude)
+    # Tirar e pôr de volta deixa o mapa como o usado mais recentemente
+    resultado = mapas.pop(chave, None)
+
+    if resultado is None:
+        st.session_state.mapa_atual = None
+        try:
+            resultado = _calcular(modo, cidade, data_nasc, hora_nasc, latitude, longitude)
+        except ErroGeocodificacao as e:
+            st.warning(f"⚠️ {str(e)}")
+            _mostrar_sugestoes(cidade)
+            return
+        except Exception as e:
+            st.error(f"⚠️ Erro ao calcular mapa: {str(e)}")
+            return
+        if resultado is None:
+            st.error("⚠️ Não foi possível encontrar a cidade. Tente incluir o estado (ex: 'Porto Alegre, RS') ou use coordenadas manuais.")
+            _mostrar_sugestoes(cidade)
+            return
+
+    mapas[chave] = resultado
+    while len(mapas) > MAPAS_POR_SESSAO:
+        mapas.pop(next(iter(mapas)))
+
+    if modo == MODO_BUSCA:
+        st.session_state.latitude = resultado['latitude']
+        st.session_state.longitude = resultado['longitude']
+    st.session_state.mapa_atual = resultado
+
+
+def _mostrar_mapa(resultado):
+    """Exibe um resultado guardado na sessão (sem recalcular nada)"""
+    posicoes = resultado['posicoes']
+
+    if resultado['endereco']:
+        st.success(f"📍 Localização encontrada: {resultado['endereco']}")
+    st.success(f"✅ Mapa calculado para {resultado['data'].strftime('%d/%m/%Y')} às {resultado['hora'].strftime('%H:%M')} em {resultado['cidade']}")
+    st.caption(f"📍 Coordenadas: {resultado['latitude']}, {resultado['longitude']}")
+
+    cuspide = resultado.get('cuspide')
+    if cuspide:
+        from utils.ingressos import descrever_cuspide
+        st.info(f"🌗 **Nascimento na cúspide {cuspide['signo_anterior']}/{cuspide['signo_seguinte']}**: "
+                f"{descrever_cuspide(cuspide)}. Vale conferir a hora de nascimento.")
+
+    st.markdown("---")
+    st.markdown("## 🌟 Posições Planetárias")
+
+    col_a, col_b = st.columns(2)
+    planetas_lista = list(posicoes.items())
+    metade = len(planetas_lista) // 2
 
-with st.form("dados_nascimento"):
-    col1, col2 = st.columns(2)
-    
-    with col1:
-        st.markdown("#### 📅 Data de Nascimento")
-        data_nasc = st.date_input("Selecione a data:", value=datetime(1990, 1, 1),
-                                   min_value=datetime(1900, 1, 1), max_value=datetime.now())
-        hora_nasc = st.time_input("Hora de nascimento:", value=time(12, 0))
-    
-    with col2:
-        st.markdown("#### 📍 Local de Nascimento")
-        
-        # Opção: buscar automaticamente ou inserir manualmente
-        modo = st.radio("Como deseja informar?", 
-                       ["🔍 Buscar cidade", "✍️ Inserir coordenadas manualmente"],
-                       horizontal=True)
-        
-        if modo == "🔍 Buscar cidade":
-            cidade = st.text_input("Digite a cidade:", placeholder="Ex: Porto Alegre, RS")
-            
-            # Botão para buscar coordenadas (fora do form)
-            if cidade:
-                st.caption("📍 As coordenadas serão calculadas automaticamente ao processar")
-            
-            # Valores temporários (serão atualizados)
-            latitude = st.session_state.latitude
-            longitude = st.session_state.longitude
-            
-        else:
-            cidade = st.text_input("Cidade (referência):", placeholder="Ex: Porto Alegre")
-            col_lat, col_lon = st.columns(2)
-            with col_lat:
-                latitude = st.number_input("Latitude:", value=st.session_state.latitude, format="%.4f")
-            with col_lon:
-                longitude = st.number_input("Longitude:", value=st.session_state.longitude, format="%.4f")
-            
-            st.caption("💡 Dica: Pesquise 'latitude longitude [sua cidade]' no Google")
-    
-    calcular_btn = st.form_submit_button("🌙 Calcular Mapa Astral", type="primary", use_container_width=True)
-
-# Processamento
-if calcular_btn:
-    if not cidade:
-        st.error("⚠️ Por favor, preencha a cidade de nascimento")
-    else:
-        # Se modo busca automática, buscar coordenadas
-        if modo == "🔍 Buscar cidade":
-            with st.spinner(f"🔍 Buscando coordenadas de {cidade}..."):
-                lat_encontrada, lon_encontrada, endereco_completo = buscar_coordenadas(cidade)
-                
-                if lat_encontrada and lon_encontrada:
-                    latitude = lat_encontrada
-                    longitude = lon_encontrada
-                    st.session_state.latitude = latitude
-                    st.session_state.longitude = longitude
-                    st.success(f"📍 Localização encontrada: {endereco_completo}")
-                else:
-                    st.error("⚠️ Não foi possível encontrar a cidade. Tente incluir o estado (ex: 'Porto Alegre, RS') ou use coordenadas manuais.")
-                    st.stop()
-        
-        with st.spinner("🔮 Calculando posições planetárias..."):
-            try:
-                posicoes = calcular_mapa(data_nasc, hora_nasc, latitude, longitude)
-                
-                st.success(f"✅ Mapa calculado para {data_nasc.strftime('%d/%m/%Y')} às {hora_nasc.strftime('%H:%M')} em {cidade}")
-                st.caption(f"📍 Coordenadas: {latitude}, {longitude}")
-                
-                st.markdown("---")
-                st.markdown("## 🌟 Posições Planetárias")
-                
-                col_a, col_b = st.columns(2)
-                planetas_lista = list(posicoes.items())
-                metade = len(planetas_lista) // 2
-                
-                with col_a:
-                    for planeta, dados in planetas_lista[:metade]:
-                        st.markdown(f"**{planeta}** em {dados['signo']}")
-                        st.caption(f"{dados['grau']:.2f}° | Longitude: {dados['longitude']:.2f}°")
-                        st.markdown("---")
-                
-                with col_b:
-                    for planeta, dados in planetas_lista[metade:]:
-                        st.markdown(f"**{planeta}** em {dados['signo']}")
-                        st.caption(f"{dados['grau']:.2f}° | Longitude: {dados['longitude']:.2f}°")
-                        st.markdown("---")
-                
-                st.markdown("---")
-                st.markdown("## 💬 Interpretação Básica (Gratuita)")
-                
-                interpretacao = f"""
+    with col_a:
+        for planeta, dados in planetas_lista[:metade]:
+            st.markdown(f"**{planeta}** em {dados['signo']}")
+            st.caption(f"{dados['grau']:.2f}° | Longitude: {dados['longitude']:.2f}°")
+            st.markdown("---")
+
+    with col_b:
+        for planeta, dados in planetas_lista[metade:]:
+            st.markdown(f"**{planeta}** em {dados['signo']}")
+            st.caption(f"{dados['grau']:.2f}° | Longitude: {dados['longitude']:.2f}°")
+            st.markdown("---")
+
+    st.markdown("---")
+    st.markdown("## 💬 Interpretação Básica (Gratuita)")
+
+    interpretacao = f"""
 **Sol em {posicoes['Sol']['signo']}**: Representa sua essência, identidade e forma de brilhar no mundo.
 
 **Lua em {posicoes['Lua']['signo']}**: Revela seu mundo emocional, necessidades afetivas e como você processa sentimentos.
 
 **Mercúrio em {posicoes['Mercúrio']['signo']}**: Mostra seu estilo de comunicação e forma de pensar.
-                """
-                st.info(interpretacao)
-                
-                st.warning("💎 **Premium**: Interpretação completa com todos os planetas + Casas + Ascendente + Aspectos + Relatório PDF - R$ 19,90/mês")
-                
-            except Exception as e:
-                st.error(f"⚠️ Erro ao calcular mapa: {str(e)}")
+    """
+    st.info(interpretacao)
+
+    st.markdown("#### 🤖 Interpretação Personalizada")
+    try:
+        with st.container(border=True):
+            if resultado['interpretacao_ia'] is not None:
+                st.markdown(resultado['interpretacao_ia'])
+            else:
+                texto = st.write_stream(interpretar_mapa_basico_stream(posicoes))
+                if isinstance(texto, str):
+                    resultado['interpretacao_ia'] = texto
+    except Exception as e:
+        # Falha do LLM não derruba o mapa já exibido
+        st.caption(f"Interpretação personalizada indisponível no momento: {str(e)}")
+
+    st.warning("💎 **Premium**: Interpretação completa com todos os planetas + Casas + Ascendente + Aspectos + Relatório PDF - R$ 19,90/mês")
+
+
+@st.fragment
+def formulario_e_mapa():
+    """Formulário e resultado: interações aqui não reexecutam o resto da página"""
+    # Fora do form, para os campos do local acompanharem a opção escolhida
+    modo = st.radio("Como deseja informar o local de nascimento?", [MODO_BUSCA, MODO_MANUAL], horizontal=True)
+
+    with st.form("dados_nascimento"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            st.markdown("#### 📅 Data de Nascimento")
+            data_nasc = st.date_input("Selecione a data:", value=datetime(1990, 1, 1),
+                                       min_value=datetime(1900, 1, 1), max_value=datetime.now())
+            hora_nasc = st.time_input("Hora de nascimento:", value=time(12, 0))
+
+        with col2:
+            st.markdown("#### 📍 Local de Nascimento")
+
+            if modo == MODO_BUSCA:
+                cidade = st.text_input("Digite a cidade:", placeholder="Ex: Porto Alegre, RS")
+
+                # Botão para buscar coordenadas (fora do form)
+                if cidade:
+                    st.caption("📍 As coordenadas serão calculadas automaticamente ao processar")
+
+                # Valores temporários (serão atualizados)
+                latitude = st.session_state.latitude
+                longitude = st.session_state.longitude
+
+            else:
+                cidade = st.text_input("Cidade (referência):", placeholder="Ex: Porto Alegre")
+                col_lat, col_lon = st.columns(2)
+                with col_lat:
+                    latitude = st.number_input("Latitude:", value=st.session_state.latitude, format="%.4f")
+                with col_lon:
+                    longitude = st.number_input("Longitude:", value=st.session_state.longitude, format="%.4f")
+
+                st.caption("💡 Dica: Pesquise 'latitude longitude [sua cidade]' no Google")
+
+        calcular_btn = st.form_submit_button("🌙 Calcular Mapa Astral", type="primary", use_container_width=True)
+
+    # Processamento
+    if calcular_btn:
+        if not cidade:
+            st.error("⚠️ Por favor, preencha a cidade de nascimento")
+            return
+        _processar(modo, cidade, data_nasc, hora_nasc, latitude, longitude)
+
+    # O último mapa continua na tela nas próximas interações
+    if st.session_state.mapa_atual is not None:
+        _mostrar_mapa(st.session_state.mapa_atual)
+
+
+@st.fragment
+def cidades_sugeridas():
+    """Grade de cidades com coordenadas (não é refeita quando o formulário roda)"""
+    with st.expander("🏙️ Ver coordenadas de cidades principais"):
+        cidades = list(sugerir_cidades_brasil().items())
+
+        # Um elemento por coluna, em vez de dois por cidade
+        for indice, coluna in enumerate(st.columns(3)):
+            coluna.markdown("\n\n".join(
+                f"**{cidade_nome}**  \n:gray[Lat: {coords[0]}, Lon: {coords[1]}]"
+                for cidade_nome, coords in cidades[indice::3]
+            ))
+
+
+formulario_e_mapa()
 
 # Cidades sugeridas (expandable)
-with st.expander("🏙️ Ver coordenadas de cidades principais"):
-    cidades_sugeridas = sugerir_cidades_brasil()
-    
-    cols = st.columns(3)
-    for idx, (cidade_nome, coords) in enumerate(cidades_sugeridas.items()):
-        with cols[idx % 3]:
-            st.markdown(f"**{cidade_nome}**")
-            st.caption(f"Lat: {coords[0]}, Lon: {coords[1]}")
+cidades_sugeridas()
 
 st.divider()
 st.markdown("### ℹ️ Sobre o Mapa Astral")
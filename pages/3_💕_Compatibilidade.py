@@ -1,41 +1,87 @@
 import streamlit as st
-from utils.gemini_ai import analisar_compatibilidade
+from datetime import datetime, time, timedelta
+from utils.gemini_ai import analisar_compatibilidade_stream
 
 st.set_page_config(page_title="Compatibilidade", page_icon="💕", layout="wide")
 
 st.title("💕 Análise de Compatibilidade")
 st.markdown("### Descubra a sintonia astrológica entre você e outra pessoa")
 
-signos = ["Áries", "Touro", "Gêmeos", "Câncer", "Leão", "Virgem",
-          "Libra", "Escorpião", "Sagitário", "Capricórnio", "Aquário", "Peixes"]
-
 col1, col2 = st.columns(2)
 
 with col1:
     st.markdown("#### 👤 Primeira Pessoa")
-    signo1 = st.selectbox("Signo Solar:", signos, key="signo1")
     nome1 = st.text_input("Nome (opcional):", placeholder="Ex: Maria", key="nome1")
+    data1 = st.date_input("Data de nascimento:", value=datetime(1990, 4, 1),
+                          min_value=datetime(1900, 1, 1), max_value=datetime.now(), key="data1")
+    hora1 = st.time_input("Hora de nascimento:", value=time(12, 0), key="hora1",
+                          help="Se não souber, deixe 12:00")
+    fuso1 = st.number_input("Fuso horário do local de nascimento (UTC):", min_value=-12.0, max_value=14.0,
+                             value=-3.0, step=0.5, key="fuso1",
+                             help="Brasília é UTC-3; some 1 se havia horário de verão na data")
 
 with col2:
     st.markdown("#### 💫 Segunda Pessoa")
-    signo2 = st.selectbox("Signo Solar:", signos, key="signo2", index=6)
     nome2 = st.text_input("Nome (opcional):", placeholder="Ex: João", key="nome2")
+    data2 = st.date_input("Data de nascimento:", value=datetime(1990, 10, 1),
+                          min_value=datetime(1900, 1, 1), max_value=datetime.now(), key="data2")
+    hora2 = st.time_input("Hora de nascimento:", value=time(12, 0), key="hora2",
+                          help="Se não souber, deixe 12:00")
+    fuso2 = st.number_input("Fuso horário do local de nascimento (UTC):", min_value=-12.0, max_value=14.0,
+                             value=-3.0, step=0.5, key="fuso2",
+                             help="Brasília é UTC-3; some 1 se havia horário de verão na data")
+
+st.caption("💡 A sinastria compara os planetas dos dois mapas: a latitude e a longitude não alteram essas "
+           "posições, mas o fuso sim (a Lua anda cerca de meio grau por hora). Com a hora desconhecida, "
+           "o score é aproximado.")
 
 tipo_relacao = st.radio("Tipo de relacionamento:", ["Romântico 💖", "Amizade 🤝", "Profissional 💼"], horizontal=True)
 
 analisar_btn = st.button("🔮 Analisar Compatibilidade", type="primary", use_container_width=True)
 
+def hora_universal(data, hora, fuso):
+    """Data e hora locais convertidas para UT, que é o que calcular_mapa espera"""
+    instante = datetime.combine(data, hora) - timedelta(hours=fuso)
+    return instante.date(), instante.time()
+
+def descrever_aspecto(aspecto, nome_a, nome_b):
+    """Linha de lista com um aspecto da sinastria"""
+    return (f"- {aspecto['planeta_a']} de {nome_a} em {aspecto['aspecto']} com "
+            f"{aspecto['planeta_b']} de {nome_b} (orbe {aspecto['orbe']:.1f}°)")
+
 if analisar_btn:
-    if signo1 == signo2:
-        st.warning("⚠️ Ambos os signos são iguais. A análise será sobre a dinâmica entre pessoas do mesmo signo.")
+    # Swiss Ephemeris e numpy só carregam na primeira análise, não na abertura da página
+    from utils.astro_calc import calcular_mapa
+    from utils.ingressos import descrever_cuspide, sol_na_cuspide
+    from utils.sinastria import sinastria
     
     with st.spinner("✨ Analisando a sintonia astrológica..."):
         try:
             tipo = tipo_relacao.split()[0]
+            
+            # Latitude e longitude só mudam as casas, que a sinastria não usa
+            ut1 = hora_universal(data1, hora1, fuso1)
+            ut2 = hora_universal(data2, hora2, fuso2)
+            posicoes1 = calcular_mapa(*ut1, 0.0, 0.0)
+            posicoes2 = calcular_mapa(*ut2, 0.0, 0.0)
+            signo1 = posicoes1['Sol']['signo']
+            signo2 = posicoes2['Sol']['signo']
             nome_exibicao1 = nome1 if nome1 else signo1
             nome_exibicao2 = nome2 if nome2 else signo2
             
-            resultado = analisar_compatibilidade(signo1, signo2, tipo)
+            if signo1 == signo2:
+                st.warning("⚠️ Ambos os signos solares são iguais. A análise será sobre a dinâmica entre pessoas do mesmo signo.")
+            
+            # Perto de um ingresso do Sol, um erro na hora troca o signo solar
+            for nome_exibicao, (data, hora) in ((nome_exibicao1, ut1), (nome_exibicao2, ut2)):
+                cuspide = sol_na_cuspide(data, hora)
+                if cuspide:
+                    st.info(f"🌗 {nome_exibicao} nasceu na cúspide {cuspide['signo_anterior']}/{cuspide['signo_seguinte']}: "
+                            f"{descrever_cuspide(cuspide)}.")
+            
+            # Score pelos aspectos entre os planetas dos dois mapas
+            resultado = sinastria(posicoes1, posicoes2, tipo)
+            score = round(resultado['score'])
             
             st.markdown("---")
             st.markdown(f"## 💫 Compatibilidade: {nome_exibicao1} × {nome_exibicao2}")
@@ -50,41 +96,47 @@ if analisar_btn:
             elem1 = elementos[signo1]
             elem2 = elementos[signo2]
             
-            if elem1 == elem2:
-                score = 85
-                cor = "🟢"
-            elif (elem1 in ["Fogo", "Ar"] and elem2 in ["Fogo", "Ar"]) or \
-                 (elem1 in ["Terra", "Água"] and elem2 in ["Terra", "Água"]):
-                score = 75
-                cor = "🟡"
+            # Em pares aleatórios (1950-2005), a mediana fica perto de 62 e
+            # de 12% a 20% dos pares, conforme o tipo, chegam a 75
+            if score >= 75:
+                cor, nivel = "🟢", "Excelente"
+            elif score >= 60:
+                cor, nivel = "🟡", "Boa"
             else:
-                score = 60
-                cor = "🟠"
+                cor, nivel = "🟠", "Moderada"
             
             col_score, col_elementos = st.columns([1, 2])
             
             with col_score:
                 st.metric("Score de Compatibilidade", f"{score}%")
-                st.markdown(f"{cor} **{'Excelente' if score >= 80 else 'Boa' if score >= 70 else 'Moderada'}**")
+                st.markdown(f"{cor} **{nivel}**")
             
             with col_elementos:
                 st.markdown(f"**{signo1}** ({elem1}) × **{signo2}** ({elem2})")
                 st.progress(score / 100)
+                st.caption(f"{len(resultado['aspectos'])} aspectos entre os planetas dos dois mapas")
             
             st.markdown("---")
             st.markdown("### 📝 Análise Detalhada")
-            st.info(resultado)
+            # O texto aparece à medida que o modelo gera (instantâneo se já estiver no armazém)
+            with st.container(border=True):
+                st.write_stream(analisar_compatibilidade_stream(signo1, signo2, tipo))
             
             st.markdown("---")
             col_pos, col_des = st.columns(2)
             
             with col_pos:
                 st.markdown("#### ✅ Pontos Fortes")
-                st.success("- Complementaridade de energias\n- Respeito mútuo\n- Crescimento conjunto")
+                harmonias = [descrever_aspecto(a, nome_exibicao1, nome_exibicao2) for a in resultado['harmonias'][:3]]
+                st.success("\n".join(harmonias) or "- Poucos aspectos harmônicos marcantes")
             
             with col_des:
                 st.markdown("#### ⚠️ Desafios")
-                st.warning("- Diferenças de ritmo\n- Necessidade de comunicação\n- Espaço individual")
+                desafios = [descrever_aspecto(a, nome_exibicao1, nome_exibicao2) for a in resultado['desafios'][:3]]
+                st.warning("\n".join(desafios) or "- Poucos aspectos tensos marcantes")
+            
+            with st.expander("🔭 Todos os aspectos da sinastria"):
+                st.dataframe(resultado['aspectos'], use_container_width=True)
             
             st.divider()
             st.warning("💎 **Sinastria Completa no Premium** - R$ 19,90/mês")
@@ -95,7 +147,7 @@ if analisar_btn:
 st.divider()
 st.markdown("### 📚 Sobre Compatibilidade Astrológica")
 st.markdown("""
-**Versão Gratuita**: Compatibilidade básica entre signos solares
+**Versão Gratuita**: Sinastria pelos aspectos entre os planetas dos dois mapas
 
 **Versão Premium**: Sinastria completa com todos os planetas
 """)
@@ -1,8 +1,14 @@
 """
 Página de Diagnóstico das APIs
 """
+import time
+
 import streamlit as st
 
+from utils.geocoding import gazetteer_completo, obter_gazetteer
+from utils.metricas import porta_servidor, registro
+from utils.saude_llm import obter_monitor
+
 st.set_page_config(page_title="Diagnóstico", page_icon="🔧", layout="wide")
 
 st.title("🔧 Diagnóstico de APIs")
@@ -35,6 +41,113 @@ with col2:
 
 st.markdown("---")
 
+# Sem o arquivo do gazetteer, só poucas cidades são resolvidas sem rede
+st.markdown("## 🗺️ Geocodificação")
+if gazetteer_completo():
+    st.success(f"✅ Gazetteer offline com {len(obter_gazetteer()):,} cidades".replace(",", "."))
+else:
+    st.warning(f"⚠️ Gazetteer offline não gerado: só {len(obter_gazetteer())} capitais e grandes cidades "
+               "são resolvidas sem rede; as demais vão ao Nominatim (1 requisição/s)")
+    st.caption("Gere com `python -m utils.gazetteer construir --ibge municipios.csv [--populacao populacao.csv]`")
+
+st.markdown("---")
+
+# Saúde dos provedores: só lê o estado do monitor, que sonda em segundo plano
+st.markdown("## 🩺 Saúde dos Provedores")
+
+monitor = obter_monitor()
+if st.button("🔁 Sondar agora", help="Sonda todos os provedores em paralelo (catálogo + geração de 1 token)"):
+    with st.spinner("Sondando provedores..."):
+        monitor.sondar_todos(geracao=True)
+
+saude = monitor.estado()
+if not saude:
+    st.warning("Nenhum provedor com API key configurada (GROQ_API_KEY, GEMINI_API_KEY ou OPENAI_API_KEY)")
+else:
+    colunas_saude = st.columns(len(saude))
+    for coluna, (provedor, estado) in zip(colunas_saude, saude.items()):
+        with coluna:
+            if estado['disponivel'] is None:
+                st.info(f"⏳ **{provedor}**: primeira sondagem em andamento")
+                continue
+            icone = "✅" if estado['disponivel'] else "❌"
+            p50 = f"{estado['latencia_p50'] * 1000:.0f} ms" if estado['latencia_p50'] is not None else "—"
+            st.metric(f"{icone} {provedor}", p50, help="Latência p50 das sondagens recentes")
+            st.caption(f"Erros: {estado['taxa_erro']:.0%} de {estado['sondagens']} sondagens")
+            if estado['latencia_geracao'] is not None:
+                st.caption(f"Geração de teste: {estado['latencia_geracao'] * 1000:.0f} ms")
+            st.caption(f"Última sondagem há {time.time() - estado['ultima_sondagem']:.0f} s")
+            if estado['ultimo_erro']:
+                st.caption(f"Último erro: {estado['ultimo_erro']}")
+
+    with st.expander("📋 Catálogo de modelos (em cache)"):
+        for provedor in saude:
+            modelos, listado_em = monitor.catalogo(provedor)
+            if listado_em is None:
+                st.caption(f"**{provedor}**: catálogo ainda não obtido")
+                continue
+            st.markdown(f"**{provedor}** — {len(modelos)} modelos, listados há {time.time() - listado_em:.0f} s")
+            st.caption(", ".join(modelos))
+
+st.markdown("---")
+
+# Métricas do processo (todas as sessões desde o último deploy ou "Zerar")
+st.markdown("## 📈 Métricas ao Vivo")
+
+# O endpoint é iniciado por Home.py (ou é o /metrics da API)
+porta_metricas = porta_servidor()
+col_info, col_atualizar, col_zerar = st.columns([3, 1, 1])
+with col_info:
+    minutos = (time.time() - registro.inicio) / 60
+    st.caption(f"Coletando há {minutos:.0f} min neste processo")
+    if porta_metricas:
+        st.caption(f"Prometheus: `http://127.0.0.1:{porta_metricas}/metrics`")
+    else:
+        st.caption("Prometheus: `/metrics` da API (API_PORTA) ou endpoint próprio com METRICAS_PORTA")
+with col_atualizar:
+    st.button("🔄 Atualizar", use_container_width=True)
+with col_zerar:
+    if st.button("🧹 Zerar", use_container_width=True):
+        registro.zerar()
+
+def _ms(segundos):
+    return round(segundos * 1000, 1) if segundos is not None else None
+
+etapas = registro.etapas()
+if etapas:
+    st.markdown("#### ⏱️ Latência por Etapa")
+    st.dataframe([{
+        "Etapa": etapa['etapa'],
+        "Rótulos": ", ".join(f"{chave}={valor}" for chave, valor in etapa['rotulos'].items()),
+        "Chamadas": etapa['n'],
+        "p50 (ms)": _ms(etapa['p50']),
+        "p95 (ms)": _ms(etapa['p95']),
+        "p99 (ms)": _ms(etapa['p99']),
+        "Máx (ms)": _ms(etapa['max']),
+    } for etapa in etapas], use_container_width=True, hide_index=True)
+else:
+    st.info("Nenhuma etapa medida ainda: use o Mapa Astral, o Horóscopo ou a Compatibilidade e atualize.")
+
+caches = registro.taxas_acerto_cache()
+if caches:
+    st.markdown("#### 🗄️ Acerto de Cache")
+    colunas_cache = st.columns(len(caches))
+    for coluna, (nome, cache) in zip(colunas_cache, sorted(caches.items())):
+        with coluna:
+            st.metric(nome, f"{cache['taxa_acerto']:.0%}", help=f"{cache['acertos']} acertos / {cache['falhas']} falhas")
+
+tokens = {}
+for contador in registro.contadores():
+    if contador['nome'] == "llm_tokens":
+        por_destino = tokens.setdefault(contador['rotulos'].get('destino', '?'), {'prompt': 0, 'resposta': 0})
+        por_destino[contador['rotulos']['tipo']] += contador['valor']
+if tokens:
+    st.markdown("#### 🔤 Tokens do LLM")
+    st.dataframe([{"Destino": destino, "Prompt": valores['prompt'], "Resposta": valores['resposta']}
+                  for destino, valores in sorted(tokens.items())], use_container_width=True, hide_index=True)
+
+st.markdown("---")
+
 # Testar Gemini
 st.markdown("## 🤖 Teste do Gemini")
 
@@ -44,34 +157,27 @@ if st.button("🧪 Testar Gemini API", type="primary"):
     else:
         with st.spinner("Testando Gemini..."):
             try:
-                import google.generativeai as genai
+                from utils.clientes_llm import obter_cliente
+                from utils.roteador_llm import DESTINOS_PADRAO
                 
-                genai.configure(api_key=st.secrets["GEMINI_API_KEY"])
+                # Os modelos vêm do catálogo em cache do monitor, sem listar de novo
+                modelos_disponiveis, _ = obter_monitor().catalogo("gemini")
+                if modelos_disponiveis:
+                    st.caption(f"📋 {len(modelos_disponiveis)} modelos no catálogo (ver Saúde dos Provedores)")
                 
-                # Listar modelos disponíveis
-                st.info("📋 Listando modelos disponíveis...")
-                modelos_disponiveis = []
+                # Mesmo endpoint e modelo que o app usa em produção
+                modelo_teste = DESTINOS_PADRAO["gemini"][1]
+                st.info(f"🧪 Testando geração com: {modelo_teste}")
                 
-                for model in genai.list_models():
-                    if 'generateContent' in model.supported_generation_methods:
-                        modelos_disponiveis.append(model.name)
-                        st.write(f"✅ {model.name}")
+                response = obter_cliente("gemini").chat.completions.create(
+                    model=modelo_teste,
+                    messages=[{"role": "user", "content": "Diga apenas 'Olá, teste bem-sucedido!' em português."}],
+                    max_tokens=50
+                )
                 
-                if modelos_disponiveis:
-                    st.success(f"Encontrados {len(modelos_disponiveis)} modelos!")
-                    
-                    # Testar geração com o primeiro modelo
-                    modelo_teste = modelos_disponiveis[0]
-                    st.info(f"🧪 Testando geração com: {modelo_teste}")
-                    
-                    model = genai.GenerativeModel(modelo_teste)
-                    response = model.generate_content("Diga apenas 'Olá, teste bem-sucedido!' em português.")
-                    
-                    st.success("✅ GEMINI FUNCIONANDO!")
-                    st.markdown("**Resposta:**")
-                    st.info(response.text)
-                else:
-                    st.warning("Nenhum modelo com generateContent encontrado")
+                st.success("✅ GEMINI FUNCIONANDO!")
+                st.markdown("**Resposta:**")
+                st.info(response.choices[0].message.content)
                     
             except Exception as e:
                 st.error(f"❌ Erro no Gemini: {str(e)}")
@@ -89,9 +195,9 @@ if st.button("🧪 Testar OpenAI API", type="primary"):
     else:
         with st.spinner("Testando OpenAI..."):
             try:
-                from openai import OpenAI
+                from utils.clientes_llm import obter_cliente
                 
-                client = OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
+                client = obter_cliente("openai")
                 
                 st.info("🧪 Gerando texto de teste com gpt-3.5-turbo...")
                 
@@ -1,8 +1,12 @@
 """
 Teste específico para Groq API (GRATUITA!)
 """
+import time
+
 import streamlit as st
-from openai import OpenAI
+from utils.agendador_llm import obter_agendador
+from utils.clientes_llm import obter_cliente
+from utils.saude_llm import obter_monitor
 
 st.set_page_config(page_title="Teste Groq", page_icon="⚡", layout="wide")
 
@@ -29,45 +33,58 @@ else:
     """)
     st.stop()
 
+# Saldo estimado pelo agendador (sincronizado com os cabeçalhos do Groq)
+st.markdown("## 📊 Cota")
+cota = obter_agendador("groq").estatisticas()
+col_dia, col_minuto, col_429 = st.columns(3)
+col_dia.metric("Requisições restantes hoje", f"{cota['restante_dia']:,}".replace(",", "."),
+               help=f"Limite: {cota['limite_dia']:,}/dia".replace(",", "."))
+col_minuto.metric("Restantes neste minuto", cota['restante_minuto'],
+                  help=f"Limite: {cota['limite_minuto']}/min")
+col_429.metric("Respostas 429", cota['erros_429'], help=f"{cota['retentativas']} repetidas com backoff")
+st.caption(f"Na fila: {cota['na_fila']} | Requisições liberadas: {cota['requisicoes']}")
+
 st.markdown("---")
 
-# Listar modelos disponíveis
+# Modelos do catálogo em cache (listado em segundo plano pelo monitor de saúde)
 st.markdown("## 📋 Modelos Disponíveis")
 
-if st.button("🔍 Listar Modelos Groq", type="secondary"):
-    with st.spinner("Listando modelos..."):
-        try:
-            client = OpenAI(
-                api_key=st.secrets["GROQ_API_KEY"],
-                base_url="https://api.groq.com/openai/v1"
-            )
-            
-            response = client.models.list()
-            
-            st.success("✅ Conexão OK! Modelos encontrados:")
-            
-            modelos_gratis = []
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.subheader("🔥 **Modelos GRATUITOS Recomendados**")
-                recomendados = [
-                    "llama-3.3-70b-versatile",
-                    "llama3-70b-8192",
-                    "mixtral-8x7b-32768",
-                    "gemma2-9b-it"
-                ]
-                
-                for model in recomendados:
-                    st.code(f"`{model}`", help="Excelente para horóscopos!")
-            
-            with col2:
-                st.subheader("📊 Todos os Modelos")
-                for model in response.data[:10]:  # Primeiros 10
-                    st.caption(f"• {model.id}")
-            
-        except Exception as e:
-            st.error(f"❌ Erro listando modelos: {str(e)}")
+monitor = obter_monitor()
+modelos_groq, listado_em = monitor.catalogo("groq")
+saude_groq = monitor.estado().get("groq")
+
+col1, col2 = st.columns(2)
+
+with col1:
+    st.subheader("🔥 **Modelos GRATUITOS Recomendados**")
+    st.caption("Excelentes para horóscopos!")
+    recomendados = [
+        "llama-3.3-70b-versatile",
+        "llama3-70b-8192",
+        "mixtral-8x7b-32768",
+        "gemma2-9b-it"
+    ]
+    
+    for model in recomendados:
+        if listado_em is not None and model not in modelos_groq:
+            st.caption(f"~~{model}~~ (fora do catálogo atual)")
+        else:
+            st.code(model)
+
+with col2:
+    st.subheader("📊 Todos os Modelos")
+    if listado_em is None:
+        st.info("⏳ Catálogo ainda não obtido: a primeira sondagem está em andamento.")
+    else:
+        st.caption(f"{len(modelos_groq)} modelos, listados há {time.time() - listado_em:.0f} s")
+        for model in modelos_groq:
+            st.caption(f"• {model}")
+
+if saude_groq and saude_groq['disponivel'] is not None:
+    status = "✅ Conexão OK" if saude_groq['disponivel'] else f"❌ Falhando: {saude_groq['ultimo_erro']}"
+    p50 = f"{saude_groq['latencia_p50'] * 1000:.0f} ms" if saude_groq['latencia_p50'] is not None else "—"
+    st.caption(f"{status} | p50 {p50} | erros {saude_groq['taxa_erro']:.0%} nas últimas "
+               f"{saude_groq['sondagens']} sondagens")
 
 st.markdown("---")
 
@@ -82,10 +99,9 @@ modelo = st.selectbox(
 if st.button("🚀 Testar Horóscopo (Áries)", type="primary"):
     with st.spinner("Gerando com Groq... ⚡"):
         try:
-            client = OpenAI(
-                api_key=st.secrets["GROQ_API_KEY"],
-                base_url="https://api.groq.com/openai/v1"
-            )
+            agendador = obter_agendador("groq")
+            # Sem retentativas do SDK: os 429 ficam com o agendador (pausa e backoff)
+            client = obter_cliente("groq").with_options(max_retries=0)
             
             prompt = """Gere horóscopo para Áries hoje.
 
@@ -96,12 +112,19 @@ Estrutura:
 
 Místico e acolhedor."""
 
-            response = client.chat.completions.create(
-                model=modelo,
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=250,
-                temperature=0.8
-            )
+            def chamar():
+                resposta = client.chat.completions.with_raw_response.create(
+                    model=modelo,
+                    messages=[{"role": "user", "content": prompt}],
+                    max_tokens=250,
+                    temperature=0.8
+                )
+                # Saldo diário informado pelo Groq
+                agendador.atualizar_pelos_cabecalhos(resposta.headers)
+                return resposta.parse()
+            
+            # Pela fila do agendador, para contar na cota
+            response = agendador.executar(chamar)
             
             st.success("✅ **GROQ FUNCIONANDO PERFEITAMENTE!** ⚡")
             st.markdown("### 🎯 Horóscopo Gerado:")
@@ -134,3 +157,7 @@ st.markdown("""
 1. **console.groq.com/keys** → Create API Key
 2. **Copiar** `gsk_...`
 3. **Streamlit Cloud → Settings → Secrets**:
+```
+GROQ_API_KEY = "gsk_..."
+```
+""")
@@ -0,0 +1,369 @@
+"""
+Agendador central das chamadas ao LLM, com controle de cota
+
+Cada provedor tem um orçamento diário e por minuto (no Groq gratuito,
+14.400 requisições/dia e 30/min). As chamadas esperam numa fila por
+prioridade: pedidos de usuários passam na frente de renovações e de
+pré-geração, e uma reserva da cota diária fica só para os usuários.
+Os agendadores de obter_agendador também registram cada requisição em
+utils.cota_llm, então os processos que montam o mesmo data/ (Streamlit,
+API, pré-geração, lotes e sondagens) dividem a cota em vez de cada um
+supor que tem a cota inteira.
+Respostas 429 pausam o provedor e são repetidas com backoff e jitter,
+em vez de virar erro na tela.
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import sqlite3
+import threading
+import time
+
+from utils.cota_llm import CotaCompartilhada, obter_cota
+from utils.limites import BaldeTokens
+from utils.metricas import registro
+
+# Menor número = atendido primeiro
+PRIORIDADE_INTERATIVA = 0
+PRIORIDADE_RENOVACAO = 5
+PRIORIDADE_PREGERACAO = 10
+
+# Provedor -> (requisições por dia, requisições por minuto, cabeçalho da
+# resposta com o saldo diário; None se o provedor não informa)
+LIMITES_PROVEDORES = {
+    "groq": (14400, 30, "x-ratelimit-remaining-requests"),
+    "openai": (10000, 500, None),
+    "gemini": (1500, 15, None),
+}
+
+# Fração da cota diária que só pedidos interativos podem consumir
+RESERVA_INTERATIVA = 0.1
+
+# De quanto em quanto tempo quem espera na fila confere se foi cancelado
+INTERVALO_CANCELAMENTO = 0.5
+
+
+class CotaEsgotada(Exception):
+    """A cota não liberou a requisição dentro do tempo de espera"""
+
+
+class AgendadorLLM:
+    """
+    Libera requisições a um provedor dentro dos limites diário e por
+    minuto, em ordem de prioridade (e de chegada, na mesma prioridade)
+    """
+
+    def __init__(self, por_dia, por_minuto, cabecalho_restante_dia=None,
+                 reserva_interativa=RESERVA_INTERATIVA, max_tentativas=5,
+                 espera_base=1.0, espera_maxima=60.0, cota=None):
+        self.por_dia = por_dia
+        self.por_minuto = por_minuto
+        self.cabecalho_restante_dia = cabecalho_restante_dia
+        self.reserva_interativa = reserva_interativa
+        self.max_tentativas = max_tentativas
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        # CotaCompartilhada com os outros processos; None conta só este processo
+        self.cota = cota
+
+        self._dia = BaldeTokens(taxa=por_dia / 86400, capacidade=por_dia)
+        self._minuto = BaldeTokens(taxa=por_minuto / 60, capacidade=por_minuto)
+        self._condicao = threading.Condition()
+        self._fila = []
+        self._sequencia = itertools.count()
+        self._pausado_ate = 0.0
+        self._contadores = {'requisicoes': 0, 'erros_429': 0, 'retentativas': 0, 'cota_esgotada': 0}
+
+    def _espera_para(self, item):
+        # Segundos até `item` poder ser liberado; 0 se foi liberado agora
+        if self._fila[0] != item:
+            return 1.0
+        agora = time.monotonic()
+        if agora < self._pausado_ate:
+            return self._pausado_ate - agora
+
+        prioridade = item[0]
+        reserva = 0 if prioridade <= PRIORIDADE_INTERATIVA else self.reserva_interativa * self.por_dia
+        faltam_dia = reserva + 1 - self._dia.disponiveis()
+        if faltam_dia > 0:
+            return faltam_dia / self._dia.taxa
+        faltam_minuto = 1 - self._minuto.disponiveis()
+        if faltam_minuto > 0:
+            return faltam_minuto / self._minuto.taxa
+        if self.cota is not None:
+            try:
+                espera = self.cota.consumir({'dia': self.por_dia - reserva, 'minuto': self.por_minuto})
+            except sqlite3.Error:
+                # Sem o arquivo, vale só a conta deste processo
+                espera = 0
+            if espera > 0:
+                return espera
+
+        self._dia.tentar()
+        self._minuto.tentar()
+        heapq.heappop(self._fila)
+        self._contadores['requisicoes'] += 1
+        return 0
+
+    def _contar(self, nome):
+        with self._condicao:
+            self._contadores[nome] += 1
+
+    def adquirir(self, prioridade=PRIORIDADE_INTERATIVA, timeout=None, cancelado=None):
+        """
+        Espera a vez na fila e consome uma requisição da cota
+
+        Args:
+            prioridade (int): PRIORIDADE_INTERATIVA, _RENOVACAO ou _PREGERACAO
+            timeout (float, opcional): Espera máxima em segundos
+            cancelado (threading.Event, opcional): Se marcado, sai da fila
+                sem consumir
+
+        Returns:
+            bool: True se liberou, False se estourou o timeout ou foi
+            cancelado (sondagens com timeout=0 também recebem False; só
+            executar conta cota_esgotada)
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        item = (prioridade, next(self._sequencia))
+        with self._condicao:
+            heapq.heappush(self._fila, item)
+            liberado = False
+            try:
+                while True:
+                    if cancelado is not None and cancelado.is_set():
+                        return False
+                    espera = self._espera_para(item)
+                    if espera == 0:
+                        liberado = True
+                        return True
+                    if limite is not None:
+                        restante = limite - time.monotonic()
+                        if restante <= 0:
+                            return False
+                        espera = min(espera, restante)
+                    if cancelado is not None:
+                        espera = min(espera, INTERVALO_CANCELAMENTO)
+                    self._condicao.wait(espera)
+            finally:
+                if not liberado:
+                    self._fila.remove(item)
+                    heapq.heapify(self._fila)
+                # O próximo da fila pode ter virado o primeiro
+                self._condicao.notify_all()
+
+    def devolver(self):
+        """Devolve a requisição liberada por adquirir que acabou não sendo feita"""
+        with self._condicao:
+            self._dia.devolver()
+            self._minuto.devolver()
+            self._contadores['requisicoes'] -= 1
+            if self.cota is not None:
+                try:
+                    self.cota.devolver()
+                except sqlite3.Error:
+                    pass
+            self._condicao.notify_all()
+
+    def pausar(self, segundos):
+        """Suspende as liberações (ex.: após um 429, a cota real acabou antes da estimada)"""
+        with self._condicao:
+            self._pausado_ate = max(self._pausado_ate, time.monotonic() + segundos)
+            self._condicao.notify_all()
+
+    def atualizar_pelos_cabecalhos(self, cabecalhos):
+        """
+        Ajusta o saldo diário estimado pelo saldo informado nos cabeçalhos
+        da resposta (no Groq, x-ratelimit-remaining-requests é o diário)
+        """
+        if self.cabecalho_restante_dia is None:
+            return
+        restante = cabecalhos.get(self.cabecalho_restante_dia)
+        if restante is not None:
+            try:
+                self._dia.limitar(float(restante))
+            except ValueError:
+                pass
+
+    def _espera_429(self, erro, tentativa):
+        retry_after = None
+        if erro.response is not None:
+            retry_after = erro.response.headers.get('retry-after')
+        try:
+            # Jitter evita que todos os que esperavam voltem no mesmo instante
+            return float(retry_after) + random.uniform(0, self.espera_base)
+        except (TypeError, ValueError):
+            espera = min(self.espera_maxima, self.espera_base * 2 ** tentativa)
+            return random.uniform(espera / 2, espera)
+
+    def _esgotada(self):
+        # Requisição de verdade recusada pela fila (sondagens não passam por aqui)
+        with self._condicao:
+            self._contadores['cota_esgotada'] += 1
+        return CotaEsgotada("Cota do provedor LLM esgotada no momento")
+
+    def executar(self, funcao, prioridade=PRIORIDADE_INTERATIVA, timeout=None, cancelado=None):
+        """
+        Executa funcao() quando a cota permitir, repetindo em caso de 429
+
+        Args:
+            funcao (callable): Faz a requisição (sem argumentos)
+            prioridade (int): Prioridade na fila
+            timeout (float, opcional): Espera máxima na fila, por tentativa
+            cancelado (threading.Event, opcional): Se marcado enquanto espera
+                na fila, desiste sem consumir cota
+
+        Returns:
+            Resultado de funcao(), ou None se foi cancelado
+
+        Raises:
+            CotaEsgotada: Se a fila não liberou dentro do timeout
+            RateLimitError: Se o 429 persistiu após max_tentativas
+        """
+        # Aqui a requisição já usa o SDK: importar não custa nada a mais
+        from openai import RateLimitError
+
+        for tentativa in range(self.max_tentativas + 1):
+            if not self.adquirir(prioridade, timeout, cancelado):
+                if cancelado is not None and cancelado.is_set():
+                    return None
+                raise self._esgotada()
+            try:
+                return funcao()
+            except RateLimitError as e:
+                self._contar('erros_429')
+                if tentativa == self.max_tentativas:
+                    raise
+                self._contar('retentativas')
+                self.pausar(self._espera_429(e, tentativa))
+
+    async def executar_async(self, fabrica, prioridade=PRIORIDADE_INTERATIVA, timeout=None):
+        """
+        Versão assíncrona de executar(): a espera na fila roda numa thread,
+        para não bloquear o event loop, e a mesma cota vale para os dois
+
+        Args:
+            fabrica (callable): Devolve uma corrotina nova a cada tentativa
+            prioridade (int): Prioridade na fila
+            timeout (float, opcional): Espera máxima na fila, por tentativa
+        """
+        from openai import RateLimitError
+
+        for tentativa in range(self.max_tentativas + 1):
+            cancelado = threading.Event()
+            espera = asyncio.ensure_future(asyncio.to_thread(self.adquirir, prioridade, timeout, cancelado))
+            try:
+                # shield: cancelar a corrotina não interrompe a thread, e o
+                # resultado dela ainda é preciso para devolver a cota
+                liberado = await asyncio.shield(espera)
+            except asyncio.CancelledError:
+                cancelado.set()
+                espera.add_done_callback(self._devolver_se_liberado)
+                raise
+            if not liberado:
+                raise self._esgotada()
+            try:
+                return await fabrica()
+            except RateLimitError as e:
+                self._contar('erros_429')
+                if tentativa == self.max_tentativas:
+                    raise
+                self._contar('retentativas')
+                self.pausar(self._espera_429(e, tentativa))
+
+    def _devolver_se_liberado(self, espera):
+        # Callback da espera de uma corrotina cancelada: a thread pode ter
+        # sido liberada antes de ver o cancelamento
+        if not espera.cancelled() and espera.exception() is None and espera.result():
+            self.devolver()
+
+    def estatisticas(self):
+        """
+        Saldo e contadores do agendador
+
+        Returns:
+            dict: restante_dia, restante_minuto, limites, tamanho da fila,
+            pausa restante e contadores de requisições, 429 e retentativas
+        """
+        with self._condicao:
+            na_fila = len(self._fila)
+            pausado_por = max(0.0, self._pausado_ate - time.monotonic())
+            contadores = dict(self._contadores)
+        restante_dia = self._dia.disponiveis()
+        restante_minuto = self._minuto.disponiveis()
+        if self.cota is not None:
+            try:
+                usadas = self.cota.usadas()
+                restante_dia = min(restante_dia, self.por_dia - usadas['dia'])
+                restante_minuto = min(restante_minuto, self.por_minuto - usadas['minuto'])
+            except sqlite3.Error:
+                pass
+        return {
+            'restante_dia': int(restante_dia),
+            'restante_minuto': int(restante_minuto),
+            'limite_dia': self.por_dia,
+            'limite_minuto': self.por_minuto,
+            'na_fila': na_fila,
+            'pausado_por': pausado_por,
+            **contadores,
+        }
+
+
+_lock = threading.Lock()
+_agendadores = {}
+# Limites e arquivo de cota dos próximos agendadores (ver configurar_agendadores)
+_configuracao = {'limites': None, 'caminho_cota': None}
+
+
+def configurar_agendadores(limites=None, caminho_cota=None):
+    """
+    Descarta os agendadores do processo; os próximos de obter_agendador usam
+    estes limites e este arquivo de cota (sem argumentos, os padrões)
+
+    Args:
+        limites (dict, opcional): Provedor -> (por dia, por minuto, cabeçalho),
+            como LIMITES_PROVEDORES
+        caminho_cota (str | Path, opcional): SQLite da cota compartilhada, no
+            lugar do de utils.cota_llm
+    """
+    with _lock:
+        _agendadores.clear()
+        _configuracao['limites'] = limites
+        _configuracao['caminho_cota'] = caminho_cota
+
+
+def obter_agendador(provedor="groq"):
+    """Agendador do provedor, compartilhado pelo processo"""
+    with _lock:
+        if provedor not in _agendadores:
+            try:
+                if _configuracao['caminho_cota'] is None:
+                    cota = obter_cota(provedor)
+                else:
+                    cota = CotaCompartilhada(provedor, _configuracao['caminho_cota'])
+            except sqlite3.Error:
+                # data/ somente leitura: cada processo conta a sua cota
+                cota = None
+            limites = _configuracao['limites'] or LIMITES_PROVEDORES
+            _agendadores[provedor] = AgendadorLLM(*limites[provedor], cota=cota)
+        return _agendadores[provedor]
+
+
+def _coletor_metricas():
+    # Saldo da cota e fila de cada provedor, para o endpoint /metrics
+    with _lock:
+        agendadores = dict(_agendadores)
+    valores = []
+    for provedor, agendador in agendadores.items():
+        estatisticas = agendador.estatisticas()
+        valores += [
+            ("llm_cota_restante", {'provedor': provedor, 'janela': "dia"}, estatisticas['restante_dia']),
+            ("llm_cota_restante", {'provedor': provedor, 'janela': "minuto"}, estatisticas['restante_minuto']),
+            ("llm_fila", {'provedor': provedor}, estatisticas['na_fila']),
+            ("llm_erros_429", {'provedor': provedor}, estatisticas['erros_429']),
+        ]
+    return valores
+
+
+registro.registrar_coletor(_coletor_metricas)
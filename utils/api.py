@@ -0,0 +1,504 @@
+"""
+API HTTP (JSON) com os cálculos e textos do app, sem passar pelo Streamlit
+
+Aplicação ASGI pura (sem framework), servida pelo uvicorn:
+
+    python -m utils.api --porta 8000
+    uvicorn utils.api:app --port 8000 --workers 4
+
+Ou dentro do próprio processo do Streamlit, numa thread, quando API_PORTA
+está nos Secrets ou no ambiente (0 ou ausente = desligada): aí a API e as
+páginas dividem também o cache de mapas em memória. Nos dois modos, o
+armazém de textos e o cache de geocodificação (SQLite) são os mesmos do app.
+
+Toda rota, exceto /saude, exige uma das chaves de API_CHAVES (Secrets ou
+ambiente, separadas por vírgula) no cabeçalho "Authorization: Bearer <chave>"
+ou "X-API-Key: <chave>"; sem chaves configuradas a API recusa tudo. Por
+padrão escuta só em 127.0.0.1 (API_HOST ou --host para expor, de
+preferência atrás de um proxy com TLS).
+
+Rotas:
+    GET  /saude
+    GET  /metrics                 (texto no formato Prometheus)
+    POST /v1/mapa                 {"data", "hora", "latitude", "longitude"} ou {"data", "hora", "cidade", "pais"},
+                                  mais "interpretacao": true para o texto do LLM
+    POST /v1/mapas                {"mapas": [{"data", "hora", "latitude", "longitude"}, ...]}
+    GET  /v1/geocodificacao       ?cidade=...&pais=...
+    GET  /v1/horoscopo            ?signo=...&data=AAAA-MM-DD (até DIAS_HOROSCOPO dias de hoje)
+    POST /v1/compatibilidade      {"pessoa1": {"data", "hora"}, "pessoa2": {...}, "tipo", "analise"}
+
+Os textos do LLM só saem para entradas de um conjunto fechado (signos,
+pares de signos, Sol x Lua e datas perto de hoje), que ficam no armazém:
+um cliente não consegue gastar a cota pedindo textos sempre novos.
+
+Pedidos de mapa que chegam juntos, de clientes diferentes, esperam até
+JANELA_LOTE e são calculados num só calcular_mapas (ver AgrupadorMapas).
+"""
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, time as hora_do_dia, timedelta
+from functools import lru_cache
+from urllib.parse import parse_qs
+
+from utils.agendador_llm import CotaEsgotada
+from utils.geocoding import ErroGeocodificacao, buscar_coordenadas, sugerir_correcoes
+from utils.gemini_ai import analisar_compatibilidade, gerar_horoscopo, interpretar_mapa_basico
+from utils.metricas import contar, medir, registro
+
+# Espera máxima de um pedido de mapa por outros para formar um lote
+JANELA_LOTE = 0.002
+TAMANHO_MAXIMO_LOTE = 512
+
+# Limites de cada requisição
+LIMITE_MAPAS_POR_PEDIDO = 1000
+TAMANHO_MAXIMO_CORPO = 1024 * 1024
+
+TIPOS_RELACAO = ("Romântico", "Amizade", "Profissional")
+
+# Horóscopos só de hoje ± DIAS_HOROSCOPO (a pré-geração cobre a semana seguinte)
+DIAS_HOROSCOPO = 7
+
+# Rotas atendidas sem chave de API
+ROTAS_PUBLICAS = ("/saude",)
+
+HOST_PADRAO = "127.0.0.1"
+
+# Swiss Ephemeris num só thread: enquanto um lote roda, o próximo se forma
+_executor_calculo = ThreadPoolExecutor(max_workers=1, thread_name_prefix="api-mapas")
+
+
+class ErroApi(Exception):
+    """Erro que vira resposta JSON {"erro": mensagem} com o status dado"""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+        self.mensagem = mensagem
+
+
+class AgrupadorMapas:
+    """
+    Junta os pedidos de mapa simultâneos num só calcular_mapas
+
+    O primeiro pedido de um lote agenda o despacho para daqui a `janela`
+    segundos; os que chegam nesse meio-tempo entram no mesmo lote, que sai
+    antes se atingir `tamanho_maximo`. Os lotes rodam em série num thread
+    próprio, e quem chega durante um cálculo já forma o lote seguinte.
+    """
+
+    def __init__(self, janela=JANELA_LOTE, tamanho_maximo=TAMANHO_MAXIMO_LOTE):
+        self.janela = janela
+        self.tamanho_maximo = tamanho_maximo
+        self._pendentes = []
+        self._despacho = None
+        # Lotes despachados e mapas neles (também em /metrics, somados entre agrupadores)
+        self.lotes = 0
+        self.mapas = 0
+
+    async def calcular(self, data_nasc, hora_nasc, latitude, longitude):
+        """Posições do mapa, no formato de calcular_mapa"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendentes.append((data_nasc, hora_nasc, latitude, longitude, futuro))
+        if len(self._pendentes) >= self.tamanho_maximo:
+            self._despachar()
+        elif self._despacho is None:
+            self._despacho = loop.call_later(self.janela, self._despachar)
+        return await futuro
+
+    def _despachar(self):
+        if self._despacho is not None:
+            self._despacho.cancel()
+            self._despacho = None
+        lote, self._pendentes = self._pendentes, []
+        if lote:
+            asyncio.ensure_future(self._processar(lote))
+
+    async def _processar(self, lote):
+        # Swiss Ephemeris e numpy só carregam no primeiro mapa, não ao importar a API
+        from utils.astro_calc import calcular_mapas
+
+        datas, horas, latitudes, longitudes, futuros = zip(*lote)
+        self.lotes += 1
+        self.mapas += len(lote)
+        contar("api_lotes_mapas")
+        contar("api_mapas_em_lote", len(lote))
+        try:
+            resultados = await asyncio.get_running_loop().run_in_executor(
+                _executor_calculo, calcular_mapas, datas, horas, latitudes, longitudes
+            )
+        except Exception as e:
+            resultados = [e] * len(futuros)
+        for futuro, resultado in zip(futuros, resultados):
+            # O cliente pode ter desistido (futuro cancelado) enquanto o lote rodava
+            if futuro.done():
+                continue
+            if isinstance(resultado, Exception):
+                futuro.set_exception(resultado)
+            else:
+                futuro.set_result(resultado)
+
+
+_agrupador = AgrupadorMapas()
+
+
+def configurar_agrupador(janela=JANELA_LOTE, tamanho_maximo=TAMANHO_MAXIMO_LOTE):
+    """
+    Troca o agrupador das rotas de mapa (janela=0 e tamanho_maximo=1
+    desligam o agrupamento)
+
+    Returns:
+        AgrupadorMapas: O novo agrupador
+    """
+    global _agrupador
+    _agrupador = AgrupadorMapas(janela, tamanho_maximo)
+    return _agrupador
+
+
+# --- Leitura dos parâmetros ---
+
+def _campo(dados, nome):
+    if nome not in dados or dados[nome] in (None, ""):
+        raise ErroApi(400, f"Campo obrigatório ausente: {nome}")
+    return dados[nome]
+
+
+def _ler_data(dados, nome="data"):
+    try:
+        return date.fromisoformat(str(_campo(dados, nome)))
+    except ValueError:
+        raise ErroApi(400, f"{nome} deve estar no formato AAAA-MM-DD") from None
+
+
+def _ler_hora(dados, nome="hora"):
+    try:
+        return hora_do_dia.fromisoformat(str(_campo(dados, nome)))
+    except ValueError:
+        raise ErroApi(400, f"{nome} deve estar no formato HH:MM") from None
+
+
+def _ler_coordenada(dados, nome, limite):
+    valor = _campo(dados, nome)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not -limite <= valor <= limite:
+        raise ErroApi(400, f"{nome} deve ser um número entre -{limite} e {limite}")
+    return float(valor)
+
+
+def _objeto(dados, nome):
+    if not isinstance(dados, dict):
+        raise ErroApi(400, f"{nome} deve ser um objeto JSON")
+    return dados
+
+
+async def _coordenadas(dados):
+    """(latitude, longitude, local) do pedido: coordenadas ou cidade geocodificada"""
+    if "latitude" in dados or "longitude" in dados:
+        return _ler_coordenada(dados, "latitude", 90), _ler_coordenada(dados, "longitude", 180), None
+    cidade = str(_campo(dados, "cidade"))
+    pais = str(dados.get("pais") or "Brasil")
+    try:
+        latitude, longitude, local = await asyncio.to_thread(buscar_coordenadas, cidade, pais)
+    except ErroGeocodificacao as e:
+        raise ErroApi(503, str(e)) from None
+    if latitude is None:
+        sugestoes = sugerir_correcoes(cidade, pais)
+        detalhe = f" (você quis dizer: {'; '.join(sugestoes)}?)" if sugestoes else ""
+        raise ErroApi(404, f"Cidade não encontrada: {cidade}{detalhe}")
+    return latitude, longitude, local
+
+
+async def _texto_llm(funcao, *args):
+    """Texto do armazém ou do LLM, sem bloquear o event loop"""
+    try:
+        return await asyncio.to_thread(funcao, *args)
+    except CotaEsgotada as e:
+        raise ErroApi(503, str(e)) from None
+    except KeyError as e:
+        # Nenhuma API key de LLM configurada
+        raise ErroApi(503, str(e.args[0]) if e.args else "LLM não configurado") from None
+    except Exception as e:
+        raise ErroApi(502, f"Falha no provedor LLM: {type(e).__name__}") from None
+
+
+# --- Rotas ---
+
+async def _rota_saude(pedido):
+    return 200, {"status": "ok"}
+
+
+async def _rota_mapa(pedido):
+    dados = _objeto(pedido['corpo'], "corpo")
+    data_nasc, hora_nasc = _ler_data(dados), _ler_hora(dados)
+    latitude, longitude, local = await _coordenadas(dados)
+    posicoes = await _agrupador.calcular(data_nasc, hora_nasc, latitude, longitude)
+    resposta = {"latitude": latitude, "longitude": longitude, "local": local, "posicoes": posicoes}
+    if dados.get("interpretacao"):
+        resposta["interpretacao"] = await _texto_llm(interpretar_mapa_basico, posicoes)
+    return 200, resposta
+
+
+async def _rota_mapas(pedido):
+    from utils.astro_calc import calcular_mapas
+
+    mapas = _objeto(pedido['corpo'], "corpo").get("mapas")
+    if not isinstance(mapas, list) or not mapas:
+        raise ErroApi(400, "mapas deve ser uma lista não vazia")
+    if len(mapas) > LIMITE_MAPAS_POR_PEDIDO:
+        raise ErroApi(413, f"No máximo {LIMITE_MAPAS_POR_PEDIDO} mapas por pedido")
+
+    entradas = []
+    for indice, dados in enumerate(mapas):
+        try:
+            dados = _objeto(dados, "cada mapa")
+            entradas.append((_ler_data(dados), _ler_hora(dados),
+                             _ler_coordenada(dados, "latitude", 90), _ler_coordenada(dados, "longitude", 180)))
+        except ErroApi as e:
+            raise ErroApi(400, f"mapas[{indice}]: {e.mensagem}") from None
+
+    # Já é um lote: vai direto para o thread de cálculo, sem esperar a janela
+    posicoes = await asyncio.get_running_loop().run_in_executor(_executor_calculo, calcular_mapas, *zip(*entradas))
+    return 200, {"mapas": posicoes}
+
+
+async def _rota_geocodificacao(pedido):
+    latitude, longitude, local = await _coordenadas(pedido['consulta'])
+    return 200, {"latitude": latitude, "longitude": longitude, "local": local}
+
+
+async def _rota_horoscopo(pedido):
+    from utils.astro_calc import SIGNOS
+
+    consulta = pedido['consulta']
+    signo = _campo(consulta, "signo")
+    if signo not in SIGNOS:
+        raise ErroApi(400, f"signo deve ser um de: {', '.join(SIGNOS)}")
+    hoje = date.today()
+    data_horoscopo = _ler_data(consulta) if consulta.get("data") else hoje
+    if abs((data_horoscopo - hoje).days) > DIAS_HOROSCOPO:
+        inicio, fim = hoje - timedelta(days=DIAS_HOROSCOPO), hoje + timedelta(days=DIAS_HOROSCOPO)
+        raise ErroApi(400, f"data deve estar entre {inicio.isoformat()} e {fim.isoformat()}")
+    texto = await _texto_llm(gerar_horoscopo, signo, data_horoscopo)
+    return 200, {"signo": signo, "data": data_horoscopo.isoformat(), "texto": texto}
+
+
+async def _rota_compatibilidade(pedido):
+    from utils.sinastria import sinastria
+
+    dados = _objeto(pedido['corpo'], "corpo")
+    tipo = dados.get("tipo") or TIPOS_RELACAO[0]
+    if tipo not in TIPOS_RELACAO:
+        raise ErroApi(400, f"tipo deve ser um de: {', '.join(TIPOS_RELACAO)}")
+    pessoas = [_objeto(_campo(dados, nome), nome) for nome in ("pessoa1", "pessoa2")]
+
+    # Como na página: a sinastria usa só data e hora. As posições dos planetas
+    # são geocêntricas e não dependem do local, então lat/lon 0.0 não muda o resultado
+    posicoes1, posicoes2 = await asyncio.gather(*(
+        _agrupador.calcular(_ler_data(pessoa), _ler_hora(pessoa), 0.0, 0.0) for pessoa in pessoas
+    ))
+    resultado = sinastria(posicoes1, posicoes2, tipo)
+    resposta = {
+        "tipo": tipo,
+        "signos": [posicoes1['Sol']['signo'], posicoes2['Sol']['signo']],
+        "score": round(resultado['score'], 1),
+        "aspectos": resultado['aspectos'],
+    }
+    if dados.get("analise"):
+        resposta["analise"] = await _texto_llm(analisar_compatibilidade, *resposta["signos"], tipo)
+    return 200, resposta
+
+
+async def _rota_metricas(pedido):
+    return 200, registro.texto_prometheus()
+
+
+# Caminho -> (método, função)
+ROTAS = {
+    "/saude": ("GET", _rota_saude),
+    "/metrics": ("GET", _rota_metricas),
+    "/v1/mapa": ("POST", _rota_mapa),
+    "/v1/mapas": ("POST", _rota_mapas),
+    "/v1/geocodificacao": ("GET", _rota_geocodificacao),
+    "/v1/horoscopo": ("GET", _rota_horoscopo),
+    "/v1/compatibilidade": ("POST", _rota_compatibilidade),
+}
+
+
+# --- Autenticação ---
+
+def _configuracao(nome, padrao):
+    """Valor dos Secrets ou, fora do Streamlit, do ambiente"""
+    import streamlit as st
+
+    try:
+        return st.secrets.get(nome, os.environ.get(nome, padrao))
+    except Exception:
+        # Sem secrets.toml (ex.: scripts e jobs fora do Streamlit)
+        return os.environ.get(nome, padrao)
+
+
+@lru_cache(maxsize=1)
+def chaves_api():
+    """Chaves aceitas (API_CHAVES, separadas por vírgula); vazio = nenhuma"""
+    chaves = _configuracao("API_CHAVES", "")
+    if isinstance(chaves, str):
+        chaves = chaves.split(",")
+    return frozenset(chave.strip() for chave in chaves if chave.strip())
+
+
+def _chave_do_pedido(scope):
+    for nome, valor in scope.get('headers', ()):
+        if nome == b"x-api-key":
+            return valor.decode("latin-1").strip()
+        if nome == b"authorization" and valor[:7].lower() == b"bearer ":
+            return valor[7:].decode("latin-1").strip()
+    return None
+
+
+def _verificar_chave(scope):
+    chaves = chaves_api()
+    if not chaves:
+        raise ErroApi(503, "API sem chaves configuradas (API_CHAVES)")
+    chave = _chave_do_pedido(scope)
+    # compare_digest: o tempo da comparação não revela quantos caracteres acertaram
+    if chave is None or not any(hmac.compare_digest(chave.encode(), valida.encode()) for valida in chaves):
+        raise ErroApi(401, "Chave de API ausente ou inválida")
+
+
+# --- ASGI ---
+
+async def _ler_corpo(receive):
+    partes = []
+    tamanho = 0
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == "http.disconnect":
+            raise ErroApi(400, "Conexão encerrada pelo cliente")
+        parte = mensagem.get('body', b"")
+        tamanho += len(parte)
+        if tamanho > TAMANHO_MAXIMO_CORPO:
+            raise ErroApi(413, "Corpo da requisição grande demais")
+        partes.append(parte)
+        if not mensagem.get('more_body'):
+            break
+    corpo = b"".join(partes)
+    if not corpo:
+        return {}
+    try:
+        return json.loads(corpo)
+    except ValueError:
+        raise ErroApi(400, "Corpo da requisição não é um JSON válido") from None
+
+
+async def _responder(send, status, conteudo):
+    if isinstance(conteudo, str):
+        corpo = conteudo.encode()
+        tipo = b"text/plain; version=0.0.4; charset=utf-8"
+    else:
+        corpo = json.dumps(conteudo, ensure_ascii=False).encode()
+        tipo = b"application/json"
+    await send({
+        'type': "http.response.start",
+        'status': status,
+        'headers': [(b"content-type", tipo), (b"content-length", str(len(corpo)).encode())],
+    })
+    await send({'type': "http.response.body", 'body': corpo})
+
+
+async def _ciclo_de_vida(receive, send):
+    while True:
+        mensagem = await receive()
+        if mensagem['type'] == "lifespan.startup":
+            await send({'type': "lifespan.startup.complete"})
+        elif mensagem['type'] == "lifespan.shutdown":
+            await send({'type': "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    """Aplicação ASGI"""
+    if scope['type'] == "lifespan":
+        await _ciclo_de_vida(receive, send)
+        return
+    if scope['type'] != "http":
+        return
+
+    caminho = scope['path'].rstrip("/") or "/"
+    metodo, funcao = ROTAS.get(caminho, (None, None))
+    with medir("api", rota=caminho if funcao else "desconhecida") as rotulos:
+        try:
+            if funcao is None:
+                raise ErroApi(404, "Rota não encontrada")
+            if caminho not in ROTAS_PUBLICAS:
+                _verificar_chave(scope)
+            if scope['method'] != metodo:
+                raise ErroApi(405, f"Use {metodo} em {caminho}")
+            consulta = {nome: valores[-1] for nome, valores in parse_qs(scope['query_string'].decode()).items()}
+            corpo = await _ler_corpo(receive) if metodo == "POST" else {}
+            status, conteudo = await funcao({'consulta': consulta, 'corpo': corpo})
+        except ErroApi as e:
+            status, conteudo = e.status, {"erro": e.mensagem}
+        except Exception as e:
+            status, conteudo = 500, {"erro": f"Erro interno: {type(e).__name__}"}
+        rotulos['status'] = str(status)
+        await _responder(send, status, conteudo)
+
+
+# --- Servidor ---
+
+def porta_api():
+    """Porta da API dentro do Streamlit (API_PORTA nos Secrets ou no ambiente; 0 = desligada)"""
+    return int(_configuracao("API_PORTA", 0))
+
+
+_lock_servidor = threading.Lock()
+_servidor = None
+
+
+def iniciar_servidor(porta=None, host=None):
+    """
+    Sobe a API numa thread daemon do processo atual (uma vez por processo)
+
+    Args:
+        porta (int, opcional): Padrão: porta_api(); 0 não sobe nada
+        host (str, opcional): Interface de rede (padrão: API_HOST ou 127.0.0.1)
+
+    Returns:
+        int | None: Porta configurada, ou None se a API está desligada ou
+        não há API_CHAVES (ela recusaria todos os pedidos)
+    """
+    global _servidor
+    with _lock_servidor:
+        if _servidor is None:
+            porta = porta_api() if porta is None else porta
+            if not porta or not chaves_api():
+                return None
+            host = host or _configuracao("API_HOST", HOST_PADRAO)
+            import uvicorn
+
+            _servidor = uvicorn.Server(uvicorn.Config(app, host=host, port=porta, log_level="warning", access_log=False))
+            threading.Thread(target=_servidor.run, daemon=True, name="api-http").start()
+        return _servidor.config.port
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API HTTP do AstroVision")
+    parser.add_argument("--host", default=HOST_PADRAO)
+    parser.add_argument("--porta", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="Processos (cada um com seu cache de mapas)")
+    args = parser.parse_args()
+    if not chaves_api():
+        parser.error("configure API_CHAVES (Secrets ou ambiente) antes de subir a API")
+
+    import uvicorn
+
+    uvicorn.run("utils.api:app", host=args.host, port=args.porta, workers=args.workers, log_level="warning",
+                access_log=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+Aspectos astrológicos (ângulos entre os pontos do mapa), vetorizados
+
+As separações entre todos os pares de pontos saem de uma única operação
+NumPy N x N, e a comparação com os ângulos dos aspectos e suas orbes
+também é feita em arrays. A mesma função atende um mapa (shape (n,)) ou
+um lote inteiro de mapas (shape (m, n), por exemplo a 'longitude_ecliptica'
+de astro_calc.calcular_mapas_lote), sem laços Python por mapa ou par.
+"""
+import numpy as np
+
+# Nome -> (ângulo, orbe padrão em graus)
+ASPECTOS_MAIORES = {
+    "Conjunção": (0.0, 8.0),
+    "Sextil": (60.0, 5.0),
+    "Quadratura": (90.0, 7.0),
+    "Trígono": (120.0, 7.0),
+    "Oposição": (180.0, 8.0),
+}
+
+ASPECTOS_MENORES = {
+    "Semissextil": (30.0, 2.0),
+    "Semiquadratura": (45.0, 2.0),
+    "Quintil": (72.0, 2.0),
+    "Sesquiquadratura": (135.0, 2.0),
+    "Biquintil": (144.0, 2.0),
+    "Quincúncio": (150.0, 3.0),
+}
+
+ASPECTOS = {**ASPECTOS_MAIORES, **ASPECTOS_MENORES}
+
+# Lotes grandes são processados em blocos para limitar a memória dos
+# arrays intermediários (mapas x pares x aspectos)
+TAMANHO_BLOCO = 65536
+
+
+def tabela_aspectos(aspectos=None, orbes=None):
+    """
+    Monta a tabela de aspectos usada no cálculo
+
+    Args:
+        aspectos (Iterable[str], opcional): Nomes a considerar (padrão: todos
+            de ASPECTOS); use ASPECTOS_MAIORES para só os maiores
+        orbes (dict, opcional): Nome -> orbe, substituindo a orbe padrão
+
+    Returns:
+        tuple: (nomes, angulos, orbes), os dois últimos como arrays
+    """
+    nomes = tuple(ASPECTOS if aspectos is None else aspectos)
+    orbes = orbes or {}
+    angulos = np.array([ASPECTOS[nome][0] for nome in nomes])
+    limites = np.array([orbes.get(nome, ASPECTOS[nome][1]) for nome in nomes])
+    return nomes, angulos, limites
+
+
+def separacoes(longitudes):
+    """
+    Separação angular (0 a 180°) entre todos os pares de pontos
+
+    Args:
+        longitudes (array_like): Longitudes eclípticas, shape (..., n)
+
+    Returns:
+        np.ndarray: Shape (..., n, n), simétrica e com diagonal zero
+    """
+    longitudes = np.asarray(longitudes, dtype=float)
+    diferenca = np.abs(longitudes[..., :, None] - longitudes[..., None, :]) % 360.0
+    return np.minimum(diferenca, 360.0 - diferenca)
+
+
+def _classificar(separacao, angulos, limites):
+    # Para cada separação, o aspecto de menor desvio dentro da orbe (-1 se nenhum)
+    desvio = np.abs(separacao[..., None] - angulos)
+    desvio = np.where(desvio <= limites, desvio, np.inf)
+    tipo = np.argmin(desvio, axis=-1).astype(np.int8)
+    orbe = np.take_along_axis(desvio, tipo[..., None].astype(np.intp), axis=-1)[..., 0]
+    sem_aspecto = np.isinf(orbe)
+    tipo[sem_aspecto] = -1
+    orbe[sem_aspecto] = np.nan
+    return tipo, orbe
+
+
+def matriz_aspectos(longitudes, aspectos=None, orbes=None):
+    """
+    Aspecto entre cada par de pontos, em forma de matriz
+
+    Args:
+        longitudes (array_like): Shape (n,) ou (m, n)
+        aspectos, orbes: Ver tabela_aspectos
+
+    Returns:
+        dict:
+            - 'aspectos': nomes (o índice de cada um é o valor em 'tipo')
+            - 'tipo': índice do aspecto, -1 se não há (int8), shape (..., n, n)
+            - 'orbe': desvio em relação ao ângulo exato, NaN se não há
+    """
+    nomes, angulos, limites = tabela_aspectos(aspectos, orbes)
+    tipo, orbe = _classificar(separacoes(longitudes), angulos, limites)
+    # A diagonal é o ponto com ele mesmo
+    n = tipo.shape[-1]
+    tipo[..., np.arange(n), np.arange(n)] = -1
+    orbe[..., np.arange(n), np.arange(n)] = np.nan
+    return {'aspectos': nomes, 'tipo': tipo, 'orbe': orbe}
+
+
+def aspectos_cruzados(longitudes_a, longitudes_b, aspectos=None, orbes=None):
+    """
+    Aspecto entre cada ponto de um mapa e cada ponto de outro (sinastria)
+
+    Args:
+        longitudes_a (array_like): Shape (..., na)
+        longitudes_b (array_like): Shape (..., nb); as dimensões iniciais
+            seguem o broadcasting do NumPy, então (na,) contra (m, nb)
+            compara um mapa com m mapas de uma vez
+        aspectos, orbes: Ver tabela_aspectos
+
+    Returns:
+        dict: 'aspectos', 'tipo' e 'orbe' como em matriz_aspectos, shape (..., na, nb)
+    """
+    longitudes_a = np.asarray(longitudes_a, dtype=float)
+    longitudes_b = np.asarray(longitudes_b, dtype=float)
+    nomes, angulos, limites = tabela_aspectos(aspectos, orbes)
+    diferenca = np.abs(longitudes_a[..., :, None] - longitudes_b[..., None, :]) % 360.0
+    tipo, orbe = _classificar(np.minimum(diferenca, 360.0 - diferenca), angulos, limites)
+    return {'aspectos': nomes, 'tipo': tipo, 'orbe': orbe}
+
+
+def aspectos_lote(longitudes, aspectos=None, orbes=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Aspectos de muitos mapas, só para os pares i < j (formato compacto)
+
+    Args:
+        longitudes (array_like): Shape (m, n); NaN (posição com erro) não
+            forma aspecto
+        aspectos, orbes: Ver tabela_aspectos
+        tamanho_bloco (int): Mapas processados por vez
+
+    Returns:
+        dict:
+            - 'aspectos': nomes dos aspectos
+            - 'pares': índices (i, j) dos pontos de cada coluna, shape (p, 2)
+            - 'tipo': índice do aspecto ou -1 (int8), shape (m, p)
+            - 'orbe': desvio em graus (float32, NaN se não há), shape (m, p)
+    """
+    longitudes = np.atleast_2d(np.asarray(longitudes, dtype=float))
+    nomes, angulos, limites = tabela_aspectos(aspectos, orbes)
+    m, n = longitudes.shape
+    i, j = np.triu_indices(n, k=1)
+
+    tipo = np.empty((m, len(i)), dtype=np.int8)
+    orbe = np.empty((m, len(i)), dtype=np.float32)
+    for inicio in range(0, m, tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        diferenca = np.abs(longitudes[bloco, i] - longitudes[bloco, j]) % 360.0
+        tipo[bloco], orbe[bloco] = _classificar(np.minimum(diferenca, 360.0 - diferenca), angulos, limites)
+
+    return {'aspectos': nomes, 'pares': np.column_stack((i, j)), 'tipo': tipo, 'orbe': orbe}
+
+
+def contar_aspectos(lote):
+    """
+    Frequência de cada aspecto em cada par, somada sobre todos os mapas
+
+    Args:
+        lote (dict): Resultado de aspectos_lote
+
+    Returns:
+        np.ndarray: Contagens, shape (p, k) (pares x aspectos)
+    """
+    tipo = lote['tipo']
+    p, k = tipo.shape[1], len(lote['aspectos'])
+    validos = tipo >= 0
+    indices = (np.broadcast_to(np.arange(p), tipo.shape)[validos] * k + tipo[validos])
+    return np.bincount(indices, minlength=p * k).reshape(p, k)
+
+
+def calcular_aspectos(posicoes, pontos_extras=None, aspectos=None, orbes=None):
+    """
+    Lista os aspectos de um mapa natal
+
+    Args:
+        posicoes (dict): Resultado de astro_calc.calcular_mapa (planetas com
+            erro são ignorados)
+        pontos_extras (dict, opcional): Nome -> longitude de outros pontos,
+            por exemplo {'Ascendente': ..., 'MC': ...} de calcular_casas
+        aspectos, orbes: Ver tabela_aspectos
+
+    Returns:
+        list[dict]: 'ponto1', 'ponto2', 'aspecto' e 'orbe', do aspecto mais
+        exato para o menos exato
+    """
+    pontos = {nome: dados['longitude'] for nome, dados in posicoes.items() if 'longitude' in dados}
+    pontos.update(pontos_extras or {})
+    nomes_pontos = list(pontos)
+
+    lote = aspectos_lote([list(pontos.values())], aspectos, orbes)
+    encontrados = []
+    for coluna, (i, j) in enumerate(lote['pares']):
+        tipo = lote['tipo'][0, coluna]
+        if tipo >= 0:
+            encontrados.append({
+                'ponto1': nomes_pontos[i],
+                'ponto2': nomes_pontos[j],
+                'aspecto': lote['aspectos'][tipo],
+                'orbe': round(float(lote['orbe'][0, coluna]), 2),
+            })
+    encontrados.sort(key=lambda aspecto: aspecto['orbe'])
+    return encontrados
@@ -2,12 +2,93 @@
 Módulo de cálculos astrológicos usando Swiss Ephemeris
 """
 import swisseph as swe
+import numpy as np
 from datetime import datetime
+from functools import lru_cache
+from utils.cache import CacheLRU
+from utils.metricas import medir, registrar_cache
+
+# Planetas calculados no mapa natal (ordem usada também nos arrays do lote)
+PLANETAS = {
+    'Sol': swe.SUN,
+    'Lua': swe.MOON,
+    'Mercúrio': swe.MERCURY,
+    'Vênus': swe.VENUS,
+    'Marte': swe.MARS,
+    'Júpiter': swe.JUPITER,
+    'Saturno': swe.SATURN
+}
+
+# Nomes dos signos (índice = int(longitude / 30))
+SIGNOS = [
+    'Áries', 'Touro', 'Gêmeos', 'Câncer',
+    'Leão', 'Virgem', 'Libra', 'Escorpião',
+    'Sagitário', 'Capricórnio', 'Aquário', 'Peixes'
+]
+
+# Sistemas de casas suportados (código do Swiss Ephemeris -> nome)
+SISTEMAS_CASAS = {
+    'P': 'Placidus',
+    'K': 'Koch',
+    'O': 'Porfírio',
+    'R': 'Regiomontanus',
+    'C': 'Campanus',
+    'E': 'Casas Iguais',
+    'W': 'Signos Inteiros'
+}
+
+# Sistemas calculados direto com NumPy a partir do Ascendente e do MC
+_SISTEMAS_VETORIZADOS = ('O', 'E', 'W')
+
+# Cache de mapas compartilhado por todas as sessões do processo, com chave
+# (Julian Day, latitude, longitude) arredondados nas casas decimais abaixo
+_cache_mapas = CacheLRU(tamanho_maximo=4096)
+_precisao_cache = {'jd': 6, 'coordenadas': 4}
+
+
+def configurar_cache_mapas(tamanho_maximo=None, casas_decimais_jd=None, casas_decimais_coordenadas=None,
+                           limpar=False):
+    """
+    Ajusta o cache de calcular_mapa
+    
+    Args:
+        tamanho_maximo (int, opcional): Quantidade máxima de mapas guardados
+        casas_decimais_jd (int, opcional): Precisão do Julian Day na chave
+            (6 casas ~ 0,1 s)
+        casas_decimais_coordenadas (int, opcional): Precisão de latitude e
+            longitude na chave (mudar a precisão esvazia o cache)
+        limpar (bool): Esvazia o cache
+    """
+    if tamanho_maximo is not None:
+        _cache_mapas.redimensionar(tamanho_maximo)
+    if casas_decimais_jd is not None or casas_decimais_coordenadas is not None:
+        if casas_decimais_jd is not None:
+            _precisao_cache['jd'] = casas_decimais_jd
+        if casas_decimais_coordenadas is not None:
+            _precisao_cache['coordenadas'] = casas_decimais_coordenadas
+        limpar = True
+    if limpar:
+        _cache_mapas.limpar()
+
+
+def estatisticas_cache_mapas():
+    """
+    Contadores do cache de calcular_mapa
+    
+    Returns:
+        dict: tamanho, tamanho_maximo, acertos, falhas, remocoes e taxa_acerto
+    """
+    return _cache_mapas.estatisticas()
+
 
 def calcular_mapa(data_nasc, hora_nasc, latitude, longitude):
     """
     Calcula as posições planetárias para um mapa astral natal
     
+    O resultado fica no cache LRU do processo (ver configurar_cache_mapas).
+    Se a tabela de utils.efemerides já foi gerada, as posições saem dela;
+    fora do intervalo da tabela, do Swiss Ephemeris.
+    
     Args:
         data_nasc (datetime.date): Data de nascimento
         hora_nasc (datetime.time): Hora de nascimento
@@ -18,36 +99,111 @@ def calcular_mapa(data_nasc, hora_nasc, latitude, longitude):
         dict: Dicionário com posições planetárias
     """
     # Converter data e hora para Julian Day
-    ano = data_nasc.year
-    mes = data_nasc.month
-    dia = data_nasc.day
-    hora_decimal = hora_nasc.hour + hora_nasc.minute / 60.0 + hora_nasc.second / 3600.0
+    jd = _julian_day(data_nasc, hora_nasc)
+    chave = _chave_cache_mapa(jd, latitude, longitude)
+    posicoes = _consultar_cache_mapas(chave)
     
-    # Calcular Julian Day
-    jd = swe.julday(ano, mes, dia, hora_decimal)
-    
-    # Definir planetas para calcular
-    planetas = {
-        'Sol': swe.SUN,
-        'Lua': swe.MOON,
-        'Mercúrio': swe.MERCURY,
-        'Vênus': swe.VENUS,
-        'Marte': swe.MARS,
-        'Júpiter': swe.JUPITER,
-        'Saturno': swe.SATURN
-    }
+    if posicoes is None:
+        tabela = _tabela_padrao()
+        with medir("efemerides"):
+            if tabela is not None and tabela.cobre(jd):
+                posicoes = _posicoes_da_linha(tabela.longitudes(jd)[0])
+            else:
+                posicoes = _calcular_posicoes(jd)
+        _guardar_no_cache_mapas(chave, posicoes)
+    
+    # Cópia para que quem chama possa alterar o resultado sem afetar o cache
+    return {planeta: dict(dados) for planeta, dados in posicoes.items()}
+
+
+def calcular_mapas(datas, horas, latitudes, longitudes):
+    """
+    Vários calcular_mapa de uma vez, com o mesmo cache
+    
+    Cada mapa é procurado no cache de calcular_mapa; os que faltam (sem
+    repetição) são calculados numa só passada, como em calcular_mapas_lote
+    (tabela de efemérides, se existir, ou Swiss Ephemeris), e guardados no cache para as próximas consultas,
+    inclusive as das páginas.
+    
+    Args:
+        datas (Sequence[datetime.date]): Datas de nascimento
+        horas (Sequence[datetime.time]): Horas de nascimento
+        latitudes (Sequence[float]): Latitudes dos locais
+        longitudes (Sequence[float]): Longitudes dos locais
+    
+    Returns:
+        list[dict]: Posições de cada mapa, no formato de calcular_mapa
+    """
+    jds = [_julian_day(data_nasc, hora_nasc) for data_nasc, hora_nasc in zip(datas, horas)]
+    chaves = [_chave_cache_mapa(jd, lat, lon) for jd, lat, lon in zip(jds, latitudes, longitudes)]
+    resultados = [_consultar_cache_mapas(chave) for chave in chaves]
+    
+    # Mapa que falta -> primeira posição do lote em que aparece
+    faltando = {}
+    for indice, (chave, posicoes) in enumerate(zip(chaves, resultados)):
+        if posicoes is None:
+            faltando.setdefault(chave, indice)
+    
+    if faltando:
+        with medir("efemerides", modo="lote"):
+            longitudes_eclipticas = _longitudes(np.array([jds[indice] for indice in faltando.values()]))
+        calculados = {}
+        for chave, linha in zip(faltando, longitudes_eclipticas):
+            posicoes = _posicoes_da_linha(linha)
+            _guardar_no_cache_mapas(chave, posicoes)
+            calculados[chave] = posicoes
+        resultados = [calculados[chave] if posicoes is None else posicoes for chave, posicoes in zip(chaves, resultados)]
+    
+    return [{planeta: dict(dados) for planeta, dados in posicoes.items()} for posicoes in resultados]
+
+
+def _chave_cache_mapa(jd, latitude, longitude):
+    return (
+        round(jd, _precisao_cache['jd']),
+        round(latitude, _precisao_cache['coordenadas']),
+        round(longitude, _precisao_cache['coordenadas'])
+    )
+
+
+def _consultar_cache_mapas(chave):
+    with medir("cache", cache="mapas"):
+        posicoes = _cache_mapas.obter(chave)
+    registrar_cache("mapas", posicoes is not None)
+    return posicoes
+
+
+def _posicoes_da_linha(linha):
+    # Longitudes na ordem de PLANETAS (NaN = falha) -> posições no formato de calcular_mapa
+    posicoes = {}
+    for nome_planeta, longitude_ecliptica in zip(PLANETAS, linha.tolist()):
+        if np.isnan(longitude_ecliptica):
+            posicoes[nome_planeta] = {'signo': 'Erro', 'grau': 0.0, 'longitude': 0.0,
+                                      'erro': "Swiss Ephemeris não calculou esta posição"}
+        else:
+            posicoes[nome_planeta] = _posicao_no_signo(longitude_ecliptica)
+    return posicoes
+
+
+def _guardar_no_cache_mapas(chave, posicoes):
+    # Falhas do Swiss Ephemeris não vão para o cache
+    if not any('erro' in dados for dados in posicoes.values()):
+        _cache_mapas.guardar(chave, posicoes)
+
+
+def _calcular_posicoes(jd):
+    """
+    Calcula as posições planetárias de um Julian Day (sem cache)
     
-    # Nomes dos signos
-    signos = [
-        'Áries', 'Touro', 'Gêmeos', 'Câncer', 
-        'Leão', 'Virgem', 'Libra', 'Escorpião',
-        'Sagitário', 'Capricórnio', 'Aquário', 'Peixes'
-    ]
+    Args:
+        jd (float): Julian Day (UT)
     
+    Returns:
+        dict: Dicionário com posições planetárias
+    """
     # Calcular posições
     posicoes = {}
     
-    for nome_planeta, id_planeta in planetas.items():
+    for nome_planeta, id_planeta in PLANETAS.items():
         try:
             # Calcular posição (retorna tupla com longitude, latitude, distância, etc)
             resultado = swe.calc_ut(jd, id_planeta)
@@ -58,7 +214,7 @@ def calcular_mapa(data_nasc, hora_nasc, latitude, longitude):
             grau_no_signo = longitude_ecliptica % 30
             
             posicoes[nome_planeta] = {
-                'signo': signos[signo_idx],
+                'signo': SIGNOS[signo_idx],
                 'grau': round(grau_no_signo, 2),
                 'longitude': round(longitude_ecliptica, 2)
             }
@@ -74,9 +230,325 @@ def calcular_mapa(data_nasc, hora_nasc, latitude, longitude):
     return posicoes
 
 
+def julian_days(datas, horas):
+    """
+    Converte sequências de datas e horas (UT) em Julian Days de uma só vez
+    
+    Usa o algoritmo de Meeus para o calendário gregoriano, o mesmo adotado
+    por swe.julday, mas vetorizado com NumPy.
+    
+    Args:
+        datas (Sequence[datetime.date]): Datas de nascimento
+        horas (Sequence[datetime.time]): Horas de nascimento
+    
+    Returns:
+        np.ndarray: Julian Days (float64), um por data
+    """
+    anos = np.fromiter((d.year for d in datas), dtype=np.int64)
+    meses = np.fromiter((d.month for d in datas), dtype=np.int64)
+    dias = np.fromiter((d.day for d in datas), dtype=np.int64)
+    horas_decimais = np.fromiter(
+        (h.hour + h.minute / 60.0 + h.second / 3600.0 for h in horas),
+        dtype=np.float64
+    )
+    
+    # Janeiro e fevereiro contam como meses 13 e 14 do ano anterior
+    ajuste = meses <= 2
+    anos = np.where(ajuste, anos - 1, anos)
+    meses = np.where(ajuste, meses + 12, meses)
+    
+    a = anos // 100
+    b = 2 - a + a // 4
+    
+    return (np.floor(365.25 * (anos + 4716)) + np.floor(30.6001 * (meses + 1))
+            + dias + b - 1524.5 + horas_decimais / 24.0)
+
+
+def _longitudes_swe(jds):
+    """
+    Calcula a longitude eclíptica de cada planeta para cada Julian Day
+    
+    Args:
+        jds (np.ndarray): Julian Days (UT)
+    
+    Returns:
+        np.ndarray: Matriz (n_mapas, n_planetas) com longitudes; NaN onde o
+        Swiss Ephemeris falhou
+    """
+    calc_ut = swe.calc_ut
+    flags = swe.FLG_SWIEPH  # sem velocidades: a longitude é idêntica e sai mais barata
+    jds_lista = jds.tolist()
+    longitudes = np.empty((len(jds_lista), len(PLANETAS)))
+    
+    for coluna, id_planeta in enumerate(PLANETAS.values()):
+        try:
+            longitudes[:, coluna] = [calc_ut(jd, id_planeta, flags)[0][0] for jd in jds_lista]
+        except swe.Error:
+            # Caminho lento só quando algum mapa do lote falha
+            for linha, jd in enumerate(jds_lista):
+                try:
+                    longitudes[linha, coluna] = calc_ut(jd, id_planeta, flags)[0][0]
+                except swe.Error:
+                    longitudes[linha, coluna] = np.nan
+    
+    return longitudes
+
+
+def _tabela_padrao():
+    """Tabela de utils.efemerides, ou None se ainda não foi gerada"""
+    # Importado aqui porque utils.efemerides importa este módulo
+    from utils.efemerides import carregar_tabela
+    
+    return carregar_tabela()
+
+
+def _longitudes(jds, tabela=None):
+    """
+    Longitudes de cada planeta para cada Julian Day
+    
+    Args:
+        jds (np.ndarray): Julian Days (UT)
+        tabela (TabelaEfemerides | bool, opcional): None usa a tabela padrão,
+            se existir; False usa só o Swiss Ephemeris
+    
+    Returns:
+        np.ndarray: Matriz (n_mapas, n_planetas); NaN onde o cálculo falhou
+    """
+    if tabela is None:
+        tabela = _tabela_padrao()
+    if tabela is None or tabela is False:
+        return _longitudes_swe(jds)
+    
+    # Fora do intervalo da tabela, Swiss Ephemeris
+    cobertos = tabela.cobre(jds)
+    posicoes = np.empty((len(jds), len(PLANETAS)))
+    posicoes[cobertos] = tabela.longitudes(jds[cobertos])
+    if not cobertos.all():
+        posicoes[~cobertos] = _longitudes_swe(jds[~cobertos])
+    return posicoes
+
+
+def calcular_mapas_lote(datas, horas, latitudes, longitudes, tabela=None):
+    """
+    Calcula as posições planetárias de muitos mapas natais de uma vez
+    
+    Versão em lote de calcular_mapa para jobs em massa: devolve arrays
+    NumPy em vez de dicionários, sem strings nem try/except por planeta.
+    
+    Args:
+        datas (Sequence[datetime.date]): Datas de nascimento
+        horas (Sequence[datetime.time]): Horas de nascimento
+        latitudes (float | Sequence[float]): Latitudes (escalar é replicado)
+        longitudes (float | Sequence[float]): Longitudes (escalar é replicado)
+        tabela (TabelaEfemerides | bool, opcional): Tabela pré-calculada de
+            utils.efemerides (padrão: a gerada em data/, se existir; False
+            usa só o Swiss Ephemeris); mapas fora do intervalo dela usam o
+            Swiss Ephemeris
+    
+    Returns:
+        dict: Arrays do lote
+            - 'planetas': tupla com os nomes dos planetas (ordem das colunas)
+            - 'jd': Julian Days, shape (n,)
+            - 'latitudes', 'longitudes': coordenadas do local, shape (n,)
+            - 'longitude_ecliptica': longitude de cada planeta, shape (n, 7)
+            - 'signo': índice do signo em SIGNOS (int8, -1 se houve erro), shape (n, 7)
+            - 'grau': grau dentro do signo, shape (n, 7)
+    """
+    jds = julian_days(datas, horas)
+    n = len(jds)
+    
+    posicoes = _longitudes(jds, tabela)
+    validos = ~np.isnan(posicoes)
+    
+    signos = np.full(posicoes.shape, -1, dtype=np.int8)
+    signos[validos] = (posicoes[validos] // 30).astype(np.int8)
+    graus = np.where(validos, np.mod(posicoes, 30), np.nan)
+    
+    return {
+        'planetas': tuple(PLANETAS),
+        'jd': jds,
+        'latitudes': np.broadcast_to(np.asarray(latitudes, dtype=np.float64), (n,)),
+        'longitudes': np.broadcast_to(np.asarray(longitudes, dtype=np.float64), (n,)),
+        'longitude_ecliptica': posicoes,
+        'signo': signos,
+        'grau': graus
+    }
+
+
+def _posicao_no_signo(longitude_ecliptica):
+    """Formata uma longitude no mesmo formato das posições de calcular_mapa"""
+    return {
+        'signo': SIGNOS[int(longitude_ecliptica / 30) % 12],
+        'grau': round(longitude_ecliptica % 30, 2),
+        'longitude': round(longitude_ecliptica, 2)
+    }
+
+
+def _julian_day(data_nasc, hora_nasc):
+    hora_decimal = hora_nasc.hour + hora_nasc.minute / 60.0 + hora_nasc.second / 3600.0
+    return swe.julday(data_nasc.year, data_nasc.month, data_nasc.day, hora_decimal)
+
+
+@lru_cache(maxsize=65536)
+def _tempo_sideral_e_obliquidade(jd):
+    """
+    Tempo sideral de Greenwich e obliquidade verdadeira da eclíptica
+    
+    Dependem só do instante, então são compartilhados por todos os mapas
+    do mesmo Julian Day, qualquer que seja o local.
+    
+    Returns:
+        tuple: (tempo sideral em graus, obliquidade em graus)
+    """
+    return swe.sidtime(jd) * 15.0, swe.calc_ut(jd, swe.ECL_NUT)[0][0]
+
+
+@lru_cache(maxsize=65536)
+def _casas_armc(armc, latitude, obliquidade, sistema):
+    """
+    Cúspides via swe.houses_armc, com fallback para Porfírio nas latitudes
+    polares em que Placidus e Koch não são definidos
+    
+    Returns:
+        tuple: (cúspides, ascendente, mc, sistema efetivamente usado)
+    """
+    try:
+        cuspides, ascmc = swe.houses_armc(armc, latitude, obliquidade, sistema.encode())
+    except swe.Error:
+        sistema = 'O'
+        cuspides, ascmc = swe.houses_armc(armc, latitude, obliquidade, b'O')
+    return cuspides, ascmc[0], ascmc[1], sistema
+
+
+def _cuspides_vetorizadas(ascendente, mc, sistema):
+    """
+    Cúspides dos sistemas derivados só do Ascendente e do MC
+    
+    Args:
+        ascendente (np.ndarray): Longitudes do Ascendente, shape (n,)
+        mc (np.ndarray): Longitudes do Meio do Céu, shape (n,)
+        sistema (str): 'O' (Porfírio), 'E' (Casas Iguais) ou 'W' (Signos Inteiros)
+    
+    Returns:
+        np.ndarray: Cúspides das casas 1 a 12, shape (n, 12)
+    """
+    if sistema == 'E':
+        return np.mod(ascendente[:, None] + 30.0 * np.arange(12), 360.0)
+    if sistema == 'W':
+        return np.mod((ascendente[:, None] // 30) * 30.0 + 30.0 * np.arange(12), 360.0)
+    
+    # Porfírio: cada quadrante dividido em três partes iguais
+    quadrante_leste = np.mod(ascendente - mc, 360.0)
+    quadrante_norte = 180.0 - quadrante_leste
+    terco = np.arange(3)
+    casas_1_a_3 = ascendente[:, None] + terco * quadrante_norte[:, None] / 3
+    casas_10_a_12 = mc[:, None] + terco * quadrante_leste[:, None] / 3
+    casas_1_a_6 = np.concatenate([casas_1_a_3, casas_10_a_12 + 180.0], axis=1)
+    return np.mod(np.concatenate([casas_1_a_6, casas_1_a_6 + 180.0], axis=1), 360.0)
+
+
+def calcular_casas(data_nasc, hora_nasc, latitude, longitude, sistema='P'):
+    """
+    Calcula Ascendente, Meio do Céu e as cúspides das 12 casas
+    
+    Args:
+        data_nasc (datetime.date): Data de nascimento
+        hora_nasc (datetime.time): Hora de nascimento
+        latitude (float): Latitude do local de nascimento
+        longitude (float): Longitude do local de nascimento
+        sistema (str): Código do sistema de casas (ver SISTEMAS_CASAS)
+    
+    Returns:
+        dict: 'ascendente', 'mc' e 'casas' (lista de 12) no formato de
+        calcular_mapa, mais 'sistema' com o nome do sistema usado
+    """
+    if sistema not in SISTEMAS_CASAS:
+        raise ValueError(f"Sistema de casas desconhecido: {sistema}")
+    
+    jd = _julian_day(data_nasc, hora_nasc)
+    tempo_sideral, obliquidade = _tempo_sideral_e_obliquidade(jd)
+    armc = (tempo_sideral + longitude) % 360.0
+    cuspides, ascendente, mc, sistema_usado = _casas_armc(armc, latitude, obliquidade, sistema)
+    
+    return {
+        'ascendente': _posicao_no_signo(ascendente),
+        'mc': _posicao_no_signo(mc),
+        'casas': [_posicao_no_signo(cuspide) for cuspide in cuspides],
+        'sistema': SISTEMAS_CASAS[sistema_usado]
+    }
+
+
+def calcular_casas_lote(datas, horas, latitudes, longitudes, sistema='P'):
+    """
+    Calcula Ascendente, MC e cúspides de muitos mapas de uma vez
+    
+    Tempo sideral e obliquidade são calculados uma vez por Julian Day
+    distinto (e ficam em cache entre chamadas). Ascendente e MC saem de
+    fórmulas vetorizadas; Porfírio, Casas Iguais e Signos Inteiros também.
+    Os demais sistemas chamam o Swiss Ephemeris uma vez por combinação
+    distinta de instante e local, então mapas da mesma cidade e horário
+    não repetem o cálculo.
+    
+    Args:
+        datas (Sequence[datetime.date]): Datas de nascimento
+        horas (Sequence[datetime.time]): Horas de nascimento
+        latitudes (float | Sequence[float]): Latitudes (escalar é replicado)
+        longitudes (float | Sequence[float]): Longitudes (escalar é replicado)
+        sistema (str): Código do sistema de casas (ver SISTEMAS_CASAS)
+    
+    Returns:
+        dict: Arrays do lote
+            - 'jd': Julian Days, shape (n,)
+            - 'ascendente', 'mc': longitudes, shape (n,)
+            - 'cuspides': cúspides das casas 1 a 12, shape (n, 12)
+            - 'sistema': array de códigos do sistema usado em cada mapa
+              (Porfírio nas latitudes polares para Placidus/Koch)
+    """
+    if sistema not in SISTEMAS_CASAS:
+        raise ValueError(f"Sistema de casas desconhecido: {sistema}")
+    
+    jds = julian_days(datas, horas)
+    n = len(jds)
+    latitudes = np.broadcast_to(np.asarray(latitudes, dtype=np.float64), (n,))
+    longitudes = np.broadcast_to(np.asarray(longitudes, dtype=np.float64), (n,))
+    
+    jds_unicos, inverso = np.unique(jds, return_inverse=True)
+    fatores = np.array([_tempo_sideral_e_obliquidade(jd) for jd in jds_unicos.tolist()]).reshape(-1, 2)
+    tempo_sideral = fatores[inverso, 0]
+    obliquidade = fatores[inverso, 1]
+    armc = np.mod(tempo_sideral + longitudes, 360.0)
+    
+    armc_rad = np.radians(armc)
+    obliquidade_rad = np.radians(obliquidade)
+    mc = np.mod(np.degrees(np.arctan2(np.sin(armc_rad), np.cos(armc_rad) * np.cos(obliquidade_rad))), 360.0)
+    ascendente = np.mod(np.degrees(np.arctan2(
+        np.cos(armc_rad),
+        -(np.sin(armc_rad) * np.cos(obliquidade_rad) + np.tan(np.radians(latitudes)) * np.sin(obliquidade_rad))
+    )), 360.0)
+    
+    sistemas = np.full(n, sistema)
+    if sistema in _SISTEMAS_VETORIZADOS:
+        cuspides = _cuspides_vetorizadas(ascendente, mc, sistema)
+    else:
+        combinacoes, inverso = np.unique(
+            np.column_stack([armc, latitudes, obliquidade]), axis=0, return_inverse=True
+        )
+        resultados = [_casas_armc(*combinacao, sistema) for combinacao in combinacoes.tolist()]
+        cuspides = np.array([resultado[0] for resultado in resultados]).reshape(-1, 12)[inverso.ravel()]
+        sistemas = np.array([resultado[3] for resultado in resultados])[inverso.ravel()]
+    
+    return {
+        'jd': jds,
+        'ascendente': ascendente,
+        'mc': mc,
+        'cuspides': cuspides,
+        'sistema': sistemas
+    }
+
+
 def calcular_ascendente(data_nasc, hora_nasc, latitude, longitude):
     """
-    Calcula o Ascendente (versão futura para Premium)
+    Calcula o Ascendente
     
     Args:
         data_nasc (datetime.date): Data de nascimento
@@ -87,6 +559,4 @@ def calcular_ascendente(data_nasc, hora_nasc, latitude, longitude):
     Returns:
         dict: Signo e grau do Ascendente
     """
-    # Placeholder para funcionalidade Premium
-    # Implementar usando swe.houses()
-    pass
+    return calcular_casas(data_nasc, hora_nasc, latitude, longitude)['ascendente']
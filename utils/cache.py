@@ -0,0 +1,94 @@
+"""
+Cache LRU em memória, compartilhado pelo processo inteiro
+"""
+import threading
+from collections import OrderedDict
+
+
+class CacheLRU:
+    """
+    Cache com limite de tamanho e remoção do item usado há mais tempo
+
+    Seguro para uso entre threads (as sessões do Streamlit rodam em threads
+    do mesmo processo). Mantém contadores de acertos, falhas e remoções para
+    ajudar a dimensionar o limite.
+    """
+
+    def __init__(self, tamanho_maximo=4096):
+        self.tamanho_maximo = tamanho_maximo
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+        self.remocoes = 0
+
+    def obter(self, chave, padrao=None):
+        """
+        Busca um item, marcando-o como usado recentemente
+
+        Args:
+            chave (Hashable): Chave do item
+            padrao: Valor devolvido se a chave não estiver no cache
+
+        Returns:
+            Valor armazenado ou padrao
+        """
+        with self._lock:
+            try:
+                valor = self._itens[chave]
+            except KeyError:
+                self.falhas += 1
+                return padrao
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return valor
+
+    def guardar(self, chave, valor):
+        """
+        Armazena um item, removendo os mais antigos se passar do limite
+
+        Args:
+            chave (Hashable): Chave do item
+            valor: Valor a armazenar
+        """
+        with self._lock:
+            self._itens[chave] = valor
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+
+    def redimensionar(self, tamanho_maximo):
+        """Altera o limite, removendo o excedente imediatamente"""
+        with self._lock:
+            self.tamanho_maximo = tamanho_maximo
+            while len(self._itens) > self.tamanho_maximo:
+                self._itens.popitem(last=False)
+                self.remocoes += 1
+
+    def limpar(self):
+        """Remove todos os itens e zera os contadores"""
+        with self._lock:
+            self._itens.clear()
+            self.acertos = self.falhas = self.remocoes = 0
+
+    def estatisticas(self):
+        """
+        Retorna os contadores do cache
+
+        Returns:
+            dict: tamanho, tamanho_maximo, acertos, falhas, remocoes e taxa_acerto
+        """
+        with self._lock:
+            consultas = self.acertos + self.falhas
+            return {
+                'tamanho': len(self._itens),
+                'tamanho_maximo': self.tamanho_maximo,
+                'acertos': self.acertos,
+                'falhas': self.falhas,
+                'remocoes': self.remocoes,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0
+            }
+
+    def __len__(self):
+        return len(self._itens)
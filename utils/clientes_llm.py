@@ -0,0 +1,166 @@
+"""
+Clientes LLM compartilhados pelo processo
+
+Um único pool de conexões HTTP (keep-alive, HTTP/2 opcional) atende todas
+as chamadas ao Groq e à OpenAI, em vez de abrir conexão e handshake TLS
+novos a cada cache miss. Limites e timeouts podem ser ajustados em
+.streamlit/secrets.toml com as chaves de CONFIG_PADRAO.
+
+O SDK da OpenAI (~0,5 s de import) só é carregado quando o primeiro cliente
+é criado: páginas que importam este módulo, mas não chegam a chamar um
+provedor, não pagam esse custo na abertura.
+"""
+import os
+import threading
+
+import streamlit as st
+
+URL_GROQ = "https://api.groq.com/openai/v1"
+# Endpoint compatível com a OpenAI da API do Gemini (mesmo SDK e mesmo pool)
+URL_GEMINI = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+# Provedor -> (secret com a API key, base_url; None = padrão do SDK)
+PROVEDORES = {
+    "groq": ("GROQ_API_KEY", URL_GROQ),
+    "openai": ("OPENAI_API_KEY", None),
+    "gemini": ("GEMINI_API_KEY", URL_GEMINI),
+}
+
+CONFIG_PADRAO = {
+    "LLM_MAX_CONEXOES": 20,
+    "LLM_MAX_CONEXOES_OCIOSAS": 10,
+    "LLM_KEEPALIVE_SEGUNDOS": 60.0,
+    "LLM_TIMEOUT_CONEXAO": 5.0,
+    "LLM_TIMEOUT_LEITURA": 60.0,
+    "LLM_HTTP2": False,
+}
+
+_lock = threading.Lock()
+_http_client = None
+_clientes = {}
+
+
+def config_llm(nome):
+    """Valor de configuração do secrets.toml, ou o padrão de CONFIG_PADRAO"""
+    try:
+        return st.secrets.get(nome, CONFIG_PADRAO[nome])
+    except Exception:
+        # Sem secrets.toml (ex.: scripts e jobs fora do Streamlit)
+        return CONFIG_PADRAO[nome]
+
+
+def obter_segredo(nome):
+    """
+    API key do secrets.toml ou, fora do Streamlit, da variável de ambiente
+
+    Raises:
+        KeyError: Se não estiver configurada em nenhum dos dois
+    """
+    try:
+        return st.secrets[nome]
+    except Exception:
+        if nome in os.environ:
+            return os.environ[nome]
+        raise KeyError(f"{nome} não configurada nos Secrets nem no ambiente") from None
+
+
+def provedor_configurado(provedor):
+    """True se a API key do provedor está nos Secrets ou no ambiente"""
+    try:
+        obter_segredo(PROVEDORES[provedor][0])
+        return True
+    except KeyError:
+        return False
+
+
+def _configuracao_http():
+    from openai import DEFAULT_CONNECTION_LIMITS, Timeout
+
+    # Limits do mesmo pacote HTTP que o SDK usa internamente (httpx, conforme a versão)
+    limites = type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=int(config_llm("LLM_MAX_CONEXOES")),
+        max_keepalive_connections=int(config_llm("LLM_MAX_CONEXOES_OCIOSAS")),
+        keepalive_expiry=float(config_llm("LLM_KEEPALIVE_SEGUNDOS")),
+    )
+    timeout = Timeout(
+        float(config_llm("LLM_TIMEOUT_LEITURA")),
+        connect=float(config_llm("LLM_TIMEOUT_CONEXAO")),
+    )
+    return limites, timeout, bool(config_llm("LLM_HTTP2"))
+
+
+def _criar_http_client(assincrono=False):
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+    classe = DefaultAsyncHttpxClient if assincrono else DefaultHttpxClient
+    limites, timeout, http2 = _configuracao_http()
+    try:
+        return classe(limits=limites, timeout=timeout, http2=http2)
+    except ImportError:
+        # HTTP/2 exige o pacote h2 (pip install httpx[http2])
+        return classe(limits=limites, timeout=timeout)
+
+
+def obter_http_client():
+    """Pool de conexões HTTP compartilhado por todos os clientes LLM"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            _http_client = _criar_http_client()
+        return _http_client
+
+
+def obter_cliente(provedor="groq"):
+    """
+    Cliente OpenAI-compatível do provedor, criado uma vez por processo
+
+    Args:
+        provedor (str): 'groq', 'openai' ou 'gemini'
+
+    Returns:
+        OpenAI: Cliente que reutiliza o pool de conexões compartilhado
+    """
+    cliente = _clientes.get(provedor)
+    if cliente is not None:
+        return cliente
+
+    from openai import OpenAI
+
+    secret, base_url = PROVEDORES[provedor]
+    http_client = obter_http_client()
+    with _lock:
+        if provedor not in _clientes:
+            _clientes[provedor] = OpenAI(
+                api_key=obter_segredo(secret),
+                base_url=base_url,
+                http_client=http_client,
+            )
+        return _clientes[provedor]
+
+
+def criar_cliente_async(provedor="groq"):
+    """
+    Cliente assíncrono do provedor, com os mesmos limites e timeouts
+
+    Clientes assíncronos ficam presos ao event loop em que foram usados,
+    então não são compartilhados: quem cria deve fechá-lo (await close()).
+    """
+    from openai import AsyncOpenAI
+
+    secret, base_url = PROVEDORES[provedor]
+    return AsyncOpenAI(
+        api_key=obter_segredo(secret),
+        base_url=base_url,
+        http_client=_criar_http_client(assincrono=True),
+        max_retries=0,
+    )
+
+
+def fechar_clientes():
+    """Fecha o pool de conexões (ex.: ao trocar a configuração ou nos testes)"""
+    global _http_client
+    with _lock:
+        _clientes.clear()
+        if _http_client is not None:
+            _http_client.close()
+            _http_client = None
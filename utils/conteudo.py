@@ -0,0 +1,129 @@
+"""
+Armazém persistente dos textos gerados pelo LLM (SQLite)
+
+Cada texto é identificado por (tipo, chave), por exemplo
+('horoscopo', 'Áries|2025-01-01'). Guarda quando foi gerado e até quando
+vale, e sobrevive a reinícios, então textos pré-gerados ficam disponíveis
+para todas as réplicas que montam o mesmo volume.
+"""
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "conteudo.sqlite3"
+
+
+class ArmazemConteudo:
+    """Textos gerados, por tipo e chave, com data de geração e validade"""
+
+    def __init__(self, caminho=CAMINHO_PADRAO):
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=10)
+        # WAL permite leituras concorrentes de outros processos durante a escrita
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS conteudo (
+                   tipo TEXT NOT NULL,
+                   chave TEXT NOT NULL,
+                   texto TEXT NOT NULL,
+                   gerado_em REAL NOT NULL,
+                   expira_em REAL NOT NULL,
+                   PRIMARY KEY (tipo, chave)
+               )"""
+        )
+        self._conexao.commit()
+
+    def obter(self, tipo, chave):
+        """
+        Busca um texto, mesmo que já vencido
+
+        Args:
+            tipo (str): Tipo de conteúdo ('horoscopo', ...)
+            chave (str): Chave dentro do tipo
+
+        Returns:
+            dict | None: 'texto', 'gerado_em' e 'expira_em' (timestamps), ou None
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT texto, gerado_em, expira_em FROM conteudo WHERE tipo = ? AND chave = ?",
+                (tipo, chave)
+            ).fetchone()
+        if linha is None:
+            return None
+        return {'texto': linha[0], 'gerado_em': linha[1], 'expira_em': linha[2]}
+
+    def obter_valido(self, tipo, chave):
+        """
+        Busca um texto ainda dentro da validade
+
+        Returns:
+            str | None: Texto ou None se ausente/vencido
+        """
+        registro = self.obter(tipo, chave)
+        if registro is None or registro['expira_em'] <= time.time():
+            return None
+        return registro['texto']
+
+    def guardar(self, tipo, chave, texto, ttl):
+        """
+        Grava (ou substitui) um texto
+
+        Args:
+            tipo (str): Tipo de conteúdo
+            chave (str): Chave dentro do tipo
+            texto (str): Texto gerado
+            ttl (float): Validade em segundos
+        """
+        agora = time.time()
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO conteudo VALUES (?, ?, ?, ?, ?)",
+                (tipo, chave, texto, agora, agora + ttl)
+            )
+            self._conexao.commit()
+
+    def chaves_validas(self, tipo, gerados_depois_de=None):
+        """
+        Chaves do tipo que ainda estão dentro da validade
+
+        Args:
+            tipo (str): Tipo de conteúdo
+            gerados_depois_de (float, opcional): Considera só textos gerados
+                depois deste timestamp
+
+        Returns:
+            set[str]: Chaves
+        """
+        with self._lock:
+            linhas = self._conexao.execute(
+                "SELECT chave FROM conteudo WHERE tipo = ? AND expira_em > ? AND gerado_em > ?",
+                (tipo, time.time(), gerados_depois_de or 0)
+            ).fetchall()
+        return {linha[0] for linha in linhas}
+
+    def limpar_expirados(self, tolerancia=0):
+        """
+        Remove textos vencidos há mais de `tolerancia` segundos
+
+        Returns:
+            int: Quantidade removida
+        """
+        with self._lock:
+            cursor = self._conexao.execute(
+                "DELETE FROM conteudo WHERE expira_em <= ?", (time.time() - tolerancia,)
+            )
+            self._conexao.commit()
+            return cursor.rowcount
+
+
+@lru_cache(maxsize=1)
+def obter_armazem():
+    """Armazém compartilhado pelo processo"""
+    return ArmazemConteudo()
@@ -0,0 +1,117 @@
+"""
+Consumo da cota dos provedores LLM, compartilhado entre processos (SQLite)
+
+O Streamlit, a API, o cron de pré-geração, os lotes e as sondagens de
+saúde rodam em processos diferentes, cada um com seus agendadores, mas
+todos gastam a mesma cota da conta. Antes de liberar uma requisição o
+agendador a registra aqui, nas janelas do dia (UTC) e do minuto, então a
+soma dos processos que montam o mesmo data/ fica dentro do limite.
+"""
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "cota_llm.sqlite3"
+
+# Janela -> duração em segundos (o dia vira à meia-noite UTC)
+JANELAS = {'dia': 86400, 'minuto': 60}
+
+
+def _inicio_janela(janela, agora):
+    return agora - agora % JANELAS[janela]
+
+
+class CotaCompartilhada:
+    """Requisições feitas a um provedor na janela atual, somadas entre processos"""
+
+    def __init__(self, provedor, caminho=CAMINHO_PADRAO):
+        self.provedor = provedor
+        self.caminho = Path(caminho)
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        # isolation_level=None: as transações são abertas à mão (BEGIN IMMEDIATE)
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=10, isolation_level=None)
+        # WAL permite leituras concorrentes de outros processos durante a escrita
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS consumo (
+                   provedor TEXT NOT NULL,
+                   janela TEXT NOT NULL,
+                   inicio REAL NOT NULL,
+                   usadas INTEGER NOT NULL,
+                   PRIMARY KEY (provedor, janela)
+               )"""
+        )
+
+    def _usadas(self, agora):
+        # Janela -> requisições na janela atual (linhas de janelas passadas valem 0)
+        linhas = self._conexao.execute(
+            "SELECT janela, inicio, usadas FROM consumo WHERE provedor = ?", (self.provedor,)
+        ).fetchall()
+        usadas = dict.fromkeys(JANELAS, 0)
+        for janela, inicio, quantidade in linhas:
+            if janela in JANELAS and inicio == _inicio_janela(janela, agora):
+                usadas[janela] = quantidade
+        return usadas
+
+    def consumir(self, limites):
+        """
+        Registra uma requisição, se nenhuma janela chegou ao limite
+
+        Args:
+            limites (dict): Janela ('dia', 'minuto') -> máximo de requisições
+
+        Returns:
+            float: 0 se registrou; senão, segundos até a janela cheia virar
+        """
+        agora = time.time()
+        with self._lock:
+            # IMMEDIATE: dois processos não leem o mesmo saldo antes de gravar
+            self._conexao.execute("BEGIN IMMEDIATE")
+            try:
+                usadas = self._usadas(agora)
+                for janela, limite in limites.items():
+                    if usadas[janela] >= limite:
+                        self._conexao.execute("ROLLBACK")
+                        return _inicio_janela(janela, agora) + JANELAS[janela] - agora
+                for janela in limites:
+                    self._conexao.execute(
+                        "INSERT OR REPLACE INTO consumo VALUES (?, ?, ?, ?)",
+                        (self.provedor, janela, _inicio_janela(janela, agora), usadas[janela] + 1)
+                    )
+                self._conexao.execute("COMMIT")
+            except BaseException:
+                if self._conexao.in_transaction:
+                    self._conexao.execute("ROLLBACK")
+                raise
+        return 0
+
+    def devolver(self):
+        """Desfaz um consumir() cuja requisição acabou não sendo feita"""
+        agora = time.time()
+        with self._lock:
+            for janela in JANELAS:
+                self._conexao.execute(
+                    "UPDATE consumo SET usadas = usadas - 1 WHERE provedor = ? AND janela = ? AND inicio = ? AND usadas > 0",
+                    (self.provedor, janela, _inicio_janela(janela, agora))
+                )
+
+    def usadas(self):
+        """
+        Requisições nas janelas atuais, somando todos os processos
+
+        Returns:
+            dict: 'dia' e 'minuto' -> quantidade
+        """
+        with self._lock:
+            return self._usadas(time.time())
+
+
+@lru_cache(maxsize=None)
+def obter_cota(provedor):
+    """Cota compartilhada do provedor, uma conexão por processo"""
+    return CotaCompartilhada(provedor)
@@ -0,0 +1,239 @@
+"""
+Tabela de efemérides pré-calculada e mapeada em memória
+
+Guarda, para cada dia entre 1900 e 2100, a longitude e a velocidade diária
+dos planetas de PLANETAS. As posições intermediárias são obtidas por
+interpolação cúbica de Hermite. Com o passo padrão de 1 dia o erro fica
+abaixo de 1 segundo de arco na maior parte do intervalo e é garantido abaixo
+de ERRO_MAXIMO_GRAUS (5"), bem menor que o arredondamento de 0,01° exibido.
+
+O arquivo .npy é aberto com mmap, então todos os processos de trabalho da
+mesma máquina compartilham as mesmas páginas em vez de copiar a tabela.
+O Swiss Ephemeris continua sendo a referência e o fallback fora do intervalo.
+
+Uso:
+    python -m utils.efemerides gerar [--inicio 1900 --fim 2100 --passo 1.0]
+    python -m utils.efemerides verificar [--amostras 20000]
+"""
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import swisseph as swe
+
+from utils.astro_calc import PLANETAS
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "efemerides.npy"
+
+# Erro máximo documentado para o passo de 1 dia (graus)
+ERRO_MAXIMO_GRAUS = 5.0 / 3600
+
+
+class TabelaEfemerides:
+    """
+    Longitudes planetárias interpoladas a partir de uma tabela diária
+
+    Attributes:
+        dados (np.ndarray): Array (n_amostras, n_planetas, 2) com longitude e
+            velocidade em graus/dia, normalmente um np.memmap somente leitura
+        jd_inicial (float): Julian Day da primeira amostra
+        passo (float): Intervalo entre amostras, em dias
+    """
+
+    def __init__(self, dados, jd_inicial, passo):
+        self.dados = dados
+        self.jd_inicial = float(jd_inicial)
+        self.passo = float(passo)
+        self.jd_final = self.jd_inicial + (len(dados) - 1) * self.passo
+
+    def cobre(self, jds):
+        """
+        Indica quais Julian Days estão dentro do intervalo da tabela
+
+        Args:
+            jds (np.ndarray): Julian Days (UT)
+
+        Returns:
+            np.ndarray: Máscara booleana
+        """
+        jds = np.asarray(jds, dtype=np.float64)
+        return (jds >= self.jd_inicial) & (jds < self.jd_final)
+
+    def longitudes(self, jds):
+        """
+        Interpola a longitude eclíptica de todos os planetas
+
+        Args:
+            jds (np.ndarray): Julian Days (UT), todos dentro do intervalo
+
+        Returns:
+            np.ndarray: Matriz (n, n_planetas) com longitudes em [0, 360)
+        """
+        jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+        if not self.cobre(jds).all():
+            raise ValueError("Julian Day fora do intervalo da tabela de efemérides")
+
+        posicao = (jds - self.jd_inicial) / self.passo
+        indices = posicao.astype(np.int64)
+        t = (posicao - indices)[:, None]
+
+        inicio = self.dados[indices]
+        fim = self.dados[indices + 1]
+        p0, v0 = inicio[..., 0], inicio[..., 1] * self.passo
+        v1 = fim[..., 1] * self.passo
+        # Diferença desenrolada para atravessar 360° -> 0° sem saltos
+        delta = np.mod(fim[..., 0] - p0 + 180.0, 360.0) - 180.0
+
+        t2 = t * t
+        t3 = t2 * t
+        resultado = (p0 + (t3 - 2 * t2 + t) * v0
+                     + (3 * t2 - 2 * t3) * delta
+                     + (t3 - t2) * v1)
+        return np.mod(resultado, 360.0)
+
+
+def gerar_tabela(caminho=CAMINHO_PADRAO, ano_inicial=1900, ano_final=2100, passo=1.0):
+    """
+    Calcula a tabela com o Swiss Ephemeris e grava em disco
+
+    Args:
+        caminho (Path | str): Arquivo .npy de saída (metadados vão num .json ao lado)
+        ano_inicial (int): Primeiro ano coberto (a partir de 1º de janeiro)
+        ano_final (int): Último ano coberto (até 31 de dezembro)
+        passo (float): Intervalo entre amostras, em dias
+
+    Returns:
+        Path: Caminho do arquivo gerado
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    jd_inicial = swe.julday(ano_inicial, 1, 1, 0.0)
+    jd_final = swe.julday(ano_final + 1, 1, 1, 0.0)
+    # Uma amostra extra no fim para interpolar o último intervalo
+    n_amostras = int(np.ceil((jd_final - jd_inicial) / passo)) + 1
+    jds = (jd_inicial + np.arange(n_amostras) * passo).tolist()
+
+    dados = np.lib.format.open_memmap(
+        caminho, mode="w+", dtype=np.float64, shape=(n_amostras, len(PLANETAS), 2)
+    )
+    calc_ut = swe.calc_ut
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    for coluna, id_planeta in enumerate(PLANETAS.values()):
+        for linha, jd in enumerate(jds):
+            resultado = calc_ut(jd, id_planeta, flags)[0]
+            dados[linha, coluna, 0] = resultado[0]
+            dados[linha, coluna, 1] = resultado[3]
+    dados.flush()
+    del dados
+
+    metadados = {
+        "jd_inicial": jd_inicial,
+        "passo": passo,
+        "planetas": list(PLANETAS),
+        "ano_inicial": ano_inicial,
+        "ano_final": ano_final
+    }
+    caminho.with_suffix(".json").write_text(json.dumps(metadados, ensure_ascii=False, indent=2))
+    return caminho
+
+
+def abrir_tabela(caminho=CAMINHO_PADRAO):
+    """
+    Abre a tabela em modo mmap (somente leitura)
+
+    Args:
+        caminho (Path | str): Arquivo .npy gerado por gerar_tabela
+
+    Returns:
+        TabelaEfemerides: Tabela pronta para consulta
+    """
+    caminho = Path(caminho)
+    metadados = json.loads(caminho.with_suffix(".json").read_text())
+    if metadados["planetas"] != list(PLANETAS):
+        raise ValueError("Tabela de efemérides gerada para outra lista de planetas")
+
+    dados = np.load(caminho, mmap_mode="r")
+    return TabelaEfemerides(dados, metadados["jd_inicial"], metadados["passo"])
+
+
+_tabelas = {}
+
+
+def carregar_tabela(caminho=CAMINHO_PADRAO):
+    """
+    Retorna a tabela compartilhada do processo, ou None se não foi gerada
+
+    A ausência não fica guardada: uma tabela gerada com o processo já no
+    ar passa a ser usada na chamada seguinte.
+
+    Args:
+        caminho (Path | str): Arquivo .npy gerado por gerar_tabela
+
+    Returns:
+        TabelaEfemerides | None: Tabela mapeada em memória
+    """
+    caminho = Path(caminho)
+    tabela = _tabelas.get(caminho)
+    # O .json é gravado por último: com ele presente, o .npy está completo
+    if tabela is None and caminho.with_suffix(".json").exists():
+        tabela = _tabelas[caminho] = abrir_tabela(caminho)
+    return tabela
+
+
+def verificar_tabela(tabela, amostras=20000, semente=0):
+    """
+    Compara a interpolação com swe.calc_ut em instantes aleatórios
+
+    Args:
+        tabela (TabelaEfemerides): Tabela a verificar
+        amostras (int): Quantidade de instantes sorteados
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        dict: Erro máximo em segundos de arco por planeta
+    """
+    gerador = np.random.default_rng(semente)
+    jds = gerador.uniform(tabela.jd_inicial, tabela.jd_final, amostras)
+    interpoladas = tabela.longitudes(jds)
+
+    erros = {}
+    for coluna, (nome_planeta, id_planeta) in enumerate(PLANETAS.items()):
+        referencia = np.array([swe.calc_ut(jd, id_planeta, swe.FLG_SWIEPH)[0][0] for jd in jds.tolist()])
+        diferenca = np.mod(interpoladas[:, coluna] - referencia + 180.0, 360.0) - 180.0
+        erros[nome_planeta] = float(np.abs(diferenca).max() * 3600)
+    return erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabela de efemérides pré-calculada")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    gerar = subcomandos.add_parser("gerar", help="Calcula e grava a tabela")
+    gerar.add_argument("--saida", default=str(CAMINHO_PADRAO))
+    gerar.add_argument("--inicio", type=int, default=1900)
+    gerar.add_argument("--fim", type=int, default=2100)
+    gerar.add_argument("--passo", type=float, default=1.0)
+
+    verificar = subcomandos.add_parser("verificar", help="Mede o erro contra swe.calc_ut")
+    verificar.add_argument("--tabela", default=str(CAMINHO_PADRAO))
+    verificar.add_argument("--amostras", type=int, default=20000)
+
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        caminho = gerar_tabela(args.saida, args.inicio, args.fim, args.passo)
+        print(f"✅ Tabela gravada em {caminho}")
+    else:
+        erros = verificar_tabela(abrir_tabela(args.tabela), args.amostras)
+        for nome_planeta, erro in erros.items():
+            print(f"{nome_planeta:10s} erro máximo: {erro:.4f}\"")
+        pior = max(erros.values())
+        limite = ERRO_MAXIMO_GRAUS * 3600
+        print(f"{'✅' if pior <= limite else '❌'} Pior caso {pior:.4f}\" (limite {limite:.1f}\")")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,398 @@
+"""
+Gazetteer offline: busca de cidades sem depender do Nominatim
+
+Os municípios ficam num TSV compactado (gzip) com uma cidade por linha:
+nome, UF/região, código do país, latitude, longitude e população. Na carga
+são montados dois índices em memória:
+
+- prefixo: lista ordenada de nomes normalizados + busca binária (bisect),
+  que responde "todas as cidades que começam com X" em O(log n + k);
+- trigramas: índice invertido de trigramas para busca aproximada,
+  tolerante a acentos e erros de digitação.
+
+O arquivo é gerado a partir de fontes públicas:
+    python -m utils.gazetteer construir --ibge municipios.csv [--geonames cities500.txt]
+
+--ibge espera o CSV de municípios com as colunas codigo_ibge, nome,
+latitude, longitude e codigo_uf (ex.: github.com/kelvins/municipios-brasileiros).
+--populacao aceita um CSV com as colunas codigo_ibge e populacao (estimativas
+do IBGE), usado para desempatar homônimos; sem ele, só as capitais desempatam.
+--geonames aceita os dumps tabulados do GeoNames (cities500.txt, PT.txt...)
+para cobrir outros países.
+"""
+import argparse
+import bisect
+import csv
+import gzip
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+from pathlib import Path
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "gazetteer.tsv.gz"
+
+# Códigos de UF do IBGE -> sigla
+UF_IBGE = {
+    11: 'RO', 12: 'AC', 13: 'AM', 14: 'RR', 15: 'PA', 16: 'AP', 17: 'TO',
+    21: 'MA', 22: 'PI', 23: 'CE', 24: 'RN', 25: 'PB', 26: 'PE', 27: 'AL',
+    28: 'SE', 29: 'BA', 31: 'MG', 32: 'ES', 33: 'RJ', 35: 'SP', 41: 'PR',
+    42: 'SC', 43: 'RS', 50: 'MS', 51: 'MT', 52: 'GO', 53: 'DF'
+}
+
+# Capital de cada UF: vem antes dos homônimos de outros estados
+CAPITAIS = {
+    'RO': 'Porto Velho', 'AC': 'Rio Branco', 'AM': 'Manaus', 'RR': 'Boa Vista',
+    'PA': 'Belém', 'AP': 'Macapá', 'TO': 'Palmas', 'MA': 'São Luís',
+    'PI': 'Teresina', 'CE': 'Fortaleza', 'RN': 'Natal', 'PB': 'João Pessoa',
+    'PE': 'Recife', 'AL': 'Maceió', 'SE': 'Aracaju', 'BA': 'Salvador',
+    'MG': 'Belo Horizonte', 'ES': 'Vitória', 'RJ': 'Rio de Janeiro',
+    'SP': 'São Paulo', 'PR': 'Curitiba', 'SC': 'Florianópolis',
+    'RS': 'Porto Alegre', 'MS': 'Campo Grande', 'MT': 'Cuiabá',
+    'GO': 'Goiânia', 'DF': 'Brasília'
+}
+
+# Nomes de país aceitos em buscar_coordenadas -> código ISO usado no arquivo
+PAISES = {
+    'brasil': 'BR', 'brazil': 'BR', 'portugal': 'PT', 'argentina': 'AR',
+    'uruguai': 'UY', 'paraguai': 'PY', 'chile': 'CL', 'estados unidos': 'US',
+    'eua': 'US', 'espanha': 'ES', 'italia': 'IT', 'franca': 'FR',
+    'alemanha': 'DE', 'japao': 'JP'
+}
+
+NOMES_PAISES = {'BR': 'Brasil', 'PT': 'Portugal'}
+
+# Similaridade mínima (coeficiente de Dice sobre trigramas) para sugerir
+# uma correspondência aproximada; ela nunca é aceita como se fosse exata
+SIMILARIDADE_MINIMA = 0.5
+
+# Entre homônimos sem UF, o mais populoso só é escolhido se tiver pelo
+# menos este múltiplo da população do segundo; senão a busca é ambígua
+FATOR_DESEMPATE = 10
+
+
+def normalizar(texto):
+    """
+    Normaliza um nome para comparação: minúsculas, sem acentos e sem pontuação
+
+    Args:
+        texto (str): Texto livre (ex: "São Paulo, SP")
+
+    Returns:
+        str: Texto normalizado (ex: "sao paulo sp")
+    """
+    sem_acentos = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in sem_acentos if not unicodedata.combining(c))
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", sem_acentos.lower()).split())
+
+
+def _trigramas(texto):
+    texto = f"  {texto} "
+    return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+
+def _capital(cidade):
+    nome, uf, pais, _, _, _ = cidade
+    return pais == "BR" and uf in CAPITAIS and normalizar(nome) == normalizar(CAPITAIS[uf])
+
+
+class Gazetteer:
+    """
+    Índices de prefixo e de trigramas sobre uma lista de cidades
+
+    Attributes:
+        cidades (list[tuple]): (nome, uf, pais, latitude, longitude, populacao)
+    """
+
+    def __init__(self, cidades):
+        # Capitais e depois as mais populosas primeiro: desempata homônimos na busca exata
+        self.cidades = sorted(cidades, key=lambda cidade: (not _capital(cidade), -cidade[5]))
+        self._nomes = [normalizar(cidade[0]) for cidade in self.cidades]
+
+        self._prefixos = sorted((nome, indice) for indice, nome in enumerate(self._nomes))
+        self._chaves_prefixo = [nome for nome, _ in self._prefixos]
+
+        self._trigramas = defaultdict(list)
+        self._total_trigramas = []
+        for indice, nome in enumerate(self._nomes):
+            trigramas = _trigramas(nome)
+            self._total_trigramas.append(len(trigramas))
+            for trigrama in trigramas:
+                self._trigramas[trigrama].append(indice)
+
+        self._ufs = {normalizar(cidade[1]) for cidade in self.cidades if cidade[1]}
+
+    def __len__(self):
+        return len(self.cidades)
+
+    def _separar_regiao(self, consulta):
+        """Separa 'porto alegre rs' em ('porto alegre', 'rs') quando o final é uma UF conhecida"""
+        partes = consulta.rsplit(" ", 1)
+        if len(partes) == 2 and partes[1] in self._ufs:
+            return partes[0], partes[1]
+        return consulta, None
+
+    def _filtrar(self, indices, regiao, pais):
+        for indice in indices:
+            _, uf, codigo_pais, _, _, _ = self.cidades[indice]
+            if pais and codigo_pais != pais:
+                continue
+            if regiao and normalizar(uf) != regiao:
+                continue
+            yield indice
+
+    def por_prefixo(self, prefixo, pais=None, limite=10):
+        """
+        Cidades cujo nome começa com o prefixo (sem diferenciar acentos)
+
+        Args:
+            prefixo (str): Início do nome digitado
+            pais (str, opcional): Código ISO do país para filtrar
+            limite (int): Quantidade máxima de resultados
+
+        Returns:
+            list[tuple]: Cidades, capitais e depois das mais populosas para as menos
+        """
+        chave = normalizar(prefixo)
+        if not chave:
+            return []
+        inicio = bisect.bisect_left(self._chaves_prefixo, chave)
+        fim = bisect.bisect_left(self._chaves_prefixo, chave + "\uffff", lo=inicio)
+        indices = sorted(indice for _, indice in self._prefixos[inicio:fim])
+        return [self.cidades[i] for i in list(self._filtrar(indices, None, pais))[:limite]]
+
+    def aproximada(self, consulta, pais=None, limite=5):
+        """
+        Busca tolerante a erros de digitação por similaridade de trigramas
+
+        Args:
+            consulta (str): Nome digitado, opcionalmente com a UF no final
+            pais (str, opcional): Código ISO do país para filtrar
+            limite (int): Quantidade máxima de resultados
+
+        Returns:
+            list[tuple]: (similaridade, cidade), da mais parecida para a menos
+        """
+        nome, regiao = self._separar_regiao(normalizar(consulta))
+        trigramas_consulta = _trigramas(nome)
+
+        contagem = Counter()
+        for trigrama in trigramas_consulta:
+            contagem.update(self._trigramas.get(trigrama, ()))
+
+        resultados = []
+        for indice in self._filtrar(contagem, regiao, pais):
+            total = len(trigramas_consulta) + self._total_trigramas[indice]
+            resultados.append((2 * contagem[indice] / total, indice))
+        # Empate de similaridade: índice menor = capital ou cidade mais populosa
+        resultados.sort(key=lambda item: (-item[0], item[1]))
+        return [(similaridade, self.cidades[indice]) for similaridade, indice in resultados[:limite]]
+
+    def homonimos(self, consulta, pais=None):
+        """
+        Cidades com exatamente esse nome (sem diferenciar acentos)
+
+        Args:
+            consulta (str): Nome, opcionalmente com a UF no final
+            pais (str, opcional): Código ISO do país
+
+        Returns:
+            list[tuple]: Cidades, capitais e depois das mais populosas para as menos
+        """
+        nome, regiao = self._separar_regiao(normalizar(consulta))
+        inicio = bisect.bisect_left(self._chaves_prefixo, nome)
+        fim = bisect.bisect_right(self._chaves_prefixo, nome, lo=inicio)
+        exatos = sorted(indice for _, indice in self._prefixos[inicio:fim])
+        return [self.cidades[indice] for indice in self._filtrar(exatos, regiao, pais)]
+
+    def buscar(self, consulta, pais=None):
+        """
+        Resolve um nome de cidade só por correspondência exata
+
+        Entre homônimos (ex: "Bom Jesus" sem UF), fica a capital ou a cidade
+        bem mais populosa que as outras (FATOR_DESEMPATE); se nenhuma se
+        destaca, a busca é ambígua e retorna None. Nomes com erro de
+        digitação também retornam None: ver sugestoes.
+
+        Args:
+            consulta (str): Ex: "Porto Alegre, RS", "porto alegre rs", "Sao Paulo"
+            pais (str, opcional): Código ISO do país
+
+        Returns:
+            tuple | None: Cidade encontrada ou None
+        """
+        encontradas = self.homonimos(consulta, pais)
+        if len(encontradas) == 1:
+            return encontradas[0]
+        if len(encontradas) > 1:
+            primeira, segunda = encontradas[0], encontradas[1]
+            if _capital(primeira) and not _capital(segunda):
+                return primeira
+            if primeira[5] > 0 and primeira[5] >= FATOR_DESEMPATE * segunda[5]:
+                return primeira
+        return None
+
+    def sugestoes(self, consulta, pais=None, limite=5):
+        """
+        Cidades a oferecer quando buscar não resolve: os homônimos, se a
+        busca foi ambígua, ou as parecidas (acima de SIMILARIDADE_MINIMA)
+
+        Args:
+            consulta (str): Nome digitado
+            pais (str, opcional): Código ISO do país
+            limite (int): Quantidade máxima de sugestões
+
+        Returns:
+            list[tuple]: Cidades sugeridas
+        """
+        encontradas = self.homonimos(consulta, pais)
+        if encontradas:
+            return encontradas[:limite]
+        return [cidade for similaridade, cidade in self.aproximada(consulta, pais, limite)
+                if similaridade >= SIMILARIDADE_MINIMA]
+
+
+def nome_completo(cidade):
+    """Formata a cidade como 'Nome, UF, País'"""
+    nome, uf, pais, _, _, _ = cidade
+    partes = [nome, uf, NOMES_PAISES.get(pais, pais)]
+    return ", ".join(parte for parte in partes if parte)
+
+
+def codigo_pais(pais):
+    """Converte o nome do país usado no app ('Brasil') para o código ISO, ou None"""
+    if len(pais) == 2 and pais.isalpha():
+        return pais.upper()
+    return PAISES.get(normalizar(pais))
+
+
+def ler_arquivo(caminho=CAMINHO_PADRAO):
+    """
+    Lê o TSV compactado do gazetteer
+
+    Args:
+        caminho (Path | str): Arquivo .tsv.gz
+
+    Returns:
+        list[tuple]: (nome, uf, pais, latitude, longitude, populacao)
+    """
+    with gzip.open(caminho, "rt", encoding="utf-8") as arquivo:
+        return [
+            (nome, uf, pais, float(latitude), float(longitude), int(populacao))
+            for nome, uf, pais, latitude, longitude, populacao
+            in (linha.rstrip("\n").split("\t") for linha in arquivo)
+        ]
+
+
+def gravar_arquivo(cidades, caminho=CAMINHO_PADRAO):
+    """
+    Grava as cidades no formato lido por ler_arquivo
+
+    Args:
+        cidades (Iterable[tuple]): (nome, uf, pais, latitude, longitude, populacao)
+        caminho (Path | str): Arquivo .tsv.gz de saída
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    with gzip.open(caminho, "wt", encoding="utf-8") as arquivo:
+        for nome, uf, pais, latitude, longitude, populacao in cidades:
+            arquivo.write(f"{nome}\t{uf}\t{pais}\t{latitude:.4f}\t{longitude:.4f}\t{populacao}\n")
+
+
+def ler_populacao_ibge(caminho):
+    """Lê as estimativas de população do IBGE (colunas codigo_ibge, populacao) por código de município"""
+    with open(caminho, encoding="utf-8") as arquivo:
+        return {
+            int(linha["codigo_ibge"]): int(re.sub(r"\D", "", linha["populacao"]) or 0)
+            for linha in csv.DictReader(arquivo)
+        }
+
+
+def ler_ibge(caminho, populacao=None):
+    """
+    Lê o CSV de municípios do IBGE (colunas codigo_ibge, nome, latitude, longitude, codigo_uf)
+
+    Args:
+        caminho (Path | str): CSV de municípios
+        populacao (dict, opcional): codigo_ibge -> população (ver ler_populacao_ibge);
+            municípios sem estimativa ficam com 0
+
+    Returns:
+        list[tuple]: (nome, uf, pais, latitude, longitude, populacao)
+    """
+    populacao = populacao or {}
+    with open(caminho, encoding="utf-8") as arquivo:
+        return [
+            (linha["nome"], UF_IBGE[int(linha["codigo_uf"])], "BR",
+             float(linha["latitude"]), float(linha["longitude"]),
+             populacao.get(int(linha["codigo_ibge"]), 0))
+            for linha in csv.DictReader(arquivo)
+        ]
+
+
+def ler_geonames(caminho, ignorar_paises=()):
+    """Lê um dump tabulado do GeoNames (formato de cities500.txt / XX.txt)"""
+    cidades = []
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            campos = linha.rstrip("\n").split("\t")
+            # Só localidades povoadas (classe P)
+            if campos[6] != "P" or campos[8] in ignorar_paises:
+                continue
+            cidades.append((campos[1], campos[10], campos[8],
+                            float(campos[4]), float(campos[5]), int(campos[14] or 0)))
+    return cidades
+
+
+@lru_cache(maxsize=None)
+def carregar_gazetteer(caminho=CAMINHO_PADRAO):
+    """
+    Retorna o gazetteer compartilhado do processo, ou None se o arquivo não existe
+
+    Args:
+        caminho (Path | str): Arquivo .tsv.gz
+
+    Returns:
+        Gazetteer | None: Índices prontos para consulta
+    """
+    if not Path(caminho).exists():
+        return None
+    return Gazetteer(ler_arquivo(caminho))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gazetteer offline de cidades")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    construir = subcomandos.add_parser("construir", help="Gera o arquivo a partir de fontes públicas")
+    construir.add_argument("--ibge", help="CSV de municípios brasileiros")
+    construir.add_argument("--populacao", help="CSV de estimativas de população do IBGE (codigo_ibge, populacao)")
+    construir.add_argument("--geonames", action="append", default=[], help="Dump do GeoNames (repetível)")
+    construir.add_argument("--saida", default=str(CAMINHO_PADRAO))
+
+    buscar = subcomandos.add_parser("buscar", help="Testa uma consulta")
+    buscar.add_argument("consulta")
+    buscar.add_argument("--arquivo", default=str(CAMINHO_PADRAO))
+
+    args = parser.parse_args()
+
+    if args.comando == "construir":
+        populacao = ler_populacao_ibge(args.populacao) if args.populacao else None
+        cidades = ler_ibge(args.ibge, populacao) if args.ibge else []
+        # Com o IBGE presente, o Brasil vem só dele (coordenadas oficiais, sem duplicatas)
+        ignorar = ("BR",) if args.ibge else ()
+        for caminho in args.geonames:
+            cidades.extend(ler_geonames(caminho, ignorar))
+        gravar_arquivo(cidades, args.saida)
+        print(f"✅ {len(cidades)} cidades gravadas em {args.saida}")
+    else:
+        gazetteer = Gazetteer(ler_arquivo(args.arquivo))
+        print("Exata:", gazetteer.buscar(args.consulta))
+        print("Sugestões:", gazetteer.sugestoes(args.consulta))
+        print("Prefixo:", gazetteer.por_prefixo(args.consulta, limite=5))
+        print("Aproximada:", gazetteer.aproximada(args.consulta))
+
+
+if __name__ == "__main__":
+    main()
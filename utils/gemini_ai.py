@@ -2,18 +2,174 @@
 Astrologia com Groq API (GRATUITO - 14.400 requests/dia!)
 Compatible com OpenAI SDK
 """
+import sqlite3
+import threading
+import time
 import streamlit as st
-from openai import OpenAI
-from datetime import datetime
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import combinations_with_replacement
+from utils.agendador_llm import PRIORIDADE_INTERATIVA, PRIORIDADE_RENOVACAO
+from utils.conteudo import obter_armazem
+from utils.lote_llm import CONCORRENCIA_PADRAO, caminho_checkpoint, executar_lote
+from utils.metricas import contar, medir, registrar_cache
+from utils.roteador_llm import obter_roteador
+from utils.voo_unico import VooUnico
 
-@st.cache_data(ttl=86400)  # Cache 24h
-def gerar_horoscopo(signo, data):
-    """Gera horóscopo diário"""
-    client = OpenAI(
-        api_key=st.secrets["GROQ_API_KEY"],
-        base_url="https://api.groq.com/openai/v1"
+# Textos vencidos há menos que isso continuam sendo servidos enquanto uma
+# única renovação roda em segundo plano (stale-while-revalidate)
+TOLERANCIA_VENCIDO = 7 * 86400
+
+# Uma geração em andamento por (tipo, chave), compartilhada por todas as sessões
+_voo = VooUnico()
+
+# (tipo, origem) -> quantidade; origem: 'armazem', 'vencido' ou 'gerado'
+_consultas = Counter()
+_lock_consultas = threading.Lock()
+
+def _contar_consulta(tipo, origem):
+    """Soma uma consulta em _consultas (páginas, API e lotes chamam de threads diferentes)"""
+    with _lock_consultas:
+        _consultas[tipo, origem] += 1
+
+def _completar(prompt, max_tokens, temperature, prioridade=PRIORIDADE_INTERATIVA):
+    """Chama o LLM (Groq llama 70B, com os demais provedores de reserva) e devolve o texto completo"""
+    return obter_roteador().completar(
+        {"messages": [{"role": "user", "content": prompt}], "max_tokens": max_tokens, "temperature": temperature},
+        prioridade
+    )
+
+def _completar_stream(prompt, max_tokens, temperature, prioridade=PRIORIDADE_INTERATIVA):
+    """Chama o LLM e devolve os pedaços de texto à medida que chegam"""
+    return obter_roteador().transmitir(
+        {"messages": [{"role": "user", "content": prompt}], "max_tokens": max_tokens, "temperature": temperature},
+        prioridade
     )
+
+class RespostaVazia(Exception):
+    """O LLM terminou sem devolver texto (não vai para o armazém)"""
+
+def _guardar(tipo, chave, texto, ttl):
+    """Grava no armazém; falha do SQLite não descarta o texto já gerado"""
+    try:
+        obter_armazem().guardar(tipo, chave, texto, ttl)
+    except sqlite3.Error:
+        contar("armazem_erros", operacao="guardar")
+
+def _gerar_e_guardar(tipo, chave, ttl, pedido, prioridade=PRIORIDADE_INTERATIVA):
+    _contar_consulta(tipo, 'gerado')
+    texto = _completar(**pedido, prioridade=prioridade)
+    if not texto or not texto.strip():
+        raise RespostaVazia("O modelo não devolveu texto")
+    _guardar(tipo, chave, texto, ttl)
+    return texto
+
+def _texto_armazenado(tipo, chave, ttl, pedido):
+    """
+    Texto do armazém: válido, ou vencido há pouco (dispara uma renovação
+    em segundo plano e devolve o texto antigo). None se não há o que servir
+    """
+    try:
+        with medir("cache", cache="conteudo"):
+            registro = obter_armazem().obter(tipo, chave)
+    except sqlite3.Error:
+        # Armazém indisponível: segue como se o texto não existisse e gera pelo LLM
+        contar("armazem_erros", operacao="obter")
+        registro = None
+    vencido_ha = time.time() - registro['expira_em'] if registro is not None else None
+    registrar_cache("conteudo", vencido_ha is not None and vencido_ha < TOLERANCIA_VENCIDO)
+    if registro is None:
+        return None
+    if vencido_ha < 0:
+        _contar_consulta(tipo, 'armazem')
+        return registro['texto']
+    if vencido_ha < TOLERANCIA_VENCIDO:
+        _contar_consulta(tipo, 'vencido')
+        _voo.em_segundo_plano(
+            (tipo, chave), lambda: _gerar_e_guardar(tipo, chave, ttl, pedido, PRIORIDADE_RENOVACAO)
+        )
+        return registro['texto']
+    return None
+
+def _obter_ou_gerar(tipo, chave, ttl, pedido):
+    """
+    Texto do armazém ou gerado pelo LLM. Pedidos simultâneos da mesma
+    chave compartilham uma única chamada
+    """
+    texto = _texto_armazenado(tipo, chave, ttl, pedido)
+    if texto is not None:
+        return texto
+    return _voo.executar((tipo, chave), lambda: _gerar_e_guardar(tipo, chave, ttl, pedido))
+
+def _transmitir_e_armazenar(tipo, chave, ttl, pedido):
+    """
+    Streaming com o armazém: se o texto já existe, entrega de uma vez;
+    senão transmite do LLM e grava o texto completo ao final. Se a mesma
+    chave já está sendo gerada, espera por ela em vez de chamar o LLM de novo
+    """
+    texto = _texto_armazenado(tipo, chave, ttl, pedido)
+    if texto is not None:
+        yield texto
+        return
     
+    chamada, lider = _voo.iniciar((tipo, chave))
+    if not lider:
+        yield chamada.aguardar()
+        return
+    
+    _contar_consulta(tipo, 'gerado')
+    partes = []
+    try:
+        for pedaco in _completar_stream(**pedido):
+            partes.append(pedaco)
+            yield pedaco
+        texto = "".join(partes)
+        # Um texto em branco no armazém seria servido a todos até vencer
+        if not texto.strip():
+            raise RespostaVazia("O modelo não devolveu texto")
+        _guardar(tipo, chave, texto, ttl)
+    except BaseException as e:
+        _voo.concluir((tipo, chave), chamada, erro=e)
+        raise
+    _voo.concluir((tipo, chave), chamada, texto)
+
+def estatisticas_conteudo():
+    """
+    De onde vieram os textos pedidos neste processo (abaixo do st.cache_data)
+    
+    Returns:
+        dict: tipo -> {'armazem', 'vencido', 'gerado', 'taxa_acerto'}
+    """
+    tipos = {}
+    with _lock_consultas:
+        consultas = dict(_consultas)
+    for (tipo, origem), quantidade in consultas.items():
+        tipos.setdefault(tipo, {'armazem': 0, 'vencido': 0, 'gerado': 0})[origem] = quantidade
+    for contagem in tipos.values():
+        total = sum(contagem.values())
+        contagem['taxa_acerto'] = (contagem['armazem'] + contagem['vencido']) / total if total else 0.0
+    return tipos
+
+def _tarefa(tipo, chave, ttl, pedido):
+    """Tarefa de utils.lote_llm que grava o texto no armazém em (tipo, chave)"""
+    return {"id": f"{tipo}|{chave}", "tipo": tipo, "chave": chave, "ttl": ttl, "pedido": pedido}
+
+# Textos de horóscopo ficam 30 dias no armazém (a chave já inclui a data)
+TTL_HOROSCOPO = 30 * 86400
+
+def chave_horoscopo(signo, data):
+    """Chave do horóscopo no armazém de conteúdo"""
+    return f"{signo}|{data.isoformat()}"
+
+def obter_horoscopo_armazenado(signo, data):
+    """Horóscopo pré-gerado (ou gerado antes) no armazém, ou None (também se o armazém falhar)"""
+    try:
+        return obter_armazem().obter_valido('horoscopo', chave_horoscopo(signo, data))
+    except sqlite3.Error:
+        contar("armazem_erros", operacao="obter")
+        return None
+
+def _pedido_horoscopo(signo, data):
     prompt = f"""Gere horóscopo para {signo} - {data.strftime('%d/%m/%Y')}
 
 **Estrutura obrigatória:**
@@ -23,23 +179,62 @@ def gerar_horoscopo(signo, data):
 
 Místico, acolhedor, positivo. Máximo 120 palavras."""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",  # Grátis e excelente
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=250,
-        temperature=0.8
+    return {"prompt": prompt, "max_tokens": 250, "temperature": 0.8}
+
+@st.cache_data(ttl=86400)  # Cache 24h
+def gerar_horoscopo(signo, data):
+    """Gera horóscopo diário (lê primeiro o armazém de textos pré-gerados)"""
+    return _obter_ou_gerar(
+        'horoscopo', chave_horoscopo(signo, data), TTL_HOROSCOPO, _pedido_horoscopo(signo, data)
     )
-    
-    return response.choices[0].message.content
 
-@st.cache_data(ttl=3600)
-def analisar_compatibilidade(signo1, signo2, tipo_relacao):
-    """Análise de compatibilidade"""
-    client = OpenAI(
-        api_key=st.secrets["GROQ_API_KEY"],
-        base_url="https://api.groq.com/openai/v1"
+def gerar_horoscopo_stream(signo, data):
+    """Versão em streaming de gerar_horoscopo (para st.write_stream)"""
+    return _transmitir_e_armazenar(
+        'horoscopo', chave_horoscopo(signo, data), TTL_HOROSCOPO, _pedido_horoscopo(signo, data)
     )
+
+def pregerar_horoscopos(data_inicial, dias=1, forcar=False, concorrencia=CONCORRENCIA_PADRAO):
+    """
+    Gera e armazena os horóscopos dos 12 signos para uma sequência de dias
+    
+    Args:
+        data_inicial (datetime.date): Primeiro dia
+        dias (int): Quantidade de dias a partir de data_inicial
+        forcar (bool): Regenera mesmo os que já estão no armazém
+        concorrencia (int): Requisições simultâneas
+    
+    Returns:
+        dict: Relatório de utils.lote_llm.executar_lote
+    """
+    from utils.astro_calc import SIGNOS
     
+    existentes = set() if forcar else obter_armazem().chaves_validas('horoscopo')
+    tarefas = []
+    for deslocamento in range(dias):
+        data = data_inicial + timedelta(days=deslocamento)
+        for signo in SIGNOS:
+            chave = chave_horoscopo(signo, data)
+            if chave not in existentes:
+                tarefas.append(_tarefa('horoscopo', chave, TTL_HOROSCOPO, _pedido_horoscopo(signo, data)))
+    checkpoint = caminho_checkpoint("horoscopos", f"{data_inicial.isoformat()}_{dias}")
+    return executar_lote(tarefas, checkpoint, concorrencia)
+
+# Tipos de relação oferecidos na página de Compatibilidade
+TIPOS_RELACAO = ["Romântico", "Amizade", "Profissional"]
+
+# Textos de compatibilidade não dependem da data: valem 30 dias e são
+# renovados pelo agendamento semanal de utils.pregerar
+TTL_COMPATIBILIDADE = 30 * 86400
+
+def chave_compatibilidade(signo1, signo2, tipo_relacao):
+    """Chave simétrica: Áries x Libra e Libra x Áries compartilham o texto"""
+    primeiro, segundo = sorted((signo1, signo2))
+    return f"{primeiro}|{segundo}|{tipo_relacao}"
+
+def _pedido_compatibilidade(signo1, signo2, tipo_relacao):
+    # Sempre na ordem canônica, a mesma do corpus
+    signo1, signo2 = sorted((signo1, signo2))
     prompt = f"""Compatibilidade astrológica: {signo1} x {signo2}
 Tipo: {tipo_relacao}
 
@@ -51,26 +246,68 @@ Tipo: {tipo_relacao}
 
 Positivo e construtivo. Máximo 150 palavras."""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=300,
-        temperature=0.7
-    )
-    
-    return response.choices[0].message.content
+    return {"prompt": prompt, "max_tokens": 300, "temperature": 0.7}
+
+def analisar_compatibilidade(signo1, signo2, tipo_relacao):
+    """Análise de compatibilidade (lê primeiro o corpus pré-gerado)"""
+    # Áries x Libra e Libra x Áries são o mesmo texto, também no st.cache_data
+    return _analisar_compatibilidade_canonica(*sorted((signo1, signo2)), tipo_relacao)
 
 @st.cache_data(ttl=3600)
-def interpretar_mapa_basico(posicoes_planetas):
-    """Interpretação básica mapa astral"""
-    client = OpenAI(
-        api_key=st.secrets["GROQ_API_KEY"],
-        base_url="https://api.groq.com/openai/v1"
+def _analisar_compatibilidade_canonica(signo1, signo2, tipo_relacao):
+    return _obter_ou_gerar(
+        'compatibilidade', chave_compatibilidade(signo1, signo2, tipo_relacao),
+        TTL_COMPATIBILIDADE, _pedido_compatibilidade(signo1, signo2, tipo_relacao)
+    )
+
+def analisar_compatibilidade_stream(signo1, signo2, tipo_relacao):
+    """Versão em streaming de analisar_compatibilidade (para st.write_stream)"""
+    return _transmitir_e_armazenar(
+        'compatibilidade', chave_compatibilidade(signo1, signo2, tipo_relacao),
+        TTL_COMPATIBILIDADE, _pedido_compatibilidade(signo1, signo2, tipo_relacao)
     )
+
+def pregerar_compatibilidades(max_idade_dias=None, forcar=False, concorrencia=CONCORRENCIA_PADRAO):
+    """
+    Gera e armazena o corpus de compatibilidade: todos os pares de signos
+    (sem repetir A x B e B x A) para cada tipo de relação
+    
+    Args:
+        max_idade_dias (float, opcional): Regenera também os textos gerados
+            há mais que isso (renovação agendada)
+        forcar (bool): Regenera o corpus inteiro
+        concorrencia (int): Requisições simultâneas
+    
+    Returns:
+        dict: Relatório de utils.lote_llm.executar_lote
+    """
+    from utils.astro_calc import SIGNOS
     
+    gerados_depois_de = None if max_idade_dias is None else time.time() - max_idade_dias * 86400
+    existentes = set() if forcar else obter_armazem().chaves_validas('compatibilidade', gerados_depois_de)
+    tarefas = []
+    for signo1, signo2 in combinations_with_replacement(sorted(SIGNOS), 2):
+        for tipo_relacao in TIPOS_RELACAO:
+            chave = chave_compatibilidade(signo1, signo2, tipo_relacao)
+            if chave not in existentes:
+                pedido = _pedido_compatibilidade(signo1, signo2, tipo_relacao)
+                tarefas.append(_tarefa('compatibilidade', chave, TTL_COMPATIBILIDADE, pedido))
+    return executar_lote(tarefas, caminho_checkpoint("compatibilidade", datetime.now().date()), concorrencia)
+
+# A interpretação só depende dos signos do Sol e da Lua: 144 textos possíveis
+TTL_INTERPRETACAO = 30 * 86400
+
+def chave_interpretacao(sol, lua):
+    """Chave da interpretação no armazém de conteúdo"""
+    return f"{sol}|{lua}"
+
+def _signos_sol_lua(posicoes_planetas):
+    """Entradas canônicas do prompt de interpretação (graus e demais planetas não entram)"""
     sol = posicoes_planetas.get('Sol', {}).get('signo', 'desconhecido')
     lua = posicoes_planetas.get('Lua', {}).get('signo', 'desconhecido')
-    
+    return sol, lua
+
+def _pedido_interpretacao(sol, lua):
     prompt = f"""Interpretação astrológica básica:
 
 **Sol em {sol}**: Essência/identidade
@@ -78,11 +315,47 @@ def interpretar_mapa_basico(posicoes_planetas):
 
 Acolhedor, 80 palavras máximo."""
 
-    response = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
-        messages=[{"role": "user", "content": prompt}],
-        max_tokens=150,
-        temperature=0.7
+    return {"prompt": prompt, "max_tokens": 150, "temperature": 0.7}
+
+def interpretar_mapa_basico(posicoes_planetas):
+    """Interpretação básica mapa astral"""
+    # O cache é pela combinação Sol/Lua, não pelo dicionário inteiro de
+    # posições: mapas de horários diferentes compartilham o mesmo texto
+    return _interpretar_sol_lua(*_signos_sol_lua(posicoes_planetas))
+
+@st.cache_data(ttl=3600)
+def _interpretar_sol_lua(sol, lua):
+    return _obter_ou_gerar(
+        'interpretacao', chave_interpretacao(sol, lua), TTL_INTERPRETACAO, _pedido_interpretacao(sol, lua)
+    )
+
+def interpretar_mapa_basico_stream(posicoes_planetas):
+    """Versão em streaming de interpretar_mapa_basico (para st.write_stream)"""
+    sol, lua = _signos_sol_lua(posicoes_planetas)
+    return _transmitir_e_armazenar(
+        'interpretacao', chave_interpretacao(sol, lua), TTL_INTERPRETACAO, _pedido_interpretacao(sol, lua)
     )
+
+def pregerar_interpretacoes(max_idade_dias=None, forcar=False, concorrencia=CONCORRENCIA_PADRAO):
+    """
+    Gera e armazena as 144 interpretações (Sol x Lua)
+    
+    Args:
+        max_idade_dias (float, opcional): Regenera também os textos gerados
+            há mais que isso (renovação agendada)
+        forcar (bool): Regenera todas
+        concorrencia (int): Requisições simultâneas
+    
+    Returns:
+        dict: Relatório de utils.lote_llm.executar_lote
+    """
+    from utils.astro_calc import SIGNOS
     
-    return response.choices[0].message.content
+    gerados_depois_de = None if max_idade_dias is None else time.time() - max_idade_dias * 86400
+    existentes = set() if forcar else obter_armazem().chaves_validas('interpretacao', gerados_depois_de)
+    tarefas = [
+        _tarefa('interpretacao', chave_interpretacao(sol, lua), TTL_INTERPRETACAO, _pedido_interpretacao(sol, lua))
+        for sol in SIGNOS for lua in SIGNOS
+        if chave_interpretacao(sol, lua) not in existentes
+    ]
+    return executar_lote(tarefas, caminho_checkpoint("interpretacoes", datetime.now().date()), concorrencia)
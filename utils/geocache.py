@@ -0,0 +1,113 @@
+"""
+Cache persistente de geocodificação em SQLite
+
+Sobrevive a reinícios e deploys e pode ser compartilhado entre réplicas
+que montam o mesmo volume. Guarda também as buscas sem resultado (cache
+negativo, com validade menor), para que um nome digitado errado não
+volte a consultar o Nominatim a cada tentativa.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from utils.gazetteer import normalizar
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "geocache.sqlite3"
+
+# Validade das entradas, em segundos
+TTL_POSITIVO = 180 * 86400
+TTL_NEGATIVO = 6 * 3600
+
+# Marca que distingue "cidade não existe" (em cache) de "não está no cache"
+NAO_ENCONTRADA = (None, None, None)
+
+
+def chave_geocodificacao(cidade, pais):
+    """
+    Chave normalizada: "Porto Alegre RS" e "porto alegre, rs" viram a mesma
+
+    Args:
+        cidade (str): Nome digitado
+        pais (str): País
+
+    Returns:
+        str: Chave do cache
+    """
+    return f"{normalizar(cidade)}|{normalizar(pais)}"
+
+
+class CacheGeocodificacao:
+    """
+    Resultados de geocodificação em SQLite, com validade separada para
+    acertos e para buscas sem resultado
+    """
+
+    def __init__(self, caminho=CAMINHO_PADRAO, ttl_positivo=TTL_POSITIVO, ttl_negativo=TTL_NEGATIVO):
+        self.caminho = Path(caminho)
+        self.ttl_positivo = ttl_positivo
+        self.ttl_negativo = ttl_negativo
+        self.caminho.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conexao = sqlite3.connect(self.caminho, check_same_thread=False, timeout=10)
+        # WAL permite leituras concorrentes de outros processos durante a escrita
+        self._conexao.execute("PRAGMA journal_mode=WAL")
+        self._conexao.execute(
+            """CREATE TABLE IF NOT EXISTS geocodificacao (
+                   chave TEXT PRIMARY KEY,
+                   latitude REAL,
+                   longitude REAL,
+                   endereco TEXT,
+                   expira_em REAL NOT NULL
+               )"""
+        )
+        self._conexao.commit()
+
+    def obter(self, cidade, pais):
+        """
+        Busca um resultado ainda válido
+
+        Args:
+            cidade (str): Nome digitado
+            pais (str): País
+
+        Returns:
+            tuple | None: (latitude, longitude, endereco), NAO_ENCONTRADA para
+            um resultado negativo em cache, ou None se não há entrada válida
+        """
+        with self._lock:
+            linha = self._conexao.execute(
+                "SELECT latitude, longitude, endereco FROM geocodificacao WHERE chave = ? AND expira_em > ?",
+                (chave_geocodificacao(cidade, pais), time.time())
+            ).fetchone()
+        return tuple(linha) if linha else None
+
+    def guardar(self, cidade, pais, latitude, longitude, endereco):
+        """Grava um resultado encontrado"""
+        self._gravar(cidade, pais, (latitude, longitude, endereco), self.ttl_positivo)
+
+    def guardar_negativo(self, cidade, pais):
+        """Grava que a cidade não foi encontrada"""
+        self._gravar(cidade, pais, NAO_ENCONTRADA, self.ttl_negativo)
+
+    def _gravar(self, cidade, pais, resultado, ttl):
+        with self._lock:
+            self._conexao.execute(
+                "INSERT OR REPLACE INTO geocodificacao VALUES (?, ?, ?, ?, ?)",
+                (chave_geocodificacao(cidade, pais), *resultado, time.time() + ttl)
+            )
+            self._conexao.commit()
+
+    def limpar_expirados(self):
+        """
+        Remove entradas vencidas
+
+        Returns:
+            int: Quantidade removida
+        """
+        with self._lock:
+            cursor = self._conexao.execute("DELETE FROM geocodificacao WHERE expira_em <= ?", (time.time(),))
+            self._conexao.commit()
+            return cursor.rowcount
@@ -1,45 +1,215 @@
 """
 Módulo para conversão de cidades em coordenadas (geocoding)
 """
-from geopy.geocoders import Nominatim
-from geopy.exc import GeocoderTimedOut, GeocoderServiceError
-import streamlit as st
+from functools import lru_cache
+from utils import gazetteer
+from utils.geocache import CacheGeocodificacao
+from utils.limites import BaldeTokens
+from utils.metricas import medir, registrar_cache
+
+# Política de uso do Nominatim público: no máximo 1 requisição por segundo.
+# Rajadas entram na fila do balde em vez de falhar.
+LIMITADOR_NOMINATIM_PUBLICO = BaldeTokens(taxa=1.0, capacidade=1)
+limitador_nominatim = LIMITADOR_NOMINATIM_PUBLICO
+ESPERA_MAXIMA_NOMINATIM = 30
+
+# Geocodificador e cache no lugar dos padrões (ver configurar_geocodificacao)
+_substitutos = {'geolocator': None, 'cache': None}
+
+
+class ErroGeocodificacao(Exception):
+    """Falha transitória da busca (fila do Nominatim cheia, erro de rede ou do serviço)"""
+
+
+@lru_cache(maxsize=1)
+def obter_cache_geocodificacao():
+    """Cache persistente (SQLite) compartilhado pelo processo"""
+    return CacheGeocodificacao()
+
+
+@lru_cache(maxsize=1)
+def _nominatim_publico():
+    # geopy só é importado na primeira busca que passa do gazetteer e do cache
+    from geopy.geocoders import Nominatim
+
+    # user_agent é obrigatório
+    return Nominatim(user_agent="astro-vision-app", timeout=10)
+
+
+def configurar_geocodificacao(geolocator=None, cache=None, limitador=None):
+    """
+    Troca o que buscar_coordenadas usa depois do gazetteer (ex.: um Nominatim
+    próprio, que não tem o limite de 1 requisição/s do público); chamada sem
+    argumentos, volta aos padrões
+    
+    Args:
+        geolocator (geopy.geocoders.Geocoder, opcional): Geocodificador
+        cache (CacheGeocodificacao, opcional): Cache persistente
+        limitador (BaldeTokens, opcional): Limite de requisições ao geocodificador
+    """
+    global limitador_nominatim
+    _substitutos['geolocator'] = geolocator
+    _substitutos['cache'] = cache
+    limitador_nominatim = limitador or LIMITADOR_NOMINATIM_PUBLICO
+
 
-# Cache para evitar múltiplas requisições
-@st.cache_data(ttl=86400)  # Cache de 24h
 def buscar_coordenadas(cidade, pais="Brasil"):
     """
     Busca latitude e longitude de uma cidade
     
+    Ordem de consulta: gazetteer offline, cache persistente em disco
+    (inclusive de cidades não encontradas) e, por último, o Nominatim,
+    respeitando o limite de 1 requisição/s. Um nome com vários homônimos
+    no gazetteer e sem UF não é resolvido (nem enviado ao Nominatim, que
+    escolheria um deles): ver sugerir_correcoes.
+    
     Args:
         cidade (str): Nome da cidade
         pais (str): País (padrão: Brasil)
     
     Returns:
         tuple: (latitude, longitude, nome_completo) ou (None, None, None) se não encontrar
+    
+    Raises:
+        ErroGeocodificacao: Se não deu para consultar o Nominatim agora; quem
+            chama decide como mostrar a mensagem
     """
-    try:
-        # Criar geolocator (user_agent é obrigatório)
-        geolocator = Nominatim(user_agent="astro-vision-app", timeout=10)
+    with medir("geocodificacao") as rotulos:
+        encontrada = buscar_no_gazetteer(cidade, pais)
+        registrar_cache("gazetteer", encontrada is not None)
+        if encontrada:
+            rotulos['origem'] = "gazetteer"
+            return encontrada
+        if cidade_ambigua(cidade, pais):
+            rotulos['origem'] = "ambigua"
+            return None, None, None
         
-        # Buscar localização
-        location = geolocator.geocode(f"{cidade}, {pais}")
+        cache = _substitutos['cache'] or obter_cache_geocodificacao()
+        with medir("cache", cache="geocache"):
+            em_cache = cache.obter(cidade, pais)
+        registrar_cache("geocache", em_cache is not None)
+        if em_cache is not None:
+            rotulos['origem'] = "cache"
+            return em_cache
         
-        if location:
-            return (
-                round(location.latitude, 4),
-                round(location.longitude, 4),
-                location.address
-            )
-        else:
-            return None, None, None
+        rotulos['origem'] = "nominatim"
+        from geopy.exc import GeocoderTimedOut, GeocoderServiceError
+        
+        if not limitador_nominatim.adquirir(timeout=ESPERA_MAXIMA_NOMINATIM):
+            raise ErroGeocodificacao("Muitas buscas de localização no momento. Tente novamente em instantes.")
+        
+        try:
+            # Buscar localização
+            with medir("nominatim"):
+                location = (_substitutos['geolocator'] or _nominatim_publico()).geocode(f"{cidade}, {pais}")
+            
+            if location:
+                resultado = (
+                    round(location.latitude, 4),
+                    round(location.longitude, 4),
+                    location.address
+                )
+                cache.guardar(cidade, pais, *resultado)
+                return resultado
+            else:
+                cache.guardar_negativo(cidade, pais)
+                return None, None, None
+        
+        # Erros de rede/serviço são transitórios: não vão para o cache
+        except (GeocoderTimedOut, GeocoderServiceError) as e:
+            raise ErroGeocodificacao(f"Erro ao buscar localização: {str(e)}") from e
+        except Exception as e:
+            raise ErroGeocodificacao(f"Erro inesperado: {str(e)}") from e
+
+
+@lru_cache(maxsize=1)
+def obter_gazetteer():
+    """
+    Gazetteer do processo: o arquivo gerado por utils.gazetteer ou, se ele
+    ainda não existir, um índice com as cidades de sugerir_cidades_brasil
+    """
+    indice = gazetteer.carregar_gazetteer()
+    if indice is None:
+        cidades = []
+        for nome_uf, (latitude, longitude) in sugerir_cidades_brasil().items():
+            nome, uf = nome_uf.split(", ")
+            cidades.append((nome, uf, "BR", latitude, longitude, 0))
+        indice = gazetteer.Gazetteer(cidades)
+    return indice
+
+
+def gazetteer_completo():
+    """
+    Indica se o arquivo de utils.gazetteer foi gerado; sem ele, o índice
+    offline só tem as cidades de sugerir_cidades_brasil e o resto vai ao Nominatim
+    """
+    return gazetteer.carregar_gazetteer() is not None
+
+
+def buscar_no_gazetteer(cidade, pais="Brasil"):
+    """
+    Resolve a cidade só com o gazetteer offline, sem acesso à rede
+    
+    Args:
+        cidade (str): Nome da cidade, com ou sem UF ("Porto Alegre, RS")
+        pais (str): País (padrão: Brasil)
+    
+    Returns:
+        tuple | None: (latitude, longitude, nome_completo) ou None se não encontrar
+    """
+    codigo = gazetteer.codigo_pais(pais)
+    if codigo is None:
+        return None
+    
+    encontrada = obter_gazetteer().buscar(cidade, codigo)
+    if encontrada is None:
+        return None
+    return encontrada[3], encontrada[4], gazetteer.nome_completo(encontrada)
+
+
+def cidade_ambigua(cidade, pais="Brasil"):
+    """Indica se o nome tem mais de um homônimo no gazetteer e nenhum se destaca (falta a UF)"""
+    codigo = gazetteer.codigo_pais(pais)
+    if codigo is None:
+        return False
+    indice = obter_gazetteer()
+    return indice.buscar(cidade, codigo) is None and len(indice.homonimos(cidade, codigo)) > 1
+
+
+def sugerir_correcoes(cidade, pais="Brasil", limite=5):
+    """
+    Cidades a oferecer quando a busca não resolve o nome digitado
+    
+    Args:
+        cidade (str): Nome digitado
+        pais (str): País (padrão: Brasil)
+        limite (int): Quantidade máxima de sugestões
     
-    except (GeocoderTimedOut, GeocoderServiceError) as e:
-        st.warning(f"⚠️ Erro ao buscar localização: {str(e)}")
-        return None, None, None
-    except Exception as e:
-        st.error(f"Erro inesperado: {str(e)}")
-        return None, None, None
+    Returns:
+        list: Nomes no formato "Cidade, UF": os homônimos, se o nome é
+        ambíguo, ou os mais parecidos, se tem erro de digitação
+    """
+    codigo = gazetteer.codigo_pais(pais)
+    if codigo is None:
+        return []
+    cidades = obter_gazetteer().sugestoes(cidade, codigo, limite)
+    return [f"{nome}, {uf}" if uf else nome for nome, uf, *_ in cidades]
+
+
+def autocompletar_cidades(prefixo, pais="Brasil", limite=10):
+    """
+    Sugere cidades que começam com o texto digitado (sem diferenciar acentos)
+    
+    Args:
+        prefixo (str): Início do nome da cidade
+        pais (str): País (padrão: Brasil)
+        limite (int): Quantidade máxima de sugestões
+    
+    Returns:
+        list: Nomes no formato "Cidade, UF"
+    """
+    cidades = obter_gazetteer().por_prefixo(prefixo, gazetteer.codigo_pais(pais), limite)
+    return [f"{nome}, {uf}" if uf else nome for nome, uf, *_ in cidades]
 
 
 def sugerir_cidades_brasil():
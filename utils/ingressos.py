@@ -0,0 +1,351 @@
+"""
+Índice de ingressos planetários nos signos
+
+Para cada planeta de PLANETAS guarda os instantes exatos (precisão de
+1 segundo) em que ele entra em cada signo entre 1900 e 2100, incluindo as
+reentradas causadas por retrogradação. Com isso, "em que signo está o
+planeta X no instante T" vira uma busca binária, sem calcular a posição, e
+nascimentos na cúspide podem ser detectados comparando T com o ingresso
+mais próximo.
+
+Uso:
+    python -m utils.ingressos gerar [--inicio 1900 --fim 2100]
+    python -m utils.ingressos verificar [--amostras 20000]
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import swisseph as swe
+
+from utils.astro_calc import PLANETAS, SIGNOS, _julian_day
+
+DIRETORIO_DADOS = Path(__file__).resolve().parent.parent / "data"
+CAMINHO_PADRAO = DIRETORIO_DADOS / "ingressos.npz"
+
+# Passo da varredura inicial (dias). Tem que ser menor que o tempo mínimo
+# que um planeta leva para sair e voltar a um signo; a Lua precisa de mais resolução.
+PASSO_VARREDURA = {'Lua': 0.25}
+PASSO_VARREDURA_PADRAO = 1.0
+
+# Precisão do refinamento: 1 segundo, em dias
+PRECISAO = 1.0 / 86400
+
+# Distância máxima a um ingresso do Sol para considerar o nascimento na cúspide
+JANELA_CUSPIDE_HORAS = 48
+
+
+class IndiceIngressos:
+    """
+    Busca binária sobre os ingressos de cada planeta
+
+    Attributes:
+        instantes (list[np.ndarray]): Por planeta, Julian Days (UT) ordenados;
+            o primeiro e o último marcam os limites do intervalo coberto
+        signos (list[np.ndarray]): Por planeta, índice em SIGNOS do signo em
+            que o planeta entra em cada instante
+    """
+
+    def __init__(self, instantes, signos):
+        self.instantes = instantes
+        self.signos = signos
+        self.jd_inicial = max(float(jds[0]) for jds in instantes)
+        self.jd_final = min(float(jds[-1]) for jds in instantes)
+
+    def _coluna(self, planeta):
+        return list(PLANETAS).index(planeta)
+
+    def signo(self, planeta, jds):
+        """
+        Signo de um planeta em cada instante
+
+        Args:
+            planeta (str): Nome do planeta, como em PLANETAS
+            jds (float | np.ndarray): Julian Days (UT)
+
+        Returns:
+            np.ndarray: Índices em SIGNOS (int8)
+        """
+        coluna = self._coluna(planeta)
+        jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+        posicao = np.searchsorted(self.instantes[coluna], jds, side="right") - 1
+        if (posicao < 0).any() or (jds > self.jd_final).any():
+            raise ValueError("Julian Day fora do intervalo do índice de ingressos")
+        return self.signos[coluna][posicao]
+
+    def signos_lote(self, jds):
+        """
+        Signo de todos os planetas em cada instante (caminho rápido para jobs
+        que não precisam dos graus)
+
+        Args:
+            jds (np.ndarray): Julian Days (UT)
+
+        Returns:
+            np.ndarray: Matriz (n, n_planetas) de índices em SIGNOS (int8),
+            na mesma ordem de colunas de calcular_mapas_lote
+        """
+        return np.column_stack([self.signo(planeta, jds) for planeta in PLANETAS])
+
+    def ingresso_mais_proximo(self, planeta, jds):
+        """
+        Ingresso do planeta mais próximo de cada instante
+
+        Args:
+            planeta (str): Nome do planeta
+            jds (float | np.ndarray): Julian Days (UT)
+
+        Returns:
+            tuple: (instantes do ingresso, signo anterior, signo seguinte), arrays
+        """
+        coluna = self._coluna(planeta)
+        # O primeiro e o último elementos marcam os limites do intervalo, não são ingressos
+        instantes = self.instantes[coluna][1:-1]
+        signos = self.signos[coluna]
+        jds = np.atleast_1d(np.asarray(jds, dtype=np.float64))
+
+        direita = np.clip(np.searchsorted(instantes, jds), 1, len(instantes) - 1)
+        esquerda = direita - 1
+        usar_direita = np.abs(instantes[direita] - jds) < np.abs(jds - instantes[esquerda])
+        mais_proximo = np.where(usar_direita, direita, esquerda)
+
+        return instantes[mais_proximo], signos[mais_proximo], signos[mais_proximo + 1]
+
+    def ingressos_entre(self, planeta, jd_inicial, jd_final):
+        """
+        Ingressos do planeta no período
+
+        Args:
+            planeta (str): Nome do planeta
+            jd_inicial, jd_final (float): Período (UT), dentro do intervalo do índice
+
+        Returns:
+            tuple: (instantes, signo anterior, signo seguinte), arrays em ordem cronológica
+        """
+        coluna = self._coluna(planeta)
+        instantes = self.instantes[coluna]
+        signos = self.signos[coluna]
+        # Sem o primeiro e o último elementos, que só marcam os limites do intervalo
+        inicio = max(1, int(np.searchsorted(instantes, jd_inicial, side="left")))
+        fim = min(len(instantes) - 1, int(np.searchsorted(instantes, jd_final, side="left")))
+        return instantes[inicio:fim], signos[inicio - 1:fim - 1], signos[inicio:fim]
+
+    def em_cuspide(self, jds, planeta='Sol', janela_horas=JANELA_CUSPIDE_HORAS):
+        """
+        Indica nascimentos a menos de janela_horas de um ingresso do planeta
+
+        Args:
+            jds (float | np.ndarray): Julian Days (UT) de nascimento
+            planeta (str): Planeta considerado (padrão: Sol)
+            janela_horas (float): Distância máxima até o ingresso
+
+        Returns:
+            np.ndarray: Máscara booleana
+        """
+        instantes, _, _ = self.ingresso_mais_proximo(planeta, jds)
+        return np.abs(instantes - np.atleast_1d(jds)) * 24 <= janela_horas
+
+
+def _longitude(jd, id_planeta):
+    return swe.calc_ut(jd, id_planeta, swe.FLG_SWIEPH)[0][0]
+
+
+def _refinar_ingresso(id_planeta, inicio, fim, cuspide):
+    """
+    Bissecção do instante em que o planeta cruza a longitude da cúspide
+
+    Args:
+        id_planeta (int): Identificador do Swiss Ephemeris
+        inicio (float): Julian Day antes do cruzamento
+        fim (float): Julian Day depois do cruzamento
+        cuspide (float): Longitude da cúspide (múltiplo de 30)
+
+    Returns:
+        float: Julian Day do ingresso
+    """
+    def distancia(jd):
+        return np.mod(_longitude(jd, id_planeta) - cuspide + 180.0, 360.0) - 180.0
+
+    sinal_inicio = distancia(inicio) < 0
+    while fim - inicio > PRECISAO:
+        meio = (inicio + fim) / 2
+        if (distancia(meio) < 0) == sinal_inicio:
+            inicio = meio
+        else:
+            fim = meio
+    return (inicio + fim) / 2
+
+
+def gerar_indice(caminho=CAMINHO_PADRAO, ano_inicial=1900, ano_final=2100):
+    """
+    Varre o intervalo com o Swiss Ephemeris e grava os ingressos em disco
+
+    Args:
+        caminho (Path | str): Arquivo .npz de saída
+        ano_inicial (int): Primeiro ano coberto (a partir de 1º de janeiro)
+        ano_final (int): Último ano coberto (até 31 de dezembro)
+
+    Returns:
+        Path: Caminho do arquivo gerado
+    """
+    caminho = Path(caminho)
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+
+    jd_inicial = swe.julday(ano_inicial, 1, 1, 0.0)
+    jd_final = swe.julday(ano_final + 1, 1, 1, 0.0)
+
+    arrays = {}
+    for coluna, (nome_planeta, id_planeta) in enumerate(PLANETAS.items()):
+        passo = PASSO_VARREDURA.get(nome_planeta, PASSO_VARREDURA_PADRAO)
+        jds = jd_inicial + np.arange(int(np.ceil((jd_final - jd_inicial) / passo)) + 1) * passo
+        signos = np.array([int(_longitude(jd, id_planeta) // 30) for jd in jds.tolist()], dtype=np.int8)
+
+        instantes = [jd_inicial]
+        signos_ingresso = [signos[0]]
+        for i in np.flatnonzero(signos[1:] != signos[:-1]).tolist():
+            anterior, seguinte = int(signos[i]), int(signos[i + 1])
+            # Em movimento direto a cúspide é o início do novo signo; retrógrado, o do signo anterior
+            direto = (seguinte - anterior) % 12 == 1
+            cuspide = 30.0 * (seguinte if direto else anterior)
+            instantes.append(_refinar_ingresso(id_planeta, jds[i], jds[i + 1], cuspide))
+            signos_ingresso.append(seguinte)
+        # Último elemento marca o fim do intervalo coberto
+        instantes.append(jd_final)
+        signos_ingresso.append(signos_ingresso[-1])
+
+        arrays[f"instantes_{coluna}"] = np.array(instantes)
+        arrays[f"signos_{coluna}"] = np.array(signos_ingresso, dtype=np.int8)
+
+    np.savez(caminho, planetas=np.array(list(PLANETAS)), **arrays)
+    return caminho
+
+
+def abrir_indice(caminho=CAMINHO_PADRAO):
+    """
+    Carrega o índice gravado por gerar_indice
+
+    Args:
+        caminho (Path | str): Arquivo .npz
+
+    Returns:
+        IndiceIngressos: Índice pronto para consulta
+    """
+    with np.load(caminho) as arquivo:
+        if arquivo["planetas"].tolist() != list(PLANETAS):
+            raise ValueError("Índice de ingressos gerado para outra lista de planetas")
+        instantes = [arquivo[f"instantes_{coluna}"] for coluna in range(len(PLANETAS))]
+        signos = [arquivo[f"signos_{coluna}"] for coluna in range(len(PLANETAS))]
+    return IndiceIngressos(instantes, signos)
+
+
+_indices = {}
+
+
+def carregar_indice(caminho=CAMINHO_PADRAO):
+    """
+    Retorna o índice compartilhado do processo, ou None se não foi gerado
+
+    Como em carregar_tabela, a ausência não fica guardada.
+
+    Args:
+        caminho (Path | str): Arquivo .npz
+
+    Returns:
+        IndiceIngressos | None: Índice carregado
+    """
+    caminho = Path(caminho)
+    indice = _indices.get(caminho)
+    if indice is None and caminho.exists():
+        indice = _indices[caminho] = abrir_indice(caminho)
+    return indice
+
+
+def sol_na_cuspide(data_nasc, hora_nasc, janela_horas=JANELA_CUSPIDE_HORAS):
+    """
+    Ingresso do Sol próximo do nascimento (nascidos na cúspide entre dois signos)
+
+    Args:
+        data_nasc (datetime.date): Data de nascimento
+        hora_nasc (datetime.time): Hora de nascimento (UT, como em calcular_mapa)
+        janela_horas (float): Distância máxima até o ingresso
+
+    Returns:
+        dict | None: 'signo_anterior', 'signo_seguinte' e 'horas' (do ingresso
+        ao nascimento; negativo se o nascimento veio antes), ou None se não há
+        ingresso na janela ou o índice não foi gerado ou não cobre a data
+    """
+    indice = carregar_indice()
+    jd = _julian_day(data_nasc, hora_nasc)
+    if indice is None or not indice.jd_inicial <= jd <= indice.jd_final:
+        return None
+
+    instantes, anteriores, seguintes = indice.ingresso_mais_proximo('Sol', jd)
+    horas = (jd - float(instantes[0])) * 24
+    if abs(horas) > janela_horas:
+        return None
+    return {
+        'signo_anterior': SIGNOS[int(anteriores[0])],
+        'signo_seguinte': SIGNOS[int(seguintes[0])],
+        'horas': horas,
+    }
+
+
+def descrever_cuspide(cuspide):
+    """Frase curta com a distância do nascimento ao ingresso do Sol (ver sol_na_cuspide)"""
+    horas = round(abs(cuspide['horas']))
+    quando = "depois" if cuspide['horas'] < 0 else "antes"
+    return f"o Sol entrou em {cuspide['signo_seguinte']} cerca de {horas} h {quando} do nascimento"
+
+
+def verificar_indice(indice, amostras=20000, semente=0):
+    """
+    Confere os signos do índice contra swe.calc_ut em instantes aleatórios
+
+    Args:
+        indice (IndiceIngressos): Índice a verificar
+        amostras (int): Quantidade de instantes sorteados
+        semente (int): Semente do gerador aleatório
+
+    Returns:
+        dict: Quantidade de divergências por planeta
+    """
+    gerador = np.random.default_rng(semente)
+    jds = gerador.uniform(indice.jd_inicial, indice.jd_final, amostras)
+    signos = indice.signos_lote(jds)
+
+    divergencias = {}
+    for coluna, (nome_planeta, id_planeta) in enumerate(PLANETAS.items()):
+        referencia = np.array([int(_longitude(jd, id_planeta) // 30) for jd in jds.tolist()])
+        divergencias[nome_planeta] = int((signos[:, coluna] != referencia).sum())
+    return divergencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice de ingressos planetários")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    gerar = subcomandos.add_parser("gerar", help="Calcula e grava o índice")
+    gerar.add_argument("--saida", default=str(CAMINHO_PADRAO))
+    gerar.add_argument("--inicio", type=int, default=1900)
+    gerar.add_argument("--fim", type=int, default=2100)
+
+    verificar = subcomandos.add_parser("verificar", help="Confere os signos contra swe.calc_ut")
+    verificar.add_argument("--indice", default=str(CAMINHO_PADRAO))
+    verificar.add_argument("--amostras", type=int, default=20000)
+
+    args = parser.parse_args()
+
+    if args.comando == "gerar":
+        caminho = gerar_indice(args.saida, args.inicio, args.fim)
+        print(f"✅ Índice gravado em {caminho}")
+    else:
+        indice = abrir_indice(args.indice)
+        divergencias = verificar_indice(indice, args.amostras)
+        for nome_planeta, total in divergencias.items():
+            print(f"{nome_planeta:10s} divergências: {total}")
+        total = sum(divergencias.values())
+        print(f"{'✅' if total == 0 else '❌'} {total} divergências em {args.amostras} instantes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+"""
+Serviços em segundo plano do processo do Streamlit
+
+Home.py chama iniciar_servicos() a cada execução, mas o st.cache_resource
+só deixa o corpo rodar na primeira de cada processo. A API, as métricas e o
+monitor de saúde também só são importados nessa primeira vez, então os
+reruns não pagam nada por eles.
+"""
+import streamlit as st
+
+
+@st.cache_resource(show_spinner=False)
+def iniciar_servicos():
+    """
+    Sobe, uma vez por processo, a API HTTP (se API_PORTA e API_CHAVES estiverem
+    configuradas) ou, sem ela, o endpoint /metrics próprio (se METRICAS_PORTA
+    estiver configurada), e o monitor de saúde dos provedores LLM
+
+    Returns:
+        dict: 'api' e 'metricas' (porta em uso ou None) e 'monitor' (MonitorSaude)
+    """
+    from utils.api import iniciar_servidor as iniciar_api
+    from utils.metricas import iniciar_servidor as iniciar_metricas
+    from utils.saude_llm import obter_monitor
+
+    porta_api = iniciar_api()
+    # A API já serve /metrics
+    porta_metricas = iniciar_metricas() if porta_api is None else None
+    # O catálogo e a saúde ficam prontos antes de as páginas de teste abrirem;
+    # a geração de teste, que gasta cota, só vem depois (ver MonitorSaude.iniciar)
+    return {'api': porta_api, 'metricas': porta_metricas, 'monitor': obter_monitor()}
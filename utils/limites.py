@@ -0,0 +1,110 @@
+"""
+Controle de taxa (token bucket) para APIs externas com limite de requisições
+"""
+import threading
+import time
+from collections import deque
+
+
+class BaldeTokens:
+    """
+    Token bucket: libera no máximo `taxa` requisições por segundo, com
+    rajadas de até `capacidade`
+
+    Quem chega sem token disponível espera na fila (em vez de falhar).
+    A fila é de senhas: só o primeiro da fila pode consumir, então a ordem
+    de chegada é respeitada mesmo com várias threads esperando (um Lock
+    sozinho não garante isso). Seguro para uso entre threads.
+    """
+
+    def __init__(self, taxa, capacidade=1):
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade)
+        self._tokens = float(capacidade)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+        self._vez = threading.Condition(self._lock)
+        # Senhas de quem está esperando em adquirir, na ordem de chegada
+        self._fila = deque()
+
+    def _reabastecer(self):
+        agora = time.monotonic()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def tentar(self, tokens=1):
+        """
+        Consome tokens só se estiverem disponíveis agora e ninguém estiver
+        esperando na fila (não passa na frente de adquirir)
+
+        Returns:
+            bool: True se consumiu
+        """
+        with self._lock:
+            if self._fila:
+                return False
+            self._reabastecer()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def adquirir(self, tokens=1, timeout=None):
+        """
+        Espera até haver tokens e os consome
+
+        Args:
+            tokens (float): Quantidade a consumir
+            timeout (float, opcional): Espera máxima em segundos
+
+        Returns:
+            bool: True se conseguiu, False se estourou o timeout
+        """
+        limite = None if timeout is None else time.monotonic() + timeout
+        senha = object()
+        with self._vez:
+            self._fila.append(senha)
+            try:
+                while True:
+                    espera = None
+                    if self._fila[0] is senha:
+                        self._reabastecer()
+                        if self._tokens >= tokens:
+                            self._tokens -= tokens
+                            return True
+                        espera = (tokens - self._tokens) / self.taxa
+                    if limite is not None:
+                        restante = limite - time.monotonic()
+                        if restante <= 0:
+                            return False
+                        espera = restante if espera is None else min(espera, restante)
+                    # Libera o lock enquanto espera: tentar, disponiveis e limitar seguem funcionando
+                    self._vez.wait(espera)
+            finally:
+                # Quem sai (com ou sem token) passa a vez para o próximo
+                self._fila.remove(senha)
+                self._vez.notify_all()
+
+    def disponiveis(self):
+        """Tokens disponíveis neste instante"""
+        with self._lock:
+            self._reabastecer()
+            return self._tokens
+
+    def limitar(self, maximo):
+        """
+        Reduz os tokens disponíveis para no máximo `maximo`
+
+        Útil para sincronizar com o saldo informado pelo próprio serviço,
+        que também conta requisições feitas por outros processos.
+        """
+        with self._lock:
+            self._reabastecer()
+            self._tokens = max(0.0, min(self._tokens, float(maximo)))
+
+    def devolver(self, tokens=1):
+        """Devolve tokens consumidos por uma requisição que acabou não sendo feita"""
+        with self._vez:
+            self._reabastecer()
+            self._tokens = min(self.capacidade, self._tokens + tokens)
+            self._vez.notify_all()
@@ -0,0 +1,180 @@
+"""
+Geração em lote de textos do LLM (asyncio)
+
+Executa uma lista de tarefas com concorrência limitada, respeitando a
+cota do provedor pelo mesmo agendador das páginas. Cada tarefa concluída
+vai para o armazém de conteúdo e é anotada num checkpoint JSONL; se o
+processo cair, a próxima execução com o mesmo checkpoint pula o que já
+foi feito. Ao final devolve vazão e latências.
+
+Uma tarefa é um dict com:
+    id: identificador único no lote
+    tipo, chave, ttl: onde o texto é gravado no armazém
+    pedido: prompt, max_tokens e temperature
+"""
+import asyncio
+import json
+import time
+from pathlib import Path
+
+from utils.agendador_llm import PRIORIDADE_PREGERACAO, obter_agendador
+from utils.clientes_llm import criar_cliente_async
+from utils.conteudo import DIRETORIO_DADOS, obter_armazem
+from utils.metricas import observar, registrar_uso
+from utils.roteador_llm import DESTINOS_PADRAO
+
+CONCORRENCIA_PADRAO = 8
+
+
+def caminho_checkpoint(nome, periodo):
+    """
+    Arquivo de checkpoint de um lote (em data/)
+
+    Args:
+        nome (str): Tipo do lote (ex: "compatibilidade")
+        periodo (datetime.date | str): Dia ou período do lote; um lote de
+            outro período não reaproveita o progresso deste
+
+    Returns:
+        Path: Arquivo JSONL
+    """
+    if hasattr(periodo, "isoformat"):
+        periodo = periodo.isoformat()
+    return DIRETORIO_DADOS / f"lote_{nome}_{periodo}.jsonl"
+
+
+def ler_checkpoint(caminho):
+    """
+    IDs já concluídos num checkpoint
+
+    Returns:
+        set[str]: IDs das tarefas concluídas com sucesso
+    """
+    caminho = Path(caminho)
+    if not caminho.exists():
+        return set()
+    concluidas = set()
+    with open(caminho, encoding="utf-8") as arquivo:
+        for linha in arquivo:
+            try:
+                registro = json.loads(linha)
+            except ValueError:
+                # Última linha cortada pela queda do processo
+                continue
+            if registro.get("ok"):
+                concluidas.add(registro["id"])
+    return concluidas
+
+
+def _percentil(valores, p):
+    if not valores:
+        return None
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+async def _executar_tarefa(tarefa, cliente, destino, modelo, agendador, prioridade, semaforo, armazem, registrar):
+    async with semaforo:
+        pedido = tarefa["pedido"]
+        inicio = None
+
+        async def _chamar():
+            nonlocal inicio
+            inicio = time.monotonic()
+            return await cliente.chat.completions.create(
+                model=modelo,
+                messages=[{"role": "user", "content": pedido["prompt"]}],
+                max_tokens=pedido["max_tokens"],
+                temperature=pedido["temperature"],
+            )
+
+        # Qualquer falha (inclusive resposta vazia ou erro ao gravar) fica no
+        # checkpoint como não concluída, para a próxima execução refazer
+        try:
+            resposta = await agendador.executar_async(_chamar, prioridade)
+            latencia = time.monotonic() - inicio
+            registrar_uso(getattr(resposta, "usage", None), destino=destino)
+            texto = resposta.choices[0].message.content if resposta.choices else None
+            if not texto:
+                raise ValueError("Resposta do LLM sem texto")
+            armazem.guardar(tarefa["tipo"], tarefa["chave"], texto, tarefa["ttl"])
+        except Exception as e:
+            registrar({"id": tarefa["id"], "ok": False, "erro": str(e) or type(e).__name__})
+            return None
+        observar("llm", latencia, destino=destino, modo="lote")
+        registrar({"id": tarefa["id"], "ok": True, "latencia": round(latencia, 3)})
+        return latencia
+
+
+async def executar_lote_async(tarefas, checkpoint=None, concorrencia=CONCORRENCIA_PADRAO,
+                              destino="groq-70b", prioridade=PRIORIDADE_PREGERACAO):
+    """Versão assíncrona de executar_lote"""
+    provedor, modelo = DESTINOS_PADRAO[destino]
+    agendador = obter_agendador(provedor)
+    armazem = obter_armazem()
+
+    ja_feitas = ler_checkpoint(checkpoint) if checkpoint else set()
+    pendentes = [tarefa for tarefa in tarefas if tarefa["id"] not in ja_feitas]
+
+    arquivo = None
+    if checkpoint:
+        Path(checkpoint).parent.mkdir(parents=True, exist_ok=True)
+        arquivo = open(checkpoint, "a", encoding="utf-8")
+
+    def registrar(registro):
+        if arquivo is not None:
+            arquivo.write(json.dumps(registro, ensure_ascii=False) + "\n")
+            arquivo.flush()
+
+    cliente = criar_cliente_async(provedor)
+    semaforo = asyncio.Semaphore(concorrencia)
+    inicio = time.monotonic()
+    try:
+        # Um erro inesperado numa tarefa não cancela as outras: conta como falha
+        latencias = await asyncio.gather(*(
+            _executar_tarefa(tarefa, cliente, destino, modelo, agendador, prioridade, semaforo, armazem, registrar)
+            for tarefa in pendentes
+        ), return_exceptions=True)
+    finally:
+        await cliente.close()
+        if arquivo is not None:
+            arquivo.close()
+    duracao = time.monotonic() - inicio
+
+    concluidas = [latencia for latencia in latencias if isinstance(latencia, float)]
+    falhas = len(pendentes) - len(concluidas)
+    if checkpoint and falhas == 0:
+        # Lote completo: o próximo (ex.: renovação da semana seguinte) começa do zero
+        Path(checkpoint).unlink(missing_ok=True)
+
+    return {
+        "total": len(tarefas),
+        "puladas": len(tarefas) - len(pendentes),
+        "concluidas": len(concluidas),
+        "falhas": falhas,
+        "duracao": duracao,
+        "vazao_por_minuto": 60 * len(concluidas) / duracao if duracao > 0 else 0.0,
+        "latencia_p50": _percentil(concluidas, 50),
+        "latencia_p95": _percentil(concluidas, 95),
+        "latencia_max": max(concluidas) if concluidas else None,
+    }
+
+
+def executar_lote(tarefas, checkpoint=None, concorrencia=CONCORRENCIA_PADRAO,
+                  destino="groq-70b", prioridade=PRIORIDADE_PREGERACAO):
+    """
+    Gera os textos das tarefas em paralelo e grava no armazém
+
+    Args:
+        tarefas (list[dict]): Tarefas (ver docstring do módulo)
+        checkpoint (str | Path, opcional): Arquivo JSONL de progresso; tarefas
+            já concluídas nele são puladas. Apagado quando o lote termina sem falhas
+        concorrencia (int): Máximo de requisições simultâneas
+        destino (str): Chave de DESTINOS_PADRAO (provedor e modelo)
+        prioridade (int): Prioridade na fila de cota
+
+    Returns:
+        dict: total, puladas, concluidas, falhas, duracao (s),
+        vazao_por_minuto e latencia_p50/p95/max (s, só a chamada HTTP)
+    """
+    return asyncio.run(executar_lote_async(tarefas, checkpoint, concorrencia, destino, prioridade))
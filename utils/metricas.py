@@ -0,0 +1,367 @@
+"""
+Métricas do processo: latência por etapa, contadores e exportação Prometheus
+
+As etapas do caminho quente (geocodificação, efemérides, consultas de cache,
+chamadas ao LLM) são cronometradas com medir()/observar() e agregadas em
+memória, por etapa e rótulos, em histogramas de buckets fixos (para o
+Prometheus) mais uma janela das amostras recentes (para p50/p95/p99 no
+painel de Diagnóstico). Contadores (tokens, acertos de cache) usam contar().
+
+O texto no formato Prometheus é servido pelo /metrics de utils.api quando a
+API está ligada. Sem ela, Home.py pode subir um http.server próprio numa
+thread daemon, em http://127.0.0.1:METRICAS_PORTA/metrics; a porta vem de
+METRICAS_PORTA nos Secrets ou no ambiente (padrão 0, desligado).
+"""
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIXO = "astrovision"
+PORTA_PADRAO = 0
+# Só a própria máquina (ex.: o agente do Prometheus ao lado) lê as métricas
+HOST_PADRAO = "127.0.0.1"
+
+# Limites superiores dos buckets, em segundos
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Amostras recentes guardadas por série para os percentis do painel
+JANELA_AMOSTRAS = 1000
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class Histograma:
+    """Durações de uma série (etapa + rótulos): buckets cumulativos e janela recente"""
+
+    def __init__(self, buckets=BUCKETS, janela=JANELA_AMOSTRAS):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)   # o último é o +Inf
+        self.soma = 0.0
+        self.total = 0
+        self.maximo = 0.0
+        self._recentes = deque(maxlen=janela)
+        self._lock = threading.Lock()
+
+    def observar(self, segundos):
+        indice = bisect.bisect_left(self.buckets, segundos)
+        with self._lock:
+            self.contagens[indice] += 1
+            self.soma += segundos
+            self.total += 1
+            self.maximo = max(self.maximo, segundos)
+            self._recentes.append(segundos)
+
+    def resumo(self):
+        """
+        Returns:
+            dict: n, media, max e p50/p95/p99 das amostras recentes (segundos)
+        """
+        with self._lock:
+            recentes = sorted(self._recentes)
+            total, soma, maximo = self.total, self.soma, self.maximo
+        return {
+            'n': total,
+            'media': soma / total if total else None,
+            'p50': _percentil(recentes, 50) if recentes else None,
+            'p95': _percentil(recentes, 95) if recentes else None,
+            'p99': _percentil(recentes, 99) if recentes else None,
+            'max': maximo if total else None,
+        }
+
+    def cumulativos(self):
+        with self._lock:
+            contagens, soma, total = list(self.contagens), self.soma, self.total
+        acumulado, linhas = 0, []
+        for limite, quantidade in zip(self.buckets + (float("inf"),), contagens):
+            acumulado += quantidade
+            linhas.append((limite, acumulado))
+        return linhas, soma, total
+
+
+def _chave(nome, rotulos):
+    return nome, tuple(sorted((chave, str(valor)) for chave, valor in rotulos.items()))
+
+
+class RegistroMetricas:
+    """Histogramas e contadores do processo, indexados por (nome, rótulos)"""
+
+    def __init__(self):
+        self._histogramas = {}
+        self._contadores = {}
+        self._coletores = []
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def observar(self, etapa, segundos, **rotulos):
+        """Registra a duração de uma execução da etapa"""
+        chave = _chave(etapa, rotulos)
+        histograma = self._histogramas.get(chave)
+        if histograma is None:
+            with self._lock:
+                histograma = self._histogramas.setdefault(chave, Histograma())
+        histograma.observar(segundos)
+
+    @contextmanager
+    def medir(self, etapa, **rotulos):
+        """
+        Cronometra o bloco como uma execução da etapa
+
+        O dict devolvido pode receber rótulos decididos dentro do bloco
+        (ex.: a origem de um resultado). Exceções são registradas com
+        erro="1" e propagadas.
+        """
+        rotulos_finais = dict(rotulos)
+        inicio = time.perf_counter()
+        try:
+            yield rotulos_finais
+        except BaseException:
+            rotulos_finais['erro'] = 1
+            raise
+        finally:
+            self.observar(etapa, time.perf_counter() - inicio, **rotulos_finais)
+
+    def contar(self, nome, quantidade=1, **rotulos):
+        """Soma quantidade ao contador nome com estes rótulos"""
+        chave = _chave(nome, rotulos)
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + quantidade
+
+    def registrar_cache(self, cache, acerto):
+        """Conta uma consulta a um cache, como acerto ou falha"""
+        self.contar("cache_consultas", cache=cache, resultado="acerto" if acerto else "falha")
+
+    def registrar_coletor(self, coletor):
+        """
+        Acrescenta valores calculados na hora da leitura (gauges)
+
+        Args:
+            coletor (Callable): Sem argumentos, devolve uma lista de
+                (nome, rótulos, valor), por exemplo a cota restante
+        """
+        with self._lock:
+            if coletor not in self._coletores:
+                self._coletores.append(coletor)
+
+    def _coletar(self):
+        valores = []
+        for coletor in list(self._coletores):
+            try:
+                valores.extend(coletor())
+            except Exception:
+                # Um coletor com problema não derruba a página nem o endpoint
+                continue
+        return valores
+
+    def etapas(self):
+        """
+        Resumo de cada série de duração
+
+        Returns:
+            list[dict]: 'etapa', 'rotulos' e os campos de Histograma.resumo
+        """
+        with self._lock:
+            itens = list(self._histogramas.items())
+        return [{'etapa': nome, 'rotulos': dict(rotulos), **histograma.resumo()}
+                for (nome, rotulos), histograma in sorted(itens)]
+
+    def contadores(self):
+        """
+        Returns:
+            list[dict]: 'nome', 'rotulos' e 'valor' de cada contador
+        """
+        with self._lock:
+            itens = sorted(self._contadores.items())
+        return [{'nome': nome, 'rotulos': dict(rotulos), 'valor': valor} for (nome, rotulos), valor in itens]
+
+    def taxas_acerto_cache(self):
+        """
+        Returns:
+            dict: cache -> {'acertos', 'falhas', 'taxa_acerto'}
+        """
+        caches = {}
+        for contador in self.contadores():
+            if contador['nome'] != "cache_consultas":
+                continue
+            cache = caches.setdefault(contador['rotulos']['cache'], {'acertos': 0, 'falhas': 0})
+            cache['acertos' if contador['rotulos']['resultado'] == "acerto" else 'falhas'] += contador['valor']
+        for cache in caches.values():
+            total = cache['acertos'] + cache['falhas']
+            cache['taxa_acerto'] = cache['acertos'] / total if total else 0.0
+        return caches
+
+    def medidores(self):
+        """
+        Returns:
+            list[dict]: 'nome', 'rotulos' e 'valor' dos coletores
+        """
+        return [{'nome': nome, 'rotulos': rotulos, 'valor': valor} for nome, rotulos, valor in self._coletar()]
+
+    def texto_prometheus(self):
+        """Todas as métricas no formato de exposição de texto do Prometheus"""
+        linhas = []
+        with self._lock:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted(self._contadores.items())
+
+        nome_histograma = f"{PREFIXO}_etapa_duracao_segundos"
+        linhas += [f"# HELP {nome_histograma} Duração das etapas do caminho quente",
+                   f"# TYPE {nome_histograma} histogram"]
+        for (etapa, rotulos), histograma in histogramas:
+            base = (("etapa", etapa),) + rotulos
+            cumulativos, soma, total = histograma.cumulativos()
+            for limite, acumulado in cumulativos:
+                le = "+Inf" if limite == float("inf") else repr(limite)
+                linhas.append(f"{nome_histograma}_bucket{_rotulos(base + (('le', le),))} {acumulado}")
+            linhas.append(f"{nome_histograma}_sum{_rotulos(base)} {soma}")
+            linhas.append(f"{nome_histograma}_count{_rotulos(base)} {total}")
+
+        vistos = set()
+        for (nome, rotulos), valor in contadores:
+            nome_completo = f"{PREFIXO}_{nome}_total"
+            if nome_completo not in vistos:
+                vistos.add(nome_completo)
+                linhas.append(f"# TYPE {nome_completo} counter")
+            linhas.append(f"{nome_completo}{_rotulos(rotulos)} {valor}")
+
+        for nome, rotulos, valor in self._coletar():
+            nome_completo = f"{PREFIXO}_{nome}"
+            if nome_completo not in vistos:
+                vistos.add(nome_completo)
+                linhas.append(f"# TYPE {nome_completo} gauge")
+            linhas.append(f"{nome_completo}{_rotulos(tuple(sorted(rotulos.items())))} {valor}")
+
+        linhas.append(f"# TYPE {PREFIXO}_inicio_processo_segundos gauge")
+        linhas.append(f"{PREFIXO}_inicio_processo_segundos {self.inicio}")
+        return "\n".join(linhas) + "\n"
+
+    def zerar(self):
+        """Descarta histogramas e contadores (os coletores continuam)"""
+        with self._lock:
+            self._histogramas.clear()
+            self._contadores.clear()
+            self.inicio = time.time()
+
+
+def _escapar(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(pares):
+    if not pares:
+        return ""
+    return "{" + ",".join(f'{chave}="{_escapar(valor)}"' for chave, valor in pares) + "}"
+
+
+registro = RegistroMetricas()
+
+
+# --- Endpoint /metrics ---
+
+class _ManipuladorMetricas(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") not in ("", "/metrics"):
+            self.send_error(404)
+            return
+        corpo = registro.texto_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+
+_lock_servidor = threading.Lock()
+_servidor = None
+_servidor_tentado = False
+
+
+def porta_metricas():
+    """Porta do endpoint (METRICAS_PORTA nos Secrets ou no ambiente; 0 = desligado)"""
+    # Importado aqui para que os módulos de cálculo não carreguem o Streamlit
+    import streamlit as st
+
+    try:
+        return int(st.secrets.get("METRICAS_PORTA", os.environ.get("METRICAS_PORTA", PORTA_PADRAO)))
+    except Exception:
+        # Sem secrets.toml (ex.: scripts e jobs fora do Streamlit)
+        return int(os.environ.get("METRICAS_PORTA", PORTA_PADRAO))
+
+
+def iniciar_servidor(porta=None, host=HOST_PADRAO):
+    """
+    Sobe o endpoint /metrics numa thread daemon (uma vez por processo)
+
+    Args:
+        porta (int, opcional): Padrão: porta_metricas()
+        host (str): Interface de rede (padrão: só local)
+
+    Returns:
+        int | None: Porta em uso, ou None se desligado ou se a porta estiver
+        ocupada (ex.: outra réplica na mesma máquina)
+    """
+    global _servidor, _servidor_tentado
+    with _lock_servidor:
+        if _servidor is None and not _servidor_tentado:
+            _servidor_tentado = True
+            porta = porta_metricas() if porta is None else porta
+            if porta:
+                try:
+                    _servidor = ThreadingHTTPServer((host, porta), _ManipuladorMetricas)
+                except OSError:
+                    return None
+                _servidor.daemon_threads = True
+                threading.Thread(target=_servidor.serve_forever, daemon=True, name="metricas-http").start()
+        return _servidor.server_address[1] if _servidor is not None else None
+
+
+def porta_servidor():
+    """Porta do endpoint /metrics próprio, se já foi iniciado (não o inicia)"""
+    with _lock_servidor:
+        return _servidor.server_address[1] if _servidor is not None else None
+
+
+# --- Atalhos sobre o registro do processo ---
+
+def observar(etapa, segundos, **rotulos):
+    """Ver RegistroMetricas.observar"""
+    registro.observar(etapa, segundos, **rotulos)
+
+
+def medir(etapa, **rotulos):
+    """Ver RegistroMetricas.medir"""
+    return registro.medir(etapa, **rotulos)
+
+
+def contar(nome, quantidade=1, **rotulos):
+    """Ver RegistroMetricas.contar"""
+    registro.contar(nome, quantidade, **rotulos)
+
+
+def registrar_cache(cache, acerto):
+    """Ver RegistroMetricas.registrar_cache"""
+    registro.registrar_cache(cache, acerto)
+
+
+def registrar_uso(uso, **rotulos):
+    """
+    Conta os tokens de um response.usage da API (prompt e resposta)
+
+    Args:
+        uso: Objeto usage da resposta (ou None, que é ignorado)
+        **rotulos: Ex.: destino="groq-70b"
+    """
+    if uso is None:
+        return
+    for tipo, quantidade in (("prompt", uso.prompt_tokens), ("resposta", uso.completion_tokens)):
+        if quantidade:
+            registro.contar("llm_tokens", quantidade, tipo=tipo, **rotulos)
@@ -0,0 +1,76 @@
+"""
+Pré-geração de conteúdo do LLM para o armazém persistente
+
+Roda fora do Streamlit (lê GROQ_API_KEY de .streamlit/secrets.toml), de
+preferência agendado no cron logo após a meia-noite:
+
+    5 0 * * * cd /app && python -m utils.pregerar horoscopos --dias 7
+    30 3 * * 1 cd /app && python -m utils.pregerar compatibilidade --max-idade-dias 7
+    45 3 * * 1 cd /app && python -m utils.pregerar interpretacoes --max-idade-dias 7
+
+Sem --inicio, os horóscopos começam por amanhã. Textos já armazenados (e,
+com --max-idade-dias, mais novos que o limite) são pulados. As requisições
+rodam em paralelo (--concorrencia) dentro da cota do Groq; se o job cair,
+rodar o mesmo comando de novo continua do checkpoint em data/lote_*.jsonl
+(o nome inclui o dia ou o período do lote, então um checkpoint antigo não
+faz pular tarefas de outra execução).
+"""
+import argparse
+from datetime import date, timedelta
+
+from utils.gemini_ai import pregerar_compatibilidades, pregerar_horoscopos, pregerar_interpretacoes
+from utils.lote_llm import CONCORRENCIA_PADRAO
+
+
+def imprimir_relatorio(relatorio):
+    """Resumo do lote: falhas, vazão e latência"""
+    if relatorio["puladas"]:
+        print(f"   {relatorio['puladas']} já estavam no checkpoint")
+    if relatorio["falhas"]:
+        print(f"⚠️ {relatorio['falhas']} falharam (rode de novo para continuar do checkpoint)")
+    print(f"   {relatorio['duracao']:.1f}s | {relatorio['vazao_por_minuto']:.1f} textos/min")
+    if relatorio["latencia_p50"] is not None:
+        print(f"   latência p50 {relatorio['latencia_p50']:.2f}s | p95 {relatorio['latencia_p95']:.2f}s"
+              f" | máx {relatorio['latencia_max']:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pré-geração de conteúdo do LLM")
+    subcomandos = parser.add_subparsers(dest="comando", required=True)
+
+    horoscopos = subcomandos.add_parser("horoscopos", help="Horóscopos dos 12 signos")
+    horoscopos.add_argument("--inicio", type=date.fromisoformat, help="Primeiro dia (AAAA-MM-DD)")
+    horoscopos.add_argument("--dias", type=int, default=1)
+    horoscopos.add_argument("--forcar", action="store_true", help="Regenera os já armazenados")
+
+    compatibilidade = subcomandos.add_parser(
+        "compatibilidade", help="Corpus de compatibilidade (pares de signos x tipos de relação)"
+    )
+    compatibilidade.add_argument("--max-idade-dias", type=float, help="Renova textos mais velhos que isso")
+    compatibilidade.add_argument("--forcar", action="store_true", help="Regenera o corpus inteiro")
+
+    interpretacoes = subcomandos.add_parser("interpretacoes", help="Interpretações Sol x Lua do Mapa Astral")
+    interpretacoes.add_argument("--max-idade-dias", type=float, help="Renova textos mais velhos que isso")
+    interpretacoes.add_argument("--forcar", action="store_true", help="Regenera todas")
+
+    for subcomando in (horoscopos, compatibilidade, interpretacoes):
+        subcomando.add_argument("--concorrencia", type=int, default=CONCORRENCIA_PADRAO,
+                                help="Requisições simultâneas")
+
+    args = parser.parse_args()
+
+    if args.comando == "horoscopos":
+        inicio = args.inicio or date.today() + timedelta(days=1)
+        relatorio = pregerar_horoscopos(inicio, args.dias, args.forcar, args.concorrencia)
+        print(f"✅ {relatorio['concluidas']} horóscopos gerados a partir de {inicio.isoformat()}")
+    elif args.comando == "compatibilidade":
+        relatorio = pregerar_compatibilidades(args.max_idade_dias, args.forcar, args.concorrencia)
+        print(f"✅ {relatorio['concluidas']} textos de compatibilidade gerados")
+    else:
+        relatorio = pregerar_interpretacoes(args.max_idade_dias, args.forcar, args.concorrencia)
+        print(f"✅ {relatorio['concluidas']} interpretações geradas")
+    imprimir_relatorio(relatorio)
+
+
+if __name__ == "__main__":
+    main()
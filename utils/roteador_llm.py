@@ -0,0 +1,318 @@
+"""
+Roteador entre provedores LLM com requisições "hedged"
+
+A requisição vai primeiro ao destino principal (Groq, llama 70B). Se o
+primeiro pedaço da resposta não chegar dentro do prazo, calculado pelo p95
+da latência recente do principal, a mesma requisição é enviada ao destino
+secundário mais rápido de outro provedor (Gemini ou OpenAI; o outro modelo
+do Groq só se não houver alternativa, porque divide a cota e a fila com o
+principal). A latência conta a partir da saída da fila de cota. Vale a
+primeira resposta; o stream da perdedora é fechado, o que encerra a
+geração no provedor. Toda chamada usa stream=True por baixo, então a
+corrida é decidida pelo tempo até o primeiro token.
+
+Destinos sem API key configurada são ignorados.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.agendador_llm import PRIORIDADE_INTERATIVA, obter_agendador
+from utils.clientes_llm import obter_cliente, provedor_configurado
+from utils.metricas import observar, registrar_uso, registro
+
+# Nome -> (provedor, modelo), em ordem de preferência
+DESTINOS_PADRAO = {
+    "groq-70b": ("groq", "llama-3.3-70b-versatile"),
+    "groq-8b": ("groq", "llama-3.1-8b-instant"),
+    "gemini": ("gemini", "gemini-2.0-flash"),
+    "openai": ("openai", "gpt-4o-mini"),
+}
+
+# Prazo antes de disparar o secundário, em segundos
+PRAZO_PADRAO = 2.0      # enquanto não há amostras suficientes
+PRAZO_MINIMO = 0.5
+PRAZO_MAXIMO = 10.0
+AMOSTRAS_MINIMAS = 20
+
+# Falhas seguidas que tiram um destino da rota, e por quanto tempo
+FALHAS_PARA_QUARENTENA = 3
+DURACAO_QUARENTENA = 60.0
+
+
+class RequisicaoCancelada(Exception):
+    """A corrida já foi decidida antes de a requisição sair da fila de cota"""
+
+
+class Destino:
+    """Um modelo de um provedor, com o histórico de latência até o primeiro token"""
+
+    def __init__(self, nome, provedor, modelo, janela=200):
+        self.nome = nome
+        self.provedor = provedor
+        self.modelo = modelo
+        self._latencias = deque(maxlen=janela)
+        self._lock = threading.Lock()
+        self.falhas_seguidas = 0
+        self.quarentena_ate = 0.0
+        self.contadores = {'requisicoes': 0, 'vitorias': 0, 'falhas': 0, 'canceladas': 0}
+
+    def percentil(self, p):
+        """Percentil p (0-100) da latência até o primeiro token, ou None sem amostras"""
+        with self._lock:
+            amostras = sorted(self._latencias)
+        if not amostras:
+            return None
+        return amostras[min(len(amostras) - 1, int(len(amostras) * p / 100))]
+
+    def amostras(self):
+        with self._lock:
+            return len(self._latencias)
+
+    def registrar_sucesso(self, latencia):
+        with self._lock:
+            self._latencias.append(latencia)
+            self.falhas_seguidas = 0
+
+    def registrar_falha(self):
+        with self._lock:
+            self.contadores['falhas'] += 1
+            self.falhas_seguidas += 1
+            if self.falhas_seguidas >= FALHAS_PARA_QUARENTENA:
+                self.quarentena_ate = time.monotonic() + DURACAO_QUARENTENA
+
+    def disponivel(self):
+        return time.monotonic() >= self.quarentena_ate
+
+    def abrir_stream(self, parametros, prioridade, cancelado=None):
+        """
+        Abre o stream pela fila do agendador do provedor (que cuida da cota e dos 429)
+
+        Args:
+            parametros (dict): messages, max_tokens, temperature...
+            prioridade (int): Prioridade na fila de cota
+            cancelado (threading.Event, opcional): Se marcado enquanto espera
+                na fila, desiste sem consumir cota nem fazer a requisição
+
+        Returns:
+            tuple: (stream, instante em que a requisição saiu da fila, em
+            time.monotonic), para a latência não contar a espera pela cota
+
+        Raises:
+            RequisicaoCancelada: Se `cancelado` foi marcado antes da requisição
+        """
+        agendador = obter_agendador(self.provedor)
+        saida = []
+
+        def _chamar():
+            if cancelado is not None and cancelado.is_set():
+                # Marcado entre a liberação e aqui: a requisição não sai
+                agendador.devolver()
+                raise RequisicaoCancelada()
+            saida.append(time.monotonic())
+            cliente = obter_cliente(self.provedor).with_options(max_retries=0)
+            # include_usage: o último chunk traz os tokens da requisição
+            resposta = cliente.chat.completions.with_raw_response.create(
+                model=self.modelo, stream=True, stream_options={"include_usage": True}, **parametros
+            )
+            agendador.atualizar_pelos_cabecalhos(resposta.headers)
+            return resposta.parse()
+
+        self.contadores['requisicoes'] += 1
+        stream = agendador.executar(_chamar, prioridade, cancelado=cancelado)
+        if stream is None:
+            raise RequisicaoCancelada()
+        # Após 429 e nova tentativa, vale a saída da última
+        return stream, saida[-1]
+
+
+def _textos(stream, destino):
+    for chunk in stream:
+        if getattr(chunk, "usage", None) is not None:
+            registrar_uso(chunk.usage, destino=destino.nome)
+        # O último chunk pode vir sem choices (só com estatísticas de uso)
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+class RoteadorLLM:
+    """Escolhe os destinos e faz a corrida entre o principal e o secundário"""
+
+    def __init__(self, destinos, max_threads=32):
+        self.destinos = destinos
+        self._executor = ThreadPoolExecutor(max_workers=max_threads, thread_name_prefix="roteador-llm")
+        self.hedges = 0
+
+    def candidatos(self):
+        """
+        Destinos na ordem de tentativa: o principal (o primeiro fora de
+        quarentena) e depois os demais, primeiro os de outro provedor (o
+        mesmo provedor divide cota e fila com o principal) e, entre eles,
+        do menor para o maior p95
+        """
+        ativos = [d for d in self.destinos if d.disponivel()] or list(self.destinos)
+        principal, demais = ativos[0], ativos[1:]
+        demais.sort(key=lambda d: (d.provedor == principal.provedor, d.percentil(95) or PRAZO_PADRAO))
+        return [principal] + demais
+
+    def prazo(self, destino):
+        """Tempo de espera pelo destino antes de disparar o próximo"""
+        if destino.amostras() < AMOSTRAS_MINIMAS:
+            return PRAZO_PADRAO
+        return min(PRAZO_MAXIMO, max(PRAZO_MINIMO, destino.percentil(95)))
+
+    def _abrir(self, destino, parametros, prioridade, cancelado, resultados):
+        # Roda numa thread: abre o stream e espera o primeiro pedaço de texto
+        try:
+            stream, inicio = destino.abrir_stream(parametros, prioridade, cancelado)
+            textos = _textos(stream, destino)
+            primeiro = next(textos, "")
+        except RequisicaoCancelada as e:
+            resultados.put((destino, None, None, None, e))
+            return
+        except Exception as e:
+            destino.registrar_falha()
+            resultados.put((destino, None, None, None, e))
+            return
+        latencia = time.monotonic() - inicio
+        destino.registrar_sucesso(latencia)
+        observar("llm_primeiro_token", latencia, destino=destino.nome)
+        resultados.put((destino, stream, textos, primeiro, None))
+
+    def _descartar(self, resultados, pendentes):
+        # Fecha os streams que chegarem depois do vencedor
+        for _ in range(pendentes):
+            destino, stream, *_, erro = resultados.get()
+            if stream is not None:
+                destino.contadores['canceladas'] += 1
+                stream.close()
+
+    def transmitir(self, parametros, prioridade=PRIORIDADE_INTERATIVA):
+        """
+        Gera o texto pelo primeiro destino que responder
+
+        Args:
+            parametros (dict): messages, max_tokens, temperature...
+            prioridade (int): Prioridade na fila de cota
+
+        Yields:
+            str: Pedaços de texto, à medida que chegam
+
+        Raises:
+            Exception: O erro do último destino, se todos falharem
+        """
+        inicio = time.monotonic()
+        fila_destinos = self.candidatos()
+        resultados = queue.Queue()
+        cancelado = threading.Event()
+        pendentes = 0
+        ultimo_erro = None
+        vencedor = None
+        prazo = None
+
+        while vencedor is None:
+            if pendentes == 0 or (prazo is not None and time.monotonic() >= prazo):
+                prazo = None
+                if fila_destinos:
+                    destino = fila_destinos.pop(0)
+                    if pendentes > 0:
+                        self.hedges += 1
+                    self._executor.submit(self._abrir, destino, parametros, prioridade, cancelado, resultados)
+                    pendentes += 1
+                    # Só um destino sozinho na corrida ganha prazo: no máximo um hedge por vez
+                    if pendentes == 1 and fila_destinos:
+                        prazo = time.monotonic() + self.prazo(destino)
+                elif pendentes == 0:
+                    raise ultimo_erro
+
+            try:
+                espera = None if prazo is None else max(0.0, prazo - time.monotonic())
+                destino, stream, textos, primeiro, erro = resultados.get(timeout=espera)
+            except queue.Empty:
+                continue
+            pendentes -= 1
+            if erro is not None:
+                # Sem outro destino na corrida, o próximo é disparado na volta do laço
+                ultimo_erro = erro
+                continue
+            vencedor = destino
+
+        cancelado.set()
+        if pendentes:
+            self._executor.submit(self._descartar, resultados, pendentes)
+        vencedor.contadores['vitorias'] += 1
+        try:
+            if primeiro:
+                yield primeiro
+            yield from textos
+        finally:
+            stream.close()
+            observar("llm", time.monotonic() - inicio, destino=vencedor.nome)
+
+    def completar(self, parametros, prioridade=PRIORIDADE_INTERATIVA):
+        """Como transmitir(), mas devolve o texto completo"""
+        return "".join(self.transmitir(parametros, prioridade))
+
+    def estatisticas(self):
+        """
+        Latência e contadores por destino
+
+        Returns:
+            dict: nome -> p50, p95, amostras, em_quarentena e contadores;
+            mais 'hedges' com o total de requisições secundárias disparadas
+        """
+        por_destino = {}
+        for destino in self.destinos:
+            por_destino[destino.nome] = {
+                'p50': destino.percentil(50),
+                'p95': destino.percentil(95),
+                'amostras': destino.amostras(),
+                'em_quarentena': not destino.disponivel(),
+                **destino.contadores,
+            }
+        return {'destinos': por_destino, 'hedges': self.hedges}
+
+
+_lock = threading.Lock()
+_roteador = None
+
+
+def obter_roteador():
+    """Roteador do processo, com os destinos de DESTINOS_PADRAO que têm API key"""
+    global _roteador
+    with _lock:
+        if _roteador is None:
+            destinos = [
+                Destino(nome, provedor, modelo)
+                for nome, (provedor, modelo) in DESTINOS_PADRAO.items()
+                if provedor_configurado(provedor)
+            ]
+            if not destinos:
+                raise KeyError("Nenhuma API key de LLM configurada (GROQ_API_KEY, GEMINI_API_KEY ou OPENAI_API_KEY)")
+            _roteador = RoteadorLLM(destinos)
+        return _roteador
+
+
+def reiniciar_roteador():
+    """Descarta o roteador do processo; o próximo obter_roteador relê as API keys"""
+    global _roteador
+    with _lock:
+        _roteador = None
+
+
+def _coletor_metricas():
+    # Contadores de cada destino e hedges, para o endpoint /metrics
+    if _roteador is None:
+        return []
+    estatisticas = _roteador.estatisticas()
+    valores = [("llm_hedges", {}, estatisticas['hedges'])]
+    for nome, dados in estatisticas['destinos'].items():
+        for contador in ('requisicoes', 'vitorias', 'falhas', 'canceladas'):
+            valores.append((f"llm_destino_{contador}", {'destino': nome}, dados[contador]))
+        valores.append(("llm_destino_em_quarentena", {'destino': nome}, int(dados['em_quarentena'])))
+    return valores
+
+
+registro.registrar_coletor(_coletor_metricas)
@@ -0,0 +1,221 @@
+"""
+Monitor de saúde dos provedores LLM (Groq, Gemini e OpenAI)
+
+Uma thread em segundo plano sonda, em paralelo e a cada INTERVALO_SONDAGEM,
+todos os provedores com API key: lista os modelos (a resposta vira o
+catálogo em cache) e, a cada INTERVALO_GERACAO, pede uma geração de 1 token
+ao modelo usado pelo roteador. Cada sondagem entra num histórico curto por
+provedor, com latência e erro; as páginas de Diagnóstico só leem esse
+estado, sem esperar por nenhuma chamada de rede.
+
+A geração de teste passa pela fila do agendador com a prioridade da
+pré-geração e sem esperar: se a cota estiver apertada, a sondagem é pulada
+em vez de competir com os usuários. A primeira só sai INTERVALO_GERACAO
+depois de o monitor iniciar, então um container que sobe e logo cai (ou
+cada réplica fria) não gasta cota com ela.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.agendador_llm import PRIORIDADE_PREGERACAO, obter_agendador
+from utils.clientes_llm import PROVEDORES, obter_cliente, provedor_configurado
+from utils.metricas import medir
+from utils.roteador_llm import DESTINOS_PADRAO
+
+INTERVALO_SONDAGEM = 60.0
+INTERVALO_GERACAO = 600.0
+TIMEOUT_SONDAGEM = 10.0
+
+# Sondagens guardadas por provedor (com o intervalo padrão, ~1 hora)
+HISTORICO_SONDAGENS = 60
+
+
+def _percentil(ordenadas, p):
+    return ordenadas[min(len(ordenadas) - 1, int(len(ordenadas) * p / 100))]
+
+
+class EstadoProvedor:
+    """Histórico de sondagens e catálogo de modelos de um provedor"""
+
+    def __init__(self, provedor, tamanho_historico=HISTORICO_SONDAGENS):
+        self.provedor = provedor
+        self.historico = deque(maxlen=tamanho_historico)
+        self.catalogo = []
+        self.catalogo_em = None
+        self.ultima_geracao = None
+        self._lock = threading.Lock()
+
+    def registrar(self, tipo, latencia, erro=None):
+        with self._lock:
+            self.historico.append({
+                'instante': time.time(),
+                'tipo': tipo,
+                'latencia': latencia,
+                'ok': erro is None,
+                'erro': erro,
+            })
+
+    def atualizar_catalogo(self, modelos):
+        with self._lock:
+            self.catalogo = sorted(modelos)
+            self.catalogo_em = time.time()
+
+    def obter_catalogo(self):
+        with self._lock:
+            return list(self.catalogo), self.catalogo_em
+
+    def resumo(self):
+        """
+        Situação atual do provedor
+
+        Returns:
+            dict: disponivel (última sondagem ok), sondagens, taxa_erro,
+            latencia_p50/p95 (s, sondagens ok), latencia_geracao (s, última ok),
+            ultima_sondagem (timestamp), ultimo_erro e modelos (tamanho do catálogo)
+        """
+        with self._lock:
+            historico = list(self.historico)
+            modelos = len(self.catalogo)
+        latencias = sorted(s['latencia'] for s in historico if s['ok'])
+        geracoes = [s for s in historico if s['tipo'] == "geracao" and s['ok']]
+        erros = [s for s in historico if not s['ok']]
+        return {
+            'disponivel': historico[-1]['ok'] if historico else None,
+            'sondagens': len(historico),
+            'taxa_erro': len(erros) / len(historico) if historico else None,
+            'latencia_p50': _percentil(latencias, 50) if latencias else None,
+            'latencia_p95': _percentil(latencias, 95) if latencias else None,
+            'latencia_geracao': geracoes[-1]['latencia'] if geracoes else None,
+            'ultima_sondagem': historico[-1]['instante'] if historico else None,
+            'ultimo_erro': erros[-1]['erro'] if erros else None,
+            'modelos': modelos,
+        }
+
+
+def _modelo_do_provedor(provedor):
+    # O primeiro modelo do provedor em DESTINOS_PADRAO (o que o roteador usa)
+    return next(modelo for nome_provedor, modelo in DESTINOS_PADRAO.values() if nome_provedor == provedor)
+
+
+class MonitorSaude:
+    """Sonda os provedores periodicamente e guarda o estado de cada um"""
+
+    def __init__(self, provedores, intervalo=INTERVALO_SONDAGEM, intervalo_geracao=INTERVALO_GERACAO,
+                 timeout=TIMEOUT_SONDAGEM):
+        self.intervalo = intervalo
+        self.intervalo_geracao = intervalo_geracao
+        self.timeout = timeout
+        self.estados = {provedor: EstadoProvedor(provedor) for provedor in provedores}
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.estados)), thread_name_prefix="saude-llm")
+        self._parar = threading.Event()
+        self._thread = None
+
+    def _cliente(self, provedor):
+        return obter_cliente(provedor).with_options(max_retries=0, timeout=self.timeout)
+
+    def _sondar_catalogo(self, provedor):
+        estado = self.estados[provedor]
+        inicio = time.monotonic()
+        try:
+            with medir("sonda", provedor=provedor, tipo="catalogo"):
+                modelos = [modelo.id for modelo in self._cliente(provedor).models.list()]
+        except Exception as e:
+            estado.registrar("catalogo", time.monotonic() - inicio, str(e)[:200])
+            return
+        estado.registrar("catalogo", time.monotonic() - inicio)
+        estado.atualizar_catalogo(modelos)
+
+    def _sondar_geracao(self, provedor):
+        estado = self.estados[provedor]
+        # Sem esperar na fila: com a cota apertada, os usuários têm a vez
+        if not obter_agendador(provedor).adquirir(PRIORIDADE_PREGERACAO, timeout=0):
+            return
+        estado.ultima_geracao = time.monotonic()
+        inicio = time.monotonic()
+        try:
+            with medir("sonda", provedor=provedor, tipo="geracao"):
+                self._cliente(provedor).chat.completions.create(
+                    model=_modelo_do_provedor(provedor),
+                    messages=[{"role": "user", "content": "ping"}],
+                    max_tokens=1,
+                )
+        except Exception as e:
+            estado.registrar("geracao", time.monotonic() - inicio, str(e)[:200])
+            return
+        estado.registrar("geracao", time.monotonic() - inicio)
+
+    def sondar(self, provedor, geracao=None):
+        """
+        Sonda um provedor (catálogo e, se for a hora, geração)
+
+        Args:
+            provedor (str): Chave de PROVEDORES
+            geracao (bool, opcional): Força (True) ou evita (False) a geração
+                de teste; padrão: só se passou intervalo_geracao desde a última
+        """
+        self._sondar_catalogo(provedor)
+        ultima = self.estados[provedor].ultima_geracao
+        if geracao is None:
+            geracao = ultima is None or time.monotonic() - ultima >= self.intervalo_geracao
+        if geracao:
+            self._sondar_geracao(provedor)
+
+    def sondar_todos(self, geracao=None):
+        """Sonda todos os provedores em paralelo e espera terminarem"""
+        list(self._executor.map(lambda provedor: self.sondar(provedor, geracao), self.estados))
+
+    def _laco(self):
+        while not self._parar.is_set():
+            try:
+                self.sondar_todos()
+            except Exception:
+                # A sondagem seguinte tenta de novo; a thread não pode morrer
+                pass
+            self._parar.wait(self.intervalo)
+
+    def iniciar(self):
+        """Inicia a thread de sondagem (uma vez); a geração de teste começa depois de intervalo_geracao"""
+        if self._thread is None and self.estados:
+            for estado in self.estados.values():
+                if estado.ultima_geracao is None:
+                    estado.ultima_geracao = time.monotonic()
+            self._thread = threading.Thread(target=self._laco, daemon=True, name="monitor-saude-llm")
+            self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def estado(self):
+        """
+        Returns:
+            dict: provedor -> EstadoProvedor.resumo()
+        """
+        return {provedor: estado.resumo() for provedor, estado in self.estados.items()}
+
+    def catalogo(self, provedor):
+        """
+        Modelos do provedor na última listagem bem-sucedida
+
+        Returns:
+            tuple: (lista de ids, timestamp da listagem ou None)
+        """
+        estado = self.estados.get(provedor)
+        if estado is None:
+            return [], None
+        return estado.obter_catalogo()
+
+
+_lock = threading.Lock()
+_monitor = None
+
+
+def obter_monitor():
+    """Monitor do processo, já sondando os provedores que têm API key"""
+    global _monitor
+    with _lock:
+        if _monitor is None:
+            _monitor = MonitorSaude([provedor for provedor in PROVEDORES if provedor_configurado(provedor)])
+            _monitor.iniciar()
+        return _monitor
@@ -0,0 +1,175 @@
+"""
+Sinastria: compatibilidade pelos aspectos entre dois mapas natais
+
+Cada aspecto entre um planeta de uma pessoa e um planeta da outra soma
+(harmônicos) ou subtrai (tensos) pontos, ponderado pela importância do
+par de planetas para o tipo de relação e pela exatidão do aspecto. A soma
+é levada para 0-100. Tudo é feito com arrays, então comparar uma pessoa
+com milhares de perfis é uma única operação.
+"""
+import numpy as np
+
+from utils.aspectos import aspectos_cruzados, tabela_aspectos
+from utils.astro_calc import PLANETAS
+
+NOMES_PLANETAS = tuple(PLANETAS)
+
+# Peso de cada aspecto: positivo = harmonia, negativo = tensão
+PESOS_ASPECTOS = {
+    "Conjunção": 0.8,
+    "Trígono": 1.0,
+    "Sextil": 0.7,
+    "Quadratura": -0.7,
+    "Oposição": -0.4,
+    "Quintil": 0.3,
+    "Biquintil": 0.3,
+    "Semissextil": 0.2,
+    "Semiquadratura": -0.2,
+    "Sesquiquadratura": -0.2,
+    "Quincúncio": -0.3,
+}
+
+# Importância de cada planeta, por tipo de relação
+IMPORTANCIA_PLANETAS = {
+    "Romântico": {"Sol": 1.0, "Lua": 1.0, "Mercúrio": 0.5, "Vênus": 1.0, "Marte": 0.9, "Júpiter": 0.4, "Saturno": 0.5},
+    "Amizade": {"Sol": 1.0, "Lua": 0.9, "Mercúrio": 0.8, "Vênus": 0.7, "Marte": 0.4, "Júpiter": 0.8, "Saturno": 0.3},
+    "Profissional": {"Sol": 1.0, "Lua": 0.4, "Mercúrio": 1.0, "Vênus": 0.3, "Marte": 0.7, "Júpiter": 0.6, "Saturno": 1.0},
+}
+
+# Pares clássicos de sinastria recebem peso extra (nas duas direções)
+PARES_CLASSICOS = {
+    "Romântico": {("Sol", "Lua"): 1.5, ("Vênus", "Marte"): 1.5, ("Lua", "Vênus"): 1.2},
+    "Amizade": {("Sol", "Lua"): 1.3, ("Mercúrio", "Mercúrio"): 1.3, ("Júpiter", "Sol"): 1.2},
+    "Profissional": {("Sol", "Saturno"): 1.3, ("Mercúrio", "Mercúrio"): 1.4, ("Marte", "Júpiter"): 1.2},
+}
+
+# Escala da soma de pontos: ESCALA_PONTOS pontos levam o score a ~88
+ESCALA_PONTOS = 4.0
+
+# Perfis processados por vez no modo um-para-muitos
+TAMANHO_BLOCO = 20000
+
+
+def pesos_pares(tipo_relacao="Romântico"):
+    """
+    Peso de cada par (planeta da pessoa A, planeta da pessoa B)
+
+    Returns:
+        np.ndarray: Shape (7, 7), na ordem de NOMES_PLANETAS
+    """
+    importancia = np.array([IMPORTANCIA_PLANETAS[tipo_relacao][nome] for nome in NOMES_PLANETAS])
+    pesos = np.outer(importancia, importancia)
+    for (planeta1, planeta2), fator in PARES_CLASSICOS[tipo_relacao].items():
+        i, j = NOMES_PLANETAS.index(planeta1), NOMES_PLANETAS.index(planeta2)
+        pesos[i, j] *= fator
+        if i != j:
+            pesos[j, i] *= fator
+    return pesos
+
+
+def _contribuicoes(cruzados, limites, pesos_pares_relacao):
+    # Pontos de cada par: peso do aspecto x exatidão (1 no exato, 0 no limite da orbe) x peso do par
+    pesos_aspectos = np.array([PESOS_ASPECTOS[nome] for nome in cruzados['aspectos']] + [0.0])
+    limites = np.append(limites, 1.0)
+    tipo = cruzados['tipo'].astype(np.intp)   # -1 cai no último elemento (peso 0)
+    exatidao = 1.0 - np.nan_to_num(cruzados['orbe'], nan=0.0) / limites[tipo]
+    return pesos_aspectos[tipo] * exatidao * pesos_pares_relacao
+
+
+def _score(soma):
+    return 50.0 + 50.0 * np.tanh(soma / ESCALA_PONTOS)
+
+
+def longitudes_do_mapa(posicoes):
+    """
+    Longitudes dos planetas de um resultado de calcular_mapa, na ordem de NOMES_PLANETAS
+
+    Returns:
+        np.ndarray: Shape (7,); NaN para planetas com erro
+    """
+    return np.array([posicoes.get(nome, {}).get('longitude', np.nan) for nome in NOMES_PLANETAS])
+
+
+def pontuar_sinastria(longitudes_a, longitudes_b, tipo_relacao="Romântico", aspectos=None, orbes=None):
+    """
+    Score de compatibilidade (0 a 100) entre mapas
+
+    Args:
+        longitudes_a (array_like): Planetas da pessoa A, shape (7,)
+        longitudes_b (array_like): Planetas da pessoa B, shape (7,) ou (m, 7)
+        tipo_relacao (str): 'Romântico', 'Amizade' ou 'Profissional'
+        aspectos, orbes: Ver aspectos.tabela_aspectos
+
+    Returns:
+        float | np.ndarray: Score, ou array shape (m,) para vários mapas B
+    """
+    _, _, limites = tabela_aspectos(aspectos, orbes)
+    cruzados = aspectos_cruzados(longitudes_a, longitudes_b, aspectos, orbes)
+    soma = _contribuicoes(cruzados, limites, pesos_pares(tipo_relacao)).sum(axis=(-2, -1))
+    return _score(soma)
+
+
+def sinastria(posicoes_a, posicoes_b, tipo_relacao="Romântico", aspectos=None, orbes=None):
+    """
+    Sinastria completa entre dois mapas de calcular_mapa
+
+    Returns:
+        dict:
+            - 'score': 0 a 100
+            - 'aspectos': lista de dicts ('planeta_a', 'planeta_b', 'aspecto',
+              'orbe', 'pontos'), do mais para o menos influente
+            - 'harmonias' / 'desafios': os aspectos de pontos positivos / negativos
+    """
+    _, _, limites = tabela_aspectos(aspectos, orbes)
+    cruzados = aspectos_cruzados(longitudes_do_mapa(posicoes_a), longitudes_do_mapa(posicoes_b), aspectos, orbes)
+    contribuicoes = _contribuicoes(cruzados, limites, pesos_pares(tipo_relacao))
+
+    lista = []
+    for i, j in zip(*np.nonzero(cruzados['tipo'] >= 0)):
+        lista.append({
+            'planeta_a': NOMES_PLANETAS[i],
+            'planeta_b': NOMES_PLANETAS[j],
+            'aspecto': cruzados['aspectos'][cruzados['tipo'][i, j]],
+            'orbe': round(float(cruzados['orbe'][i, j]), 2),
+            'pontos': round(float(contribuicoes[i, j]), 3),
+        })
+    lista.sort(key=lambda aspecto: -abs(aspecto['pontos']))
+
+    return {
+        'score': float(_score(contribuicoes.sum())),
+        'aspectos': lista,
+        'harmonias': [aspecto for aspecto in lista if aspecto['pontos'] > 0],
+        'desafios': [aspecto for aspecto in lista if aspecto['pontos'] < 0],
+    }
+
+
+def ranking_sinastria(longitudes_pessoa, longitudes_perfis, k=10, tipo_relacao="Romântico",
+                      aspectos=None, orbes=None, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Compara uma pessoa com muitos perfis e devolve os k mais compatíveis
+
+    Args:
+        longitudes_pessoa (array_like): Shape (7,)
+        longitudes_perfis (array_like): Shape (m, 7), por exemplo
+            calcular_mapas_lote(...)['longitude_ecliptica']
+        k (int): Quantidade de perfis no ranking
+        tipo_relacao (str): 'Romântico', 'Amizade' ou 'Profissional'
+        aspectos, orbes: Ver aspectos.tabela_aspectos
+        tamanho_bloco (int): Perfis processados por vez (limita a memória)
+
+    Returns:
+        tuple: (indices, scores) dos k melhores perfis, do maior score para o menor
+    """
+    longitudes_perfis = np.atleast_2d(np.asarray(longitudes_perfis, dtype=float))
+    scores = np.empty(len(longitudes_perfis))
+    for inicio in range(0, len(longitudes_perfis), tamanho_bloco):
+        bloco = slice(inicio, inicio + tamanho_bloco)
+        scores[bloco] = pontuar_sinastria(longitudes_pessoa, longitudes_perfis[bloco], tipo_relacao, aspectos, orbes)
+
+    # Perfis com alguma posição inválida (NaN) ficam no fim do ranking
+    scores[np.isnan(longitudes_perfis).any(axis=1)] = -np.inf
+    k = min(k, len(scores))
+    melhores = np.argpartition(-scores, k - 1)[:k] if k else np.array([], dtype=int)
+    melhores = melhores[np.argsort(-scores[melhores], kind="stable")]
+    return melhores, scores[melhores]
+
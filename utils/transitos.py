@@ -0,0 +1,282 @@
+"""
+Busca de trânsitos: aspectos exatos de planetas em trânsito a pontos natais
+e mudanças de signo, num intervalo de datas
+
+Em vez de avançar dia a dia com swe.calc_ut para cada assinante, a
+trajetória de cada planeta em trânsito é amostrada uma única vez no
+período (com passo ajustado à velocidade do planeta) e as estações
+(velocidade zero) são inseridas na grade; entre duas amostras o movimento
+fica monotônico, então cada evento é delimitado por uma troca de sinal.
+O instante exato é refinado por Newton com salvaguarda de bisseção sobre
+a interpolação de Hermite (longitude e velocidade nas pontas), com
+precisão bem abaixo de 1 minuto. A busca de todos os mapas de um lote é
+feita em arrays, sem laços por assinante.
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import swisseph as swe
+
+from utils.aspectos import ASPECTOS, ASPECTOS_MAIORES
+from utils.astro_calc import PLANETAS, SIGNOS, _julian_day, _longitudes_swe
+from utils.ingressos import carregar_indice
+
+# Passo da amostragem de cada planeta (dias): pequeno o bastante para a
+# interpolação de Hermite ficar abaixo de alguns segundos de arco
+PASSO_PLANETA = {'Lua': 0.5, 'Sol': 1.0, 'Mercúrio': 1.0, 'Vênus': 1.0, 'Marte': 2.0, 'Júpiter': 4.0, 'Saturno': 4.0}
+
+# Tolerância do refinamento, em dias (~1 segundo)
+PRECISAO = 1.0 / 86400
+MAX_ITERACOES = 40
+
+# Mapas processados por vez no lote (limita a memória dos arrays intermediários)
+TAMANHO_BLOCO = 2000
+
+
+def _calcular(jd, id_planeta):
+    resultado = swe.calc_ut(jd, id_planeta, swe.FLG_SWIEPH | swe.FLG_SPEED)[0]
+    return resultado[0], resultado[3]
+
+
+def _refinar_estacao(id_planeta, inicio, fim, velocidade_inicio):
+    # Bisseção na velocidade até a precisão desejada
+    while fim - inicio > PRECISAO:
+        meio = (inicio + fim) / 2
+        if (_calcular(meio, id_planeta)[1] > 0) == (velocidade_inicio > 0):
+            inicio = meio
+        else:
+            fim = meio
+    return (inicio + fim) / 2
+
+
+def trajetoria(planeta, jd_inicial, jd_final, passo=None):
+    """
+    Amostra a trajetória de um planeta, com as estações incluídas na grade
+
+    Args:
+        planeta (str): Nome em PLANETAS
+        jd_inicial, jd_final (float): Intervalo (UT)
+        passo (float, opcional): Passo em dias (padrão: PASSO_PLANETA)
+
+    Returns:
+        tuple: (jds, longitudes contínuas sem o salto 360 -> 0, velocidades
+        em graus/dia), arrays de mesmo tamanho
+    """
+    id_planeta = PLANETAS[planeta]
+    passo = passo or PASSO_PLANETA.get(planeta, 1.0)
+    n = max(1, int(np.ceil((jd_final - jd_inicial) / passo)))
+    grade = jd_inicial + np.arange(n + 1) * ((jd_final - jd_inicial) / n)
+
+    amostras = [(jd, *_calcular(jd, id_planeta)) for jd in grade.tolist()]
+    completas = [amostras[0]]
+    for anterior, atual in zip(amostras, amostras[1:]):
+        if (anterior[2] > 0) != (atual[2] > 0):
+            estacao = _refinar_estacao(id_planeta, anterior[0], atual[0], anterior[2])
+            completas.append((estacao, *_calcular(estacao, id_planeta)))
+        completas.append(atual)
+
+    jds, longitudes, velocidades = (np.array(coluna) for coluna in zip(*completas))
+    return jds, np.unwrap(longitudes, period=360.0), velocidades
+
+
+def _hermite(s, h, p0, p1, v0, v1):
+    # Posição e derivada (por dia) do polinômio cúbico de Hermite em s ∈ [0, 1]
+    s2, s3 = s * s, s * s * s
+    posicao = ((2 * s3 - 3 * s2 + 1) * p0 + (s3 - 2 * s2 + s) * h * v0
+               + (-2 * s3 + 3 * s2) * p1 + (s3 - s2) * h * v1)
+    derivada = ((6 * s2 - 6 * s) * p0 + (3 * s2 - 4 * s + 1) * h * v0
+                + (-6 * s2 + 6 * s) * p1 + (3 * s2 - 2 * s) * h * v1) / h
+    return posicao, derivada
+
+
+def buscar_cruzamentos(jds, longitudes, velocidades, alvos):
+    """
+    Instantes em que o planeta passa exatamente pelas longitudes-alvo
+
+    Args:
+        jds, longitudes, velocidades: Saída de trajetoria
+        alvos (array_like): Longitudes-alvo, shape qualquer (...)
+
+    Returns:
+        tuple: (indices_alvo, jds_exatos, retrogrado). indices_alvo são
+        tuplas de índices em `alvos` (como np.nonzero), um por evento
+    """
+    alvos = np.asarray(alvos, dtype=float)
+    # Distância assinada ao alvo em (-180, 180], em cada amostra
+    forma = (len(jds),) + (1,) * alvos.ndim
+    f = np.mod(longitudes.reshape(forma) - alvos + 180.0, 360.0) - 180.0
+    troca = ((f[:-1] <= 0) != (f[1:] <= 0)) & (np.abs(f[1:] - f[:-1]) < 180.0)
+    eventos = np.nonzero(troca)
+    intervalo, indices_alvo = eventos[0], eventos[1:]
+
+    h = jds[intervalo + 1] - jds[intervalo]
+    p0, p1 = longitudes[intervalo], longitudes[intervalo + 1]
+    v0, v1 = velocidades[intervalo], velocidades[intervalo + 1]
+    # Alvo na mesma volta da longitude contínua do início do intervalo
+    alvo = p0 - f[(intervalo,) + indices_alvo]
+    crescente = p1 > p0
+
+    # Newton com salvaguarda: o intervalo [baixo, alto] sempre contém a raiz
+    baixo = np.zeros(len(intervalo))
+    alto = np.ones(len(intervalo))
+    s = np.clip((alvo - p0) / np.where(p1 != p0, p1 - p0, 1.0), 0.0, 1.0)
+    for _ in range(MAX_ITERACOES):
+        posicao, derivada = _hermite(s, h, p0, p1, v0, v1)
+        erro = posicao - alvo
+        passou = np.where(crescente, erro > 0, erro < 0)
+        alto = np.where(passou, s, alto)
+        baixo = np.where(passou, baixo, s)
+        proximo = s - erro / np.where(derivada != 0, derivada * h, np.inf)
+        fora = (proximo <= baixo) | (proximo >= alto) | ~np.isfinite(proximo)
+        proximo = np.where(fora, (baixo + alto) / 2, proximo)
+        convergiu = np.abs(proximo - s) * h < PRECISAO / 10
+        s = proximo
+        if convergiu.all():
+            break
+
+    instantes = jds[intervalo] + s * h
+    _, derivada = _hermite(s, h, p0, p1, v0, v1)
+    return indices_alvo, instantes, derivada < 0
+
+
+def _angulos_assinados(aspectos):
+    # Cada aspecto (exceto conjunção e oposição) acontece dos dois lados: natal ± ângulo
+    angulos, indices = [], []
+    for indice, nome in enumerate(aspectos):
+        angulo = ASPECTOS[nome][0]
+        for lado in ((angulo,) if angulo in (0.0, 180.0) else (angulo, -angulo)):
+            angulos.append(lado)
+            indices.append(indice)
+    return np.array(angulos), np.array(indices)
+
+
+def transitos_lote(longitudes_natais, jd_inicial, jd_final, planetas=None, aspectos=None):
+    """
+    Aspectos exatos dos planetas em trânsito a pontos natais de muitos mapas
+
+    Args:
+        longitudes_natais (array_like): Shape (m, n): n pontos natais de m
+            mapas (ex.: calcular_mapas_lote(...)['longitude_ecliptica'],
+            opcionalmente com colunas de Ascendente e MC)
+        jd_inicial, jd_final (float): Período (UT)
+        planetas (Iterable[str], opcional): Planetas em trânsito (padrão: todos)
+        aspectos (Iterable[str], opcional): Aspectos (padrão: os maiores)
+
+    Returns:
+        dict: Um elemento por evento, ordenado por mapa e instante
+            - 'planetas', 'aspectos': nomes (os índices abaixo apontam para eles)
+            - 'mapa', 'ponto': linha e coluna de longitudes_natais
+            - 'planeta', 'aspecto': índices do planeta em trânsito e do aspecto
+            - 'jd': instante exato (UT)
+            - 'retrogrado': planeta em trânsito retrógrado no evento
+    """
+    natais = np.atleast_2d(np.asarray(longitudes_natais, dtype=float))
+    planetas = tuple(PLANETAS if planetas is None else planetas)
+    aspectos = tuple(ASPECTOS_MAIORES if aspectos is None else aspectos)
+    angulos, indice_aspecto = _angulos_assinados(aspectos)
+
+    colunas = {chave: [] for chave in ('mapa', 'ponto', 'planeta', 'aspecto', 'jd', 'retrogrado')}
+    for indice_planeta, planeta in enumerate(planetas):
+        jds, longitudes, velocidades = trajetoria(planeta, jd_inicial, jd_final)
+        for inicio in range(0, len(natais), TAMANHO_BLOCO):
+            bloco = natais[inicio:inicio + TAMANHO_BLOCO]
+            alvos = np.mod(bloco[:, :, None] + angulos, 360.0)
+            (mapa, ponto, lado), instantes, retrogrado = buscar_cruzamentos(jds, longitudes, velocidades, alvos)
+            colunas['mapa'].append(mapa + inicio)
+            colunas['ponto'].append(ponto)
+            colunas['planeta'].append(np.full(len(mapa), indice_planeta))
+            colunas['aspecto'].append(indice_aspecto[lado])
+            colunas['jd'].append(instantes)
+            colunas['retrogrado'].append(retrogrado)
+
+    resultado = {chave: np.concatenate(valores) for chave, valores in colunas.items()}
+    ordem = np.lexsort((resultado['jd'], resultado['mapa']))
+    resultado = {chave: valores[ordem] for chave, valores in resultado.items()}
+    resultado['planetas'] = planetas
+    resultado['aspectos'] = aspectos
+    return resultado
+
+
+def ingressos(jd_inicial, jd_final, planetas=None):
+    """
+    Mudanças de signo dos planetas em trânsito no período
+
+    Saem do índice de utils.ingressos quando ele foi gerado e cobre o
+    período; senão, da busca nas trajetórias.
+
+    Returns:
+        list[dict]: 'planeta', 'signo' (em que entra), 'jd' e 'retrogrado',
+        em ordem cronológica
+    """
+    indice = carregar_indice()
+    if indice is not None and indice.jd_inicial <= jd_inicial and jd_final <= indice.jd_final:
+        return _ingressos_do_indice(indice, jd_inicial, jd_final, planetas)
+
+    cuspides = np.arange(12) * 30.0
+    eventos = []
+    for planeta in (PLANETAS if planetas is None else planetas):
+        (indices,), instantes, retrogrado = buscar_cruzamentos(*trajetoria(planeta, jd_inicial, jd_final), cuspides)
+        for cuspide, jd, para_tras in zip(indices, instantes, retrogrado):
+            # Retrógrado, o planeta cruza a cúspide voltando para o signo anterior
+            signo = (cuspide - 1) % 12 if para_tras else cuspide
+            eventos.append({'planeta': planeta, 'signo': SIGNOS[signo], 'jd': float(jd), 'retrogrado': bool(para_tras)})
+    eventos.sort(key=lambda evento: evento['jd'])
+    return eventos
+
+
+def _ingressos_do_indice(indice, jd_inicial, jd_final, planetas=None):
+    # Mesmo formato de ingressos, por busca binária no índice
+    eventos = []
+    for planeta in (PLANETAS if planetas is None else planetas):
+        for jd, anterior, seguinte in zip(*indice.ingressos_entre(planeta, jd_inicial, jd_final)):
+            # Em movimento direto o planeta entra no signo seguinte ao anterior
+            retrogrado = (int(seguinte) - int(anterior)) % 12 != 1
+            eventos.append({'planeta': planeta, 'signo': SIGNOS[seguinte], 'jd': float(jd), 'retrogrado': retrogrado})
+    eventos.sort(key=lambda evento: evento['jd'])
+    return eventos
+
+
+def data_hora(jd):
+    """Converte um Julian Day (UT) em datetime, arredondado ao minuto"""
+    ano, mes, dia, horas = swe.revjul(jd)
+    return datetime(ano, mes, dia) + timedelta(minutes=round(horas * 60))
+
+
+def transitos_do_mapa(data_nasc, hora_nasc, data_inicial, data_final, planetas=None, aspectos=None):
+    """
+    Trânsitos de uma pessoa no período, para montar a previsão personalizada
+
+    Os pontos natais são recalculados pelo Swiss Ephemeris sem o
+    arredondamento de calcular_mapa (0,01°): com um planeta lento em
+    trânsito, esse arredondamento deslocaria o instante exato em horas.
+
+    Args:
+        data_nasc (datetime.date): Data de nascimento
+        hora_nasc (datetime.time): Hora de nascimento (UT, como em calcular_mapa)
+        data_inicial, data_final (datetime.date): Período (inclusive)
+        planetas, aspectos: Ver transitos_lote
+
+    Returns:
+        dict: 'aspectos' (lista de dicts com 'planeta', 'aspecto', 'ponto',
+        'instante' e 'retrogrado') e 'ingressos' (ver ingressos), em ordem cronológica
+    """
+    natais = _longitudes_swe(np.array([_julian_day(data_nasc, hora_nasc)]))[0]
+    # Planetas que o Swiss Ephemeris não calculou (NaN) ficam de fora
+    pontos = [nome for nome, longitude in zip(PLANETAS, natais) if not np.isnan(longitude)]
+    jd_inicial = _julian_day(data_inicial, datetime.min.time())
+    jd_final = _julian_day(data_final + timedelta(days=1), datetime.min.time())
+
+    lote = transitos_lote([natais[~np.isnan(natais)]], jd_inicial, jd_final, planetas, aspectos)
+    eventos = [{
+        'planeta': lote['planetas'][planeta],
+        'aspecto': lote['aspectos'][aspecto],
+        'ponto': pontos[ponto],
+        'instante': data_hora(jd),
+        'retrogrado': bool(retrogrado),
+    } for ponto, planeta, aspecto, jd, retrogrado
+        in zip(lote['ponto'], lote['planeta'], lote['aspecto'], lote['jd'], lote['retrogrado'])]
+
+    mudancas = ingressos(jd_inicial, jd_final, planetas)
+    for evento in mudancas:
+        evento['instante'] = data_hora(evento.pop('jd'))
+    return {'aspectos': eventos, 'ingressos': mudancas}
@@ -0,0 +1,134 @@
+"""
+Coalescência de chamadas idênticas simultâneas ("single-flight")
+
+Quando várias sessões pedem o mesmo texto ao mesmo tempo (por exemplo, o
+horóscopo de Áries logo após a meia-noite), só a primeira chama o LLM; as
+demais esperam essa chamada terminar e recebem o mesmo resultado.
+"""
+import threading
+
+
+class Chamada:
+    """Uma chamada em andamento, que outras threads podem aguardar"""
+
+    def __init__(self):
+        self._evento = threading.Event()
+        self.resultado = None
+        self.erro = None
+
+    def aguardar(self, timeout=None):
+        """
+        Espera a chamada terminar
+
+        Returns:
+            Resultado da chamada
+
+        Raises:
+            TimeoutError: Se estourou o timeout
+            Exception: O mesmo erro que a chamada levantou
+        """
+        if not self._evento.wait(timeout):
+            raise TimeoutError("Chamada em andamento não terminou a tempo")
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+
+class VooUnico:
+    """
+    No máximo uma chamada em andamento por chave; quem chega depois
+    aguarda e recebe o resultado dela. Seguro para uso entre threads.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._chamadas = {}
+
+    def iniciar(self, chave):
+        """
+        Registra uma chamada para a chave, se ainda não houver uma
+
+        Returns:
+            tuple: (Chamada, lider). Se lider for True, quem chamou deve
+            executar o trabalho e depois chamar concluir(); senão deve
+            apenas aguardar a Chamada devolvida
+        """
+        with self._lock:
+            chamada = self._chamadas.get(chave)
+            if chamada is not None:
+                return chamada, False
+            chamada = self._chamadas[chave] = Chamada()
+            return chamada, True
+
+    def concluir(self, chave, chamada, resultado=None, erro=None):
+        """Publica o resultado (ou erro) para quem está aguardando e libera a chave"""
+        with self._lock:
+            if self._chamadas.get(chave) is chamada:
+                del self._chamadas[chave]
+        if isinstance(erro, GeneratorExit):
+            # Streaming abandonado pelo leitor: quem aguarda recebe um erro comum
+            erro = RuntimeError("Geração interrompida antes de terminar")
+        chamada.resultado = resultado
+        chamada.erro = erro
+        chamada._evento.set()
+
+    def em_andamento(self, chave):
+        """True se há uma chamada em andamento para a chave"""
+        with self._lock:
+            return chave in self._chamadas
+
+    def executar(self, chave, funcao, timeout=None):
+        """
+        Executa funcao() uma vez por chave, mesmo com chamadas simultâneas
+
+        Args:
+            chave: Identifica chamadas equivalentes
+            funcao (callable): Trabalho a executar, sem argumentos
+            timeout (float, opcional): Espera máxima de quem não é o líder
+
+        Returns:
+            Resultado de funcao(), da própria execução ou da que já estava
+            em andamento
+        """
+        chamada, lider = self.iniciar(chave)
+        if not lider:
+            return chamada.aguardar(timeout)
+
+        try:
+            resultado = funcao()
+        except BaseException as e:
+            self.concluir(chave, chamada, erro=e)
+            raise
+        self.concluir(chave, chamada, resultado)
+        return resultado
+
+    def em_segundo_plano(self, chave, funcao):
+        """
+        Executa funcao() numa thread, a menos que a chave já esteja em andamento
+
+        Returns:
+            bool: True se iniciou uma nova execução
+        """
+        chamada, lider = self.iniciar(chave)
+        if not lider:
+            return False
+
+        def _executar():
+            resultado = None
+            erro = RuntimeError("Execução em segundo plano interrompida")
+            try:
+                resultado = funcao()
+                erro = None
+            except Exception as e:
+                erro = e
+            finally:
+                # Libera a chave mesmo se funcao() sair por BaseException (ex.: SystemExit)
+                self.concluir(chave, chamada, resultado, erro)
+
+        try:
+            threading.Thread(target=_executar, name=f"voo-unico-{chave}", daemon=True).start()
+        except BaseException as e:
+            # Sem thread, ninguém concluiria a chamada
+            self.concluir(chave, chamada, erro=e)
+            raise
+        return True